@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent import TraeAgent
+from trae_agent.utils.cli_console import CLIConsole
+from trae_agent.utils.config import Config
+from trae_agent.utils.mock_server import LatencyDistribution, MockLLMServer
+
+
+class TestStepTimings(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_steps_carry_latency_breakdown(self):
+        with MockLLMServer(latency=LatencyDistribution("fixed", 0.2)) as server:
+            config = Config(
+                {
+                    "default_provider": "pollinations",
+                    "max_steps": 10,
+                    "enable_lakeview": False,
+                    "model_providers": {
+                        "pollinations": {
+                            "model": "mock",
+                            "api_key": "mock",
+                            "base_url": server.base_url,
+                            "max_retries": 1,
+                        }
+                    },
+                }
+            )
+            agent = TraeAgent(config)
+            trajectory_path = agent.setup_trajectory_recording(
+                str(self.root / "trajectory.json")
+            )
+            agent.new_task("look", {"project_path": str(self.root), "issue": "look"})
+
+            async def execute():
+                try:
+                    return await agent.execute_task()
+                finally:
+                    await agent.tool_caller.close_tools()
+
+            execution = asyncio.run(execute())
+
+        self.assertTrue(execution.success)
+        for step in execution.steps:
+            self.assertGreaterEqual(step.timings.llm_time, 0.2)
+            self.assertGreaterEqual(step.timings.total_time, step.timings.llm_time)
+            self.assertGreater(step.timings.recorder_time, 0)
+            self.assertEqual(step.timings.retry_wait_time, 0)
+        tool_step = execution.steps[0]
+        self.assertEqual(
+            set(tool_step.timings.tool_durations),
+            {tool_call.call_id for tool_call in tool_step.tool_calls or []},
+        )
+
+        recorded_steps = json.loads(Path(trajectory_path).read_text())["agent_steps"]
+        self.assertEqual(len(recorded_steps), len(execution.steps))
+        self.assertGreaterEqual(recorded_steps[0]["timings"]["llm_time"], 0.2)
+
+        table = CLIConsole(None).create_latency_table(execution)
+        assert table is not None
+        phases = list(table.columns[0].cells)
+        self.assertIn("LLM", phases)
+        self.assertIn("  bash", phases)
+        self.assertNotIn("Retry Wait", phases)
+
+
+if __name__ == "__main__":
+    unittest.main()
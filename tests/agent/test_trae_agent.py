@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 import unittest
@@ -6,6 +7,7 @@ from unittest.mock import MagicMock, patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
 
+from tests.helpers import make_repo
 from trae_agent.agent.agent_basics import AgentError
 from trae_agent.agent.trae_agent import TraeAgent
 from trae_agent.utils.config import Config
@@ -42,25 +44,26 @@ class TestTraeAgentExtended(unittest.TestCase):
         self.assertEqual(len(self.agent.tools), 4)
         self.assertTrue(any(tool.get_name() == "bash" for tool in self.agent.tools))
 
-    @patch("subprocess.check_output")
-    def test_git_diff_generation(self, mock_subprocess):
-        mock_subprocess.return_value = b"test diff"
-        self.agent.project_path = self.test_project_path
+    def make_repo(self) -> str:
+        return make_repo(self, {"src/app.py": "a = 1\n", "tests/test_app.py": ""})
 
-        diff = self.agent.get_git_diff()
-        self.assertEqual(diff, "test diff")
-        mock_subprocess.assert_called_with(["git", "--no-pager", "diff"])
+    def test_git_diff_generation(self):
+        self.agent.project_path = self.make_repo()
+        with open(os.path.join(self.agent.project_path, "src/app.py"), "a") as f:
+            _ = f.write("b = 2\n")
+
+        cwd = os.getcwd()
+        diff = asyncio.run(self.agent.get_git_diff())
+        self.assertIn("+b = 2", diff)
+        self.assertEqual(os.getcwd(), cwd)
 
     def test_patch_filtering(self):
-        test_patch = """diff --git a/tests/test_example.py b/tests/test_example.py
---- a/tests/test_example.py
-+++ b/tests/test_example.py
-@@ -5,6 +5,7 @@
-     def test_example(self):
-         assert True
-"""
-        filtered = self.agent.remove_patches_to_tests(test_patch)
-        self.assertEqual(filtered, "")
+        self.agent.project_path = self.make_repo()
+        with open(os.path.join(self.agent.project_path, "tests/test_app.py"), "a") as f:
+            _ = f.write("assert True\n")
+
+        self.assertIn("tests/test_app.py", asyncio.run(self.agent.get_git_diff()))
+        self.assertEqual(asyncio.run(self.agent.get_git_diff(exclude_tests=True)), "")
 
     @patch("asyncio.create_task")
     @patch("trae_agent.utils.cli_console.CliConsole")
@@ -72,11 +75,18 @@ class TestTraeAgentExtended(unittest.TestCase):
     def test_task_completion_detection(self):
         # Test empty patch scenario
         self.agent.must_patch = "true"
-        self.assertFalse(self.agent.is_task_completed(MagicMock()))
+        self.assertFalse(asyncio.run(self.agent.is_task_completed(MagicMock())))
+
+        # A change to the tests only is not a patch
+        self.agent.project_path = self.make_repo()
+        with open(os.path.join(self.agent.project_path, "tests/test_app.py"), "a") as f:
+            _ = f.write("assert True\n")
+        self.assertFalse(asyncio.run(self.agent.is_task_completed(MagicMock())))
 
         # Test valid patch scenario
-        with patch.object(self.agent, "get_git_diff", return_value="valid patch"):
-            self.assertTrue(self.agent.is_task_completed(MagicMock()))
+        with open(os.path.join(self.agent.project_path, "src/app.py"), "a") as f:
+            _ = f.write("b = 2\n")
+        self.assertTrue(asyncio.run(self.agent.is_task_completed(MagicMock())))
 
     def test_tool_initialization(self):
         tools = [
@@ -0,0 +1,79 @@
+"""Helpers shared by the tests."""
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+from trae_agent.utils.config import Config
+
+
+def make_repo(test: unittest.TestCase, files: dict[str, str]) -> str:
+    """Create a git checkout with the files in one commit, removed after the test.
+
+    Args:
+        test: The test that uses the checkout
+        files: Contents by path relative to the checkout
+
+    Returns:
+        The path of the checkout.
+    """
+    tmp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp_dir.cleanup)
+    project_path = tmp_dir.name
+    for path, content in files.items():
+        full_path = os.path.join(project_path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            _ = f.write(content)
+    for command in (
+        ["git", "init", "-q"],
+        ["git", "add", "."],
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "i"],
+    ):
+        _ = subprocess.run(command, cwd=project_path, check=True)
+    return project_path
+
+
+def make_config(
+    base_url: str = "http://localhost",
+    providers: dict[str, dict[str, object]] | None = None,
+    lakeview: dict[str, object] | None = None,
+    **options: object,
+) -> Config:
+    """A configuration whose default provider is the mock LLM server.
+
+    Args:
+        base_url: Base URL of the mock server
+        providers: More providers, or settings that replace the mock provider's
+        lakeview: Lakeview settings; Lakeview is not configured if not given
+        options: Top-level settings, such as max_steps
+
+    Returns:
+        The configuration.
+    """
+    model_providers: dict[str, dict[str, object]] = {
+        "pollinations": {
+            "model": "mock",
+            "api_key": "mock",
+            "base_url": base_url,
+            "max_retries": 1,
+        }
+    }
+    for name, settings in (providers or {}).items():
+        model_providers[name] = {**model_providers.get(name, {}), **settings}
+    if lakeview is not None:
+        options["lakeview_config"] = {
+            "model_provider": "pollinations",
+            "model_name": "mock",
+            **lakeview,
+        }
+    return Config(
+        {
+            "default_provider": "pollinations",
+            "max_steps": 10,
+            "enable_lakeview": False,
+            "model_providers": model_providers,
+            **options,
+        }
+    )
@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+
+# Modules that only the commands running an agent or rendering output may load:
+# the agent, rich, httpx and the provider SDKs would each slow down every command
+DEFERRED_MODULES = [
+    "asyncio",
+    "dotenv",
+    "httpx",
+    "openai",
+    "anthropic",
+    "google",
+    "rich",
+]
+
+
+def run_python(code: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def deferred_modules_loaded(code: str) -> tuple[str, list[str]]:
+    """Run the code, then return its output and the deferred modules it loaded."""
+    result = run_python(
+        f"{code}\nimport json, sys\n"
+        "print(json.dumps(sorted(sys.modules)), file=sys.stderr)"
+    )
+    modules: list[str] = json.loads(result.stderr.splitlines()[-1])
+    return result.stdout, [
+        module
+        for module in modules
+        if module.split(".")[0] in DEFERRED_MODULES
+        or module.startswith("trae_agent.agent")
+    ]
+
+
+class TestCLIStartup(unittest.TestCase):
+    def test_import_does_not_load_heavy_modules(self):
+        _, loaded = deferred_modules_loaded("import trae_agent.cli")
+        self.assertEqual(
+            loaded,
+            [],
+            "Importing trae_agent.cli got slower, run "
+            "`python -X importtime -c 'import trae_agent.cli'` to find out why",
+        )
+
+    def test_help_does_not_load_the_agent(self):
+        output, loaded = deferred_modules_loaded(
+            "from trae_agent.cli import cli\n"
+            "try:\n"
+            "    cli(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass"
+        )
+        self.assertIn("run", output)
+        self.assertEqual(loaded, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
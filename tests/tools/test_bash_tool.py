@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
@@ -72,6 +73,40 @@ class TestBashTool(unittest.IsolatedAsyncioTestCase):
         self.assertIn("no command provided", result.error.lower())
         self.assertEqual(result.error_code, -1)
 
+    async def test_started_session_moves_to_the_task_directory(self):
+        await self.tool.start()
+        with tempfile.TemporaryDirectory() as project_path:
+            project_path = os.path.realpath(project_path)
+            self.tool.set_cwd(project_path)
+            self.assertEqual(await self.tool.get_state(), {"cwd": project_path})
+
+            result = await self.tool.execute(ToolCallArguments({"command": "pwd"}))
+            self.assertEqual(result.output, project_path)
+            self.assertEqual(result.error, "")
+
+    async def test_restarted_session_starts_in_the_task_directory(self):
+        with tempfile.TemporaryDirectory() as project_path:
+            project_path = os.path.realpath(project_path)
+            self.tool.set_cwd(project_path)
+            _ = await self.tool.execute(ToolCallArguments({"command": "cd /"}))
+            _ = await self.tool.execute(ToolCallArguments({"restart": True}))
+
+            result = await self.tool.execute(ToolCallArguments({"command": "pwd"}))
+            self.assertEqual(result.output, project_path)
+
+    @unittest.skipUnless(os.path.isdir("/proc"), "requires procfs")
+    async def test_close_terminates_shell(self):
+        result = await self.tool.execute(ToolCallArguments({"command": "echo $$"}))
+        shell_pid = int(result.output)
+        await self.tool.close()
+        self.assertIsNone(self.tool._session)
+        # The shell may linger as a zombie until it is reaped, but must not run
+        try:
+            with open(f"/proc/{shell_pid}/stat") as f:
+                self.assertEqual(f.read().split()[2], "Z")
+        except FileNotFoundError:
+            pass
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,168 @@
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from tests.helpers import make_config, make_repo
+from trae_agent.agent import TraeAgent
+from trae_agent.tools.base import ToolCallArguments
+from trae_agent.tools.delegate_tool import DelegateTool
+from trae_agent.utils.config import Config
+from trae_agent.utils.mock_server import (
+    LatencyDistribution,
+    MockLLMServer,
+    ScriptedResponse,
+    ScriptedToolCall,
+)
+
+# A sub-agent that changes a file by a relative path before answering
+WRITING_SCRIPT = [
+    ScriptedResponse(
+        content="Checking the file.",
+        tool_calls=[
+            ScriptedToolCall(
+                name="bash",
+                arguments={"command": "echo changed > app.py"},
+            )
+        ],
+    ),
+    ScriptedResponse(
+        content="`a` is set in app.py:1.",
+        tool_calls=[ScriptedToolCall(name="task_done")],
+    ),
+]
+
+
+def delegation_config(
+    base_url: str, delegation: dict[str, object] | None = None
+) -> Config:
+    return make_config(base_url, enable_delegation=True, delegation=delegation or {})
+
+
+class TestDelegateTool(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.project_path = make_repo(self, {"app.py": "a = 1\n"})
+        self.file_path = os.path.join(self.project_path, "app.py")
+
+    def make_tool(self, config: Config) -> DelegateTool:
+        tool = DelegateTool()
+        tool.configure(config, None)
+        return tool
+
+    async def test_sub_tasks_run_in_parallel(self):
+        # The default script takes three turns: view, bash and task_done
+        with MockLLMServer(latency=LatencyDistribution("fixed", 0.3)) as server:
+            tool = self.make_tool(delegation_config(server.base_url))
+            result = await tool.execute(
+                ToolCallArguments(
+                    {
+                        "tasks": ["Find A", "Find B", "Find C"],
+                        "path": self.project_path,
+                    }
+                )
+            )
+            peak_in_flight = server.stats["peak_in_flight"]
+
+        output = result.output or ""
+        self.assertEqual(result.error_code, 0)
+        for index, task in enumerate(["Find A", "Find B", "Find C"], 1):
+            self.assertIn(f"[{index}] {task}\nThe task is complete.", output)
+        self.assertEqual(output.count("(Finished in 3 steps)"), 3)
+        # One after another, there would never be two requests at once
+        self.assertGreaterEqual(peak_in_flight, 2)
+
+    def git(self, *args: str) -> str:
+        return subprocess.run(
+            ["git", *args],
+            cwd=self.project_path,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    async def test_read_only_sub_agents_work_in_a_fork(self):
+        # The parent agent's process works in the project directory
+        cwd = os.getcwd()
+        os.chdir(self.project_path)
+        self.addCleanup(os.chdir, cwd)
+        with MockLLMServer(script=WRITING_SCRIPT) as server:
+            tool = self.make_tool(delegation_config(server.base_url))
+            # An uncommitted change is part of the fork, and survives it
+            with open(self.file_path, "a") as f:
+                _ = f.write("b = 2\n")
+            result = await tool.execute(
+                ToolCallArguments(
+                    {"tasks": ["Where is a set?"], "path": self.project_path}
+                )
+            )
+            self.assertIn("`a` is set in app.py:1.", result.output or "")
+            with open(self.file_path) as f:
+                self.assertEqual(f.read(), "a = 1\nb = 2\n")
+            # The fork and its snapshot are gone
+            self.assertEqual(self.git("worktree", "list").count("\n"), 1)
+            self.assertEqual(
+                self.git("for-each-ref", "refs/worktree/polli-snapshots/"), ""
+            )
+
+            result = await tool.execute(
+                ToolCallArguments(
+                    {
+                        "tasks": ["Change a"],
+                        "path": self.project_path,
+                        "read_only": False,
+                    }
+                )
+            )
+            with open(self.file_path) as f:
+                self.assertEqual(f.read(), "changed\n")
+
+    async def test_step_limit_and_summary_length(self):
+        with MockLLMServer() as server:
+            tool = self.make_tool(
+                delegation_config(
+                    server.base_url, {"max_steps": 2, "summary_max_chars": 8}
+                )
+            )
+            result = await tool.execute(
+                ToolCallArguments({"tasks": ["Find A"], "path": self.project_path})
+            )
+        output = result.output or ""
+        self.assertIn("Listing  [...]", output)
+        self.assertIn("Stopped without finishing after 2 steps", output)
+
+    async def test_errors(self):
+        tool = DelegateTool()
+        result = await tool.execute(
+            ToolCallArguments({"tasks": ["Find A"], "path": self.project_path})
+        )
+        self.assertIn("not available", result.error or "")
+
+        tool = self.make_tool(
+            delegation_config("http://localhost", {"max_subtasks": 2})
+        )
+        for arguments, error in (
+            ({"tasks": [], "path": self.project_path}, "No tasks"),
+            ({"tasks": ["a", "b", "c"], "path": self.project_path}, "at most 2"),
+            ({"tasks": ["a"]}, "No path"),
+            (
+                {"tasks": ["a"], "path": self.project_path, "tools": ["delegate"]},
+                "only use",
+            ),
+        ):
+            result = await tool.execute(ToolCallArguments(arguments))
+            self.assertEqual(result.error_code, -1)
+            self.assertIn(error, result.error or "")
+
+    def test_trae_agent_gets_configured_tool(self):
+        agent = TraeAgent(delegation_config("http://localhost"))
+        tools = {tool.name: tool for tool in agent.create_tools()}
+        self.assertIn("delegate", tools)
+        delegate = tools["delegate"]
+        assert isinstance(delegate, DelegateTool)
+        self.assertIn("at most 4", delegate.parameters[0].description)
+
+
+if __name__ == "__main__":
+    unittest.main()
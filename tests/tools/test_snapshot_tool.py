@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from tests.helpers import make_repo
+from trae_agent.tools.base import ToolCallArguments
+from trae_agent.tools.snapshot_tool import WorkspaceSnapshotTool
+
+
+class TestWorkspaceSnapshotTool(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tool = WorkspaceSnapshotTool()
+        self.project_path = make_repo(self, {"app.py": "a = 1\n"})
+        self.file_path = os.path.join(self.project_path, "app.py")
+
+    async def test_create_and_rollback_in_one_call(self):
+        result = await self.tool.execute(
+            ToolCallArguments(
+                {"command": "create", "path": self.project_path, "name": "clean"}
+            )
+        )
+        self.assertIn("Saved snapshot clean", result.output or "")
+
+        with open(self.file_path, "w") as f:
+            _ = f.write("broken\n")
+        result = await self.tool.execute(
+            ToolCallArguments({"command": "rollback", "path": self.project_path})
+        )
+        self.assertEqual(result.error_code, 0)
+        self.assertIn("app.py", result.output or "")
+        with open(self.file_path) as f:
+            self.assertEqual(f.read(), "a = 1\n")
+
+        result = await self.tool.execute(
+            ToolCallArguments({"command": "list", "path": self.project_path})
+        )
+        self.assertIn("before-rollback", result.output or "")
+
+    async def test_errors(self):
+        result = await self.tool.execute(
+            ToolCallArguments({"command": "rollback", "path": self.project_path})
+        )
+        self.assertEqual(result.error_code, -1)
+        self.assertIn("no snapshots", result.error or "")
+
+        result = await self.tool.execute(
+            ToolCallArguments({"command": "delete", "path": self.project_path})
+        )
+        self.assertEqual(result.error_code, -1)
+
+        os.mkdir(os.path.join(self.project_path, "lib"))
+        result = await self.tool.execute(
+            ToolCallArguments(
+                {"command": "create", "path": os.path.join(self.project_path, "lib")}
+            )
+        )
+        self.assertEqual(result.error_code, -1)
+        self.assertIn("whole checkout", result.error or "")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result = await self.tool.execute(
+                ToolCallArguments({"command": "create", "path": tmp_dir})
+            )
+        self.assertEqual(result.error_code, -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
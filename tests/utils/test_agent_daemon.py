@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.utils.agent_daemon import AgentDaemon
+from trae_agent.utils.config import Config
+from trae_agent.utils.metrics import BASH_SESSIONS
+from trae_agent.utils.mock_server import (
+    MockLLMServer,
+    ScriptedResponse,
+    ScriptedToolCall,
+)
+
+
+class TestAgentDaemon(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.mock_server = MockLLMServer().start()
+        config = Config(
+            {
+                "default_provider": "pollinations",
+                "max_steps": 10,
+                "enable_lakeview": False,
+                "model_providers": {
+                    "pollinations": {
+                        "model": "mock",
+                        "api_key": "mock",
+                        "base_url": self.mock_server.base_url,
+                        "max_retries": 1,
+                    }
+                },
+            }
+        )
+        self.daemon = AgentDaemon(config, 2, self.root / "trajectories", token="secret")
+        ready: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self.serve_task = asyncio.create_task(
+            self.daemon.serve(
+                port=0,
+                on_ready=lambda server: ready.set_result(
+                    server.sockets[0].getsockname()[1]
+                ),
+            )
+        )
+        self.port = await ready
+
+    async def asyncTearDown(self):
+        _ = self.serve_task.cancel()
+        _ = await asyncio.gather(self.serve_task, return_exceptions=True)
+        self.mock_server.stop()
+        self.tmp_dir.cleanup()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        data: dict[str, object] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, list[dict[str, object]]]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        body = json.dumps(data).encode() if data is not None else b""
+        headers = {
+            "Host": "localhost:8766",
+            "Authorization": "Bearer secret",
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            **(headers or {}),
+        }
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\n".encode()
+            + "".join(
+                f"{name}: {value}\r\n" for name, value in headers.items() if value
+            ).encode()
+            + b"\r\n"
+            + body
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        status = int(head.split()[1])
+        return status, [json.loads(line) for line in payload.splitlines()]
+
+    async def test_streamed_task(self):
+        working_dir = self.root / "repo"
+        working_dir.mkdir()
+        status, events = await self.request(
+            "POST",
+            "/tasks",
+            {
+                "id": "t1",
+                "task": "look",
+                "working_dir": str(working_dir),
+                "stream": True,
+            },
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [events[0]["event"], events[1]["event"]], ["queued", "started"]
+        )
+        self.assertIn("step", {event["event"] for event in events})
+        self.assertEqual(events[-1]["event"], "done")
+        self.assertTrue(events[-1]["result"]["success"])
+
+        status, [task] = await self.request("GET", "/tasks/t1")
+        self.assertEqual((status, task["status"]), (200, "done"))
+
+    async def test_warm_agents_work_in_the_task_directory(self):
+        # Both workers have started their bash sessions ahead of any task
+        async with asyncio.timeout(5):
+            while BASH_SESSIONS.value() < 2:
+                await asyncio.sleep(0.01)
+        self.mock_server.script = [
+            ScriptedResponse(
+                content="Recording the directory.",
+                tool_calls=[
+                    ScriptedToolCall(
+                        name="bash", arguments={"command": "pwd > where.txt"}
+                    )
+                ],
+            ),
+            ScriptedResponse(
+                content="The task is complete.",
+                tool_calls=[ScriptedToolCall(name="task_done")],
+            ),
+        ]
+        working_dir = self.root / "repo"
+        working_dir.mkdir()
+        status, _ = await self.request(
+            "POST",
+            "/tasks",
+            {"id": "t1", "task": "look", "working_dir": str(working_dir)},
+        )
+        self.assertEqual(status, 202)
+        async with asyncio.timeout(10):
+            while (await self.request("GET", "/tasks/t1"))[1][0]["status"] != "done":
+                await asyncio.sleep(0.05)
+
+        self.assertEqual(
+            (working_dir / "where.txt").read_text().strip(),
+            os.path.realpath(working_dir),
+        )
+
+    async def test_invalid_requests(self):
+        status, _ = await self.request("POST", "/tasks", {"task": "look"})
+        self.assertEqual(status, 400)
+        status, _ = await self.request("GET", "/tasks/unknown")
+        self.assertEqual(status, 404)
+        status, [health] = await self.request("GET", "/health")
+        self.assertEqual((status, health["concurrency"]), (200, 2))
+
+    async def test_tcp_requests_are_authenticated(self):
+        task = {"task": "look", "working_dir": str(self.root)}
+        for headers, expected in (
+            ({"Authorization": ""}, 401),
+            ({"Authorization": "Bearer wrong"}, 401),
+            ({"Host": "evil.example:8766"}, 403),
+            ({"Content-Type": "text/plain"}, 415),
+            ({"Content-Length": "abc"}, 400),
+            ({"Content-Length": "-1"}, 400),
+            ({"Content-Length": ""}, 411),
+            ({"Content-Length": str(10 * 1024 * 1024)}, 413),
+        ):
+            status, _ = await self.request("POST", "/tasks", task, headers)
+            self.assertEqual(status, expected, headers)
+        status, _ = await self.request("GET", "/health", headers={"Host": ""})
+        self.assertEqual(status, 403)
+        status, _ = await self.request("GET", "/health", headers={"Host": "[::1]:80"})
+        self.assertEqual(status, 200)
+
+    async def test_unix_socket_without_token(self):
+        socket_path = str(self.root / "polli.sock")
+        daemon = AgentDaemon(self.daemon.config, 1, self.root / "trajectories")
+        ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        serve_task = asyncio.create_task(
+            daemon.serve(
+                socket_path=socket_path, on_ready=lambda _: ready.set_result(None)
+            )
+        )
+        try:
+            await ready
+            self.assertEqual(os.stat(socket_path).st_mode & 0o777, 0o600)
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            self.assertIn(b" 200 ", await reader.readline())
+            writer.close()
+        finally:
+            _ = serve_task.cancel()
+            _ = await asyncio.gather(serve_task, return_exceptions=True)
+
+        with self.assertRaises(ValueError):
+            await daemon.serve(port=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
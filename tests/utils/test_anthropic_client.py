@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.tools.base import ToolResult
+from trae_agent.tools.task_done_tool import TaskDoneTool
+from trae_agent.utils.anthropic_client import AnthropicClient
+from trae_agent.utils.config import ModelParameters
+from trae_agent.utils.llm_basics import LLMMessage
+
+
+class TestAnthropicPromptCaching(unittest.TestCase):
+    def setUp(self):
+        self.model_parameters = ModelParameters(
+            model="claude-sonnet-4-20250514",
+            api_key="test-key",
+            max_tokens=1024,
+            temperature=0.5,
+            top_p=1,
+            top_k=0,
+            parallel_tool_calls=False,
+            max_retries=1,
+        )
+        self.client = AnthropicClient(self.model_parameters)
+        self.client.client = MagicMock()
+        response = self.client.client.messages.create.return_value
+        response.content = []
+        response.usage.input_tokens = 10
+        response.usage.output_tokens = 5
+        response.usage.cache_creation_input_tokens = 90
+        response.usage.cache_read_input_tokens = 900
+
+    def test_breakpoints_on_system_tools_and_history(self):
+        response = self.client.chat(
+            [LLMMessage(role="system", content="system"), LLMMessage("user", "hi")],
+            self.model_parameters,
+            [TaskDoneTool()],
+        )
+        kwargs = self.client.client.messages.create.call_args.kwargs
+        self.assertEqual(kwargs["system"][0]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(kwargs["tools"][-1]["cache_control"], {"type": "ephemeral"})
+        self.assertIn("cache_control", kwargs["messages"][-1]["content"][-1])
+        self.assertEqual(response.usage.input_tokens, 1000)
+        self.assertEqual(response.usage.cache_read_input_tokens, 900)
+
+    def test_history_is_not_mutated(self):
+        self.client.chat([LLMMessage("user", "hi")], self.model_parameters)
+        for i in range(3):
+            result = ToolResult(call_id=f"c{i}", name="bash", success=True, result="ok")
+            self.client.chat(
+                [LLMMessage(role="user", tool_result=result)], self.model_parameters
+            )
+        kwargs = self.client.client.messages.create.call_args.kwargs
+        marked = [
+            block
+            for message in kwargs["messages"]
+            if isinstance(message["content"], list)
+            for block in message["content"]
+            if isinstance(block, dict) and "cache_control" in block
+        ]
+        self.assertEqual(len(marked), 2)
+        self.assertNotIn("cache_control", str(self.client.message_history))
+
+    def test_caching_can_be_disabled(self):
+        self.model_parameters.enable_prompt_caching = False
+        self.client.chat(
+            [LLMMessage(role="system", content="system"), LLMMessage("user", "hi")],
+            self.model_parameters,
+        )
+        kwargs = self.client.client.messages.create.call_args.kwargs
+        self.assertEqual(kwargs["system"], "system")
+        self.assertEqual(kwargs["messages"][-1]["content"], "hi")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from tests.helpers import make_config
+from trae_agent.utils.batch_runner import load_batch_tasks, run_batch
+from trae_agent.utils.mock_server import (
+    LatencyDistribution,
+    MockLLMServer,
+    ScriptedResponse,
+    ScriptedToolCall,
+)
+
+# Each task records the directory its bash session runs in
+SCRIPT = [
+    ScriptedResponse(
+        content="Recording the directory.",
+        tool_calls=[
+            ScriptedToolCall(name="bash", arguments={"command": "pwd > where.txt"})
+        ],
+    ),
+    ScriptedResponse(
+        content="The task is complete.",
+        tool_calls=[ScriptedToolCall(name="task_done")],
+    ),
+]
+
+
+class TestBatchRunner(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_tasks(self, lines: list[dict[str, object]]) -> Path:
+        tasks_path = self.root / "tasks.jsonl"
+        tasks_path.write_text("\n".join(json.dumps(line) for line in lines) + "\n")
+        return tasks_path
+
+    def test_load_batch_tasks(self):
+        tasks = load_batch_tasks(
+            self.write_tasks(
+                [
+                    {"id": "a", "task": "fix", "working_dir": "repo_a"},
+                    {"task": "fix", "working_dir": "repo_b", "must_patch": True},
+                ]
+            )
+        )
+        self.assertEqual([task.task_id for task in tasks], ["a", "2"])
+        self.assertTrue(os.path.isabs(tasks[0].working_dir))
+        self.assertTrue(tasks[1].must_patch)
+
+        with self.assertRaises(ValueError):
+            _ = load_batch_tasks(self.write_tasks([{"task": "fix"}]))
+        with self.assertRaises(ValueError):
+            _ = load_batch_tasks(
+                self.write_tasks(
+                    [
+                        {"id": "a", "task": "fix", "working_dir": "x"},
+                        {"id": "a", "task": "fix", "working_dir": "y"},
+                    ]
+                )
+            )
+
+    async def test_tasks_share_one_event_loop(self):
+        lines: list[dict[str, object]] = []
+        for index in range(4):
+            working_dir = self.root / f"repo_{index}"
+            working_dir.mkdir()
+            lines.append(
+                {"id": f"t{index}", "task": "look", "working_dir": str(working_dir)}
+            )
+        tasks = load_batch_tasks(self.write_tasks(lines))
+
+        with MockLLMServer(
+            script=SCRIPT, latency=LatencyDistribution("fixed", 0.3)
+        ) as server:
+            results_path = self.root / "results.jsonl"
+            results = await run_batch(
+                make_config(server.base_url),
+                tasks,
+                4,
+                results_path,
+                self.root / "trajectories",
+            )
+            peak_in_flight = server.stats["peak_in_flight"]
+
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(len(results_path.read_text().splitlines()), 4)
+        for result in results:
+            self.assertTrue(Path(result.trajectory_file).exists())
+        # One after another, there would never be two requests at once
+        self.assertGreaterEqual(peak_in_flight, 2)
+        # Each task's shell ran in its own working directory
+        for task in tasks:
+            where = Path(task.working_dir) / "where.txt"
+            self.assertEqual(where.read_text().strip(), task.working_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from tests.helpers import make_config, make_repo
+from trae_agent.utils.best_of_n import attempt_specs, run_attempts, verify_patch
+from trae_agent.utils.config import Config
+from trae_agent.utils.mock_server import (
+    MockLLMServer,
+    ScriptedResponse,
+    ScriptedToolCall,
+)
+
+# Each attempt writes the name of its fork, attempt-<n>, to result.txt
+SCRIPT = [
+    ScriptedResponse(
+        content="Recording which attempt this is.",
+        tool_calls=[
+            ScriptedToolCall(
+                name="bash",
+                arguments={
+                    "command": "cd {project_root} && basename $PWD > result.txt"
+                },
+            )
+        ],
+    ),
+    ScriptedResponse(
+        content="The task is complete.",
+        tool_calls=[ScriptedToolCall(name="task_done")],
+    ),
+]
+
+
+# Each attempt edits a file by a relative path, in the bash session's cwd
+RELATIVE_SCRIPT = [
+    ScriptedResponse(
+        content="Editing app.py.",
+        tool_calls=[
+            ScriptedToolCall(
+                name="bash",
+                arguments={"command": "basename $PWD >> app.py"},
+            )
+        ],
+    ),
+    SCRIPT[1],
+]
+
+
+def attempts_config(base_url: str = "http://localhost") -> Config:
+    return make_config(
+        base_url,
+        {
+            "pollinations": {"temperature": 0.5},
+            "openrouter": {"model": "other", "api_key": "mock"},
+        },
+        max_steps=5,
+    )
+
+
+class TestBestOfN(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.project_path = Path(make_repo(self, {"app.py": "a = 1\n"}))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def git(self, *args: str) -> str:
+        return subprocess.run(
+            ["git", *args],
+            cwd=self.project_path,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    def test_attempt_specs(self):
+        config = attempts_config()
+
+        specs = attempt_specs(config, 3)
+        self.assertEqual([spec.temperature for spec in specs], [0.5, 0.75, 1.0])
+        self.assertEqual({spec.model for spec in specs}, {"mock"})
+
+        specs = attempt_specs(config, 3, [0.0], ["pollinations", "openrouter:big"])
+        self.assertEqual(
+            [(spec.provider, spec.model) for spec in specs],
+            [("pollinations", "mock"), ("openrouter", "big"), ("pollinations", "mock")],
+        )
+        self.assertEqual({spec.temperature for spec in specs}, {0.0})
+
+        with self.assertRaises(ValueError):
+            _ = attempt_specs(config, 2, providers=["missing"])
+
+    async def test_verified_attempt_wins(self):
+        with MockLLMServer(script=SCRIPT) as server:
+            config = attempts_config(server.base_url)
+            seen: list[int] = []
+            result = await run_attempts(
+                config,
+                "Write result.txt",
+                str(self.project_path),
+                attempt_specs(config, 3),
+                self.root / "trajectories",
+                verify_command="grep -q attempt-1 result.txt",
+                on_result=lambda attempt: seen.append(attempt.attempt),
+            )
+
+        winner = result.winner
+        assert winner is not None
+        self.assertEqual(winner.attempt, 1)
+        self.assertTrue(winner.verified)
+        self.assertIn("+attempt-1", winner.patch)
+        self.assertIn(1, seen)
+        for attempt in result.attempts:
+            if not attempt.cancelled and attempt.attempt != 1:
+                self.assertFalse(attempt.verified)
+
+        # The winning patch applies to the untouched project
+        self.assertFalse((self.project_path / "result.txt").exists())
+        patch_file = self.root / "winner.patch"
+        _ = patch_file.write_text(winner.patch)
+        _ = self.git("apply", str(patch_file))
+        self.assertEqual((self.project_path / "result.txt").read_text(), "attempt-1\n")
+        # Forks and the base snapshot are cleaned up
+        self.assertEqual(self.git("worktree", "list").count("\n"), 1)
+        self.assertEqual(self.git("for-each-ref", "refs/worktree/polli-snapshots/"), "")
+
+    async def test_unverified_fallback(self):
+        with MockLLMServer(script=SCRIPT) as server:
+            config = attempts_config(server.base_url)
+            result = await run_attempts(
+                config,
+                "Write result.txt",
+                str(self.project_path),
+                attempt_specs(config, 2),
+                self.root / "trajectories",
+                # Attempt 0 takes longer to fail, so attempt 1 finishes first
+                verify_command="if grep -q attempt-0 result.txt; then sleep 1; fi; false",
+            )
+
+        self.assertIsNotNone(result.winner)
+        assert result.winner is not None
+        self.assertEqual(result.winner.attempt, 1)
+        self.assertFalse(result.winner.verified)
+        self.assertFalse(any(attempt.accepted for attempt in result.attempts))
+
+    async def test_relative_bash_edits_stay_in_the_fork(self):
+        # Like `polli run`, which changes to the project directory
+        cwd = os.getcwd()
+        os.chdir(self.project_path)
+        self.addCleanup(os.chdir, cwd)
+        with MockLLMServer(script=RELATIVE_SCRIPT) as server:
+            config = attempts_config(server.base_url)
+            result = await run_attempts(
+                config,
+                "Edit app.py",
+                str(self.project_path),
+                attempt_specs(config, 2),
+                self.root / "trajectories",
+            )
+
+        self.assertEqual((self.project_path / "app.py").read_text(), "a = 1\n")
+        self.assertEqual(self.git("status", "--porcelain"), "")
+        for attempt in result.attempts:
+            if attempt.patch:
+                self.assertIn(f"+attempt-{attempt.attempt}\n", attempt.patch)
+                self.assertEqual(attempt.patch.count("\n+attempt"), 1)
+
+    async def test_verify_timeout(self):
+        passed, output = await verify_patch(str(self.project_path), "sleep 10", 0.2)
+        self.assertFalse(passed)
+        self.assertIn("Timed out", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
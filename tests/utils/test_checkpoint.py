@@ -0,0 +1,264 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent import TraeAgent
+from trae_agent.agent.agent_basics import AgentExecution
+from trae_agent.tools.base import ToolCall, ToolResult
+from trae_agent.tools.bash_tool import BashTool
+from trae_agent.tools.sequential_thinking_tool import SequentialThinkingTool
+from trae_agent.utils.checkpoint import (
+    StepCheckpointer,
+    deserialize_message,
+    load_checkpoint,
+    serialize_message,
+)
+from trae_agent.utils.config import Config
+from trae_agent.utils.llm_basics import LLMMessage, LLMResponse, LLMUsage
+from trae_agent.utils.mock_server import MockLLMServer
+
+
+class TestCheckpointFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir: str = tempfile.mkdtemp()
+        self.path: str = os.path.join(self.tmp_dir, "run.ckpt")
+
+    def write_run(self) -> StepCheckpointer:
+        checkpointer = StepCheckpointer(self.path)
+        checkpointer.start(
+            task="fix it",
+            extra_args={"project_path": self.tmp_dir, "issue": "fix it"},
+            provider="pollinations",
+            model="m",
+            tool_names=["bash"],
+            messages=[
+                LLMMessage(role="system", content="system"),
+                LLMMessage(role="user", content="fix it"),
+            ],
+        )
+        tool_call = ToolCall(name="bash", call_id="c1", arguments={"command": "ls"})
+        checkpointer.write_step(
+            1,
+            LLMResponse(content="listing", tool_calls=[tool_call]),
+            [
+                LLMMessage(
+                    role="user",
+                    tool_result=ToolResult(
+                        call_id="c1", name="bash", success=True, result="a.py"
+                    ),
+                )
+            ],
+            LLMUsage(input_tokens=10, output_tokens=2),
+            {"bash": {"cwd": self.tmp_dir}},
+        )
+        return checkpointer
+
+    def test_load_rebuilds_history(self):
+        self.write_run().close()
+        checkpoint = load_checkpoint(self.path)
+
+        self.assertEqual(checkpoint.step_number, 1)
+        self.assertEqual(
+            [(m.role, m.content) for m in checkpoint.history[:3]],
+            [("system", "system"), ("user", "fix it"), ("assistant", "listing")],
+        )
+        self.assertEqual(checkpoint.history[3].tool_call.call_id, "c1")  # pyright: ignore[reportOptionalMemberAccess]
+        self.assertEqual(len(checkpoint.pending_messages), 1)
+        self.assertEqual(checkpoint.pending_messages[0].tool_result.result, "a.py")  # pyright: ignore[reportOptionalMemberAccess]
+        self.assertEqual(checkpoint.total_tokens, LLMUsage(10, 2))
+        self.assertEqual(checkpoint.tool_states, {"bash": {"cwd": self.tmp_dir}})
+        self.assertFalse(checkpoint.finished)
+
+    def test_steps_only_append_their_own_messages(self):
+        self.write_run().close()
+        with open(self.path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["type"] for line in lines], ["task", "step"])
+        self.assertNotIn("system", json.dumps(lines[1]))
+
+    def test_tool_state_lists_are_concatenated(self):
+        checkpointer = self.write_run()
+        for step_number, thought in ((2, "first"), (3, "second")):
+            checkpointer.write_step(
+                step_number,
+                LLMResponse(content="thinking"),
+                [],
+                None,
+                {
+                    "sequentialthinking": {"thought_history": [thought]},
+                    "bash": {"cwd": f"/step{step_number}"},
+                },
+            )
+        checkpointer.close()
+
+        checkpoint = load_checkpoint(self.path)
+        self.assertEqual(
+            checkpoint.tool_states,
+            {
+                "sequentialthinking": {"thought_history": ["first", "second"]},
+                "bash": {"cwd": "/step3"},
+            },
+        )
+
+    def test_torn_last_line_is_ignored_and_dropped_on_resume(self):
+        self.write_run().close()
+        with open(self.path, "ab") as f:
+            _ = f.write(b'{"type":"step","step_number":2,"resp')
+        checkpoint = load_checkpoint(self.path)
+        self.assertEqual(checkpoint.step_number, 1)
+
+        checkpointer = StepCheckpointer(self.path)
+        checkpointer.resume(checkpoint)
+        checkpointer.finish(True, "done")
+        self.assertTrue(load_checkpoint(self.path).finished)
+
+    def test_not_a_checkpoint(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            _ = f.write('{"agent_steps": []}\n')
+        with self.assertRaises(ValueError):
+            _ = load_checkpoint(self.path)
+
+    def test_message_round_trip_drops_durations(self):
+        message = LLMMessage(
+            role="user",
+            tool_result=ToolResult(
+                call_id="c1", name="bash", success=False, error="boom", duration=1.5
+            ),
+        )
+        data = serialize_message(message)
+        self.assertNotIn("duration", data["tool_result"])
+        self.assertNotIn("content", data)
+        restored = deserialize_message(data)
+        self.assertEqual(restored.tool_result.error, "boom")  # pyright: ignore[reportOptionalMemberAccess]
+
+
+class TestToolState(unittest.TestCase):
+    def test_sequential_thinking_state_round_trip(self):
+        tool = SequentialThinkingTool()
+        thoughts: list[object] = []
+        for number, branch in ((1, None), (2, "b")):
+            _ = asyncio.run(
+                tool.execute(
+                    {
+                        "thought": f"thought {number}",
+                        "thought_number": number,
+                        "total_thoughts": 3,
+                        "next_thought_needed": True,
+                        "branch_from_thought": 1 if branch else None,
+                        "branch_id": branch,
+                    }
+                )
+            )
+            # Each state only holds the thought added since the previous one
+            state = asyncio.run(tool.get_state())
+            assert state is not None
+            self.assertEqual(len(state["thought_history"]), 1)  # pyright: ignore[reportArgumentType]
+            thoughts.extend(state["thought_history"])  # pyright: ignore[reportArgumentType]
+        self.assertIsNone(asyncio.run(tool.get_state()))
+
+        restored = SequentialThinkingTool()
+        restored.restore_state(json.loads(json.dumps({"thought_history": thoughts})))
+        self.assertEqual(restored.thought_history, tool.thought_history)
+        self.assertEqual(list(restored.branches), ["b"])
+        self.assertIsNone(asyncio.run(restored.get_state()))
+
+    def test_bash_cwd_round_trip(self):
+        tmp_dir = os.path.realpath(tempfile.mkdtemp())
+
+        async def run() -> str:
+            tool = BashTool()
+            _ = await tool.execute({"command": f"cd {tmp_dir}"})
+            state = await tool.get_state()
+            await tool.close()
+            restored = BashTool()
+            restored.restore_state(state or {})
+            result = await restored.execute({"command": "pwd"})
+            await restored.close()
+            return result.output or ""
+
+        self.assertEqual(asyncio.run(run()), tmp_dir)
+
+    def test_bash_state_of_a_timed_out_session(self):
+        async def run() -> dict[str, object] | None:
+            tool = BashTool()
+            _ = await tool.execute({"command": "true"})
+            assert tool._session is not None  # pyright: ignore[reportPrivateUsage]
+            tool._session._timed_out = True  # pyright: ignore[reportPrivateUsage]
+            try:
+                # Falls back to running `pwd`, which the session refuses
+                with patch("os.readlink", side_effect=OSError):
+                    return await tool.get_state()
+            finally:
+                await tool.close()
+
+        self.assertIsNone(asyncio.run(run()))
+
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir: str = tempfile.mkdtemp()
+        self.path: str = os.path.join(self.tmp_dir, "run.ckpt")
+        self.server: MockLLMServer = MockLLMServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def agent(self, max_steps: int) -> TraeAgent:
+        config = Config(
+            {
+                "default_provider": "pollinations",
+                "max_steps": max_steps,
+                "enable_lakeview": False,
+                "model_providers": {
+                    "pollinations": {
+                        "model": "m",
+                        "api_key": "mock",
+                        "base_url": self.server.base_url,
+                        "max_retries": 1,
+                    }
+                },
+            }
+        )
+        agent = TraeAgent(config)
+        _ = agent.setup_trajectory_recording(os.path.join(self.tmp_dir, "t.json"))
+        agent.set_checkpointer(StepCheckpointer(self.path))
+        return agent
+
+    @staticmethod
+    async def execute(agent: TraeAgent) -> AgentExecution:
+        try:
+            return await agent.execute_task()
+        finally:
+            await agent.tool_caller.close_tools()
+
+    def test_resume_continues_after_last_completed_step(self):
+        # The run stops after the view and bash steps of the mock script
+        first = self.agent(max_steps=2)
+        first.new_task("task", {"project_path": self.tmp_dir, "issue": "task"})
+        interrupted = asyncio.run(self.execute(first))
+        self.assertFalse(interrupted.success)
+        checkpoint = load_checkpoint(self.path)
+        self.assertEqual(checkpoint.step_number, 2)
+        self.assertIn("bash", checkpoint.tool_states)
+
+        second = self.agent(max_steps=10)
+        second.resume_task(checkpoint)
+        execution = asyncio.run(self.execute(second))
+
+        self.assertTrue(execution.success)
+        self.assertEqual([step.step_number for step in execution.steps], [3])
+        assert execution.total_tokens and interrupted.total_tokens
+        self.assertGreater(
+            execution.total_tokens.input_tokens, interrupted.total_tokens.input_tokens
+        )
+        self.assertTrue(load_checkpoint(self.path).finished)
+
+
+if __name__ == "__main__":
+    unittest.main()
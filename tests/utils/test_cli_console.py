@@ -0,0 +1,122 @@
+import asyncio
+import io
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from rich.console import Console
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent.agent_basics import AgentExecution, AgentState, AgentStep
+from trae_agent.utils.cli_console import CLIConsole
+from trae_agent.utils.lake_view import LakeViewStep
+from trae_agent.utils.llm_basics import LLMResponse
+
+
+class FakePipeline:
+    """Summarizes steps after a delay, leaving out odd steps."""
+
+    def __init__(self, delay: float):
+        self.delay: float = delay
+        self.closed: bool = False
+
+    async def _summarize(self, agent_step: AgentStep) -> LakeViewStep | None:
+        await asyncio.sleep(self.delay)
+        if agent_step.step_number % 2:
+            return None
+        return LakeViewStep(f"did step {agent_step.step_number}.", "", "")
+
+    def submit(self, agent_step: AgentStep) -> "asyncio.Task[LakeViewStep | None]":
+        return asyncio.create_task(self._summarize(agent_step))
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def make_console(max_live_steps: int = 5) -> CLIConsole:
+    cli_console = CLIConsole(None, max_live_steps=max_live_steps)
+    cli_console.console = Console(file=io.StringIO(), width=100)
+    return cli_console
+
+
+def make_step(step_number: int, state: AgentState) -> AgentStep:
+    return AgentStep(
+        step_number=step_number,
+        state=state,
+        llm_response=LLMResponse(content=f"step {step_number}"),
+    )
+
+
+class TestCLIConsole(unittest.IsolatedAsyncioTestCase):
+    async def test_ends_as_soon_as_the_agent_finishes(self):
+        cli_console = make_console()
+        console_task = asyncio.create_task(cli_console.start())
+        await asyncio.sleep(0.05)
+        for step_number in (1, 2):
+            step = make_step(step_number, AgentState.THINKING)
+            cli_console.update_status(step)
+            step.state = AgentState.COMPLETED
+            cli_console.update_status(step)
+
+        cli_console.update_status(agent_execution=AgentExecution("t", steps=[]))
+        # Done within a few turns of the loop, not after a polling interval
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertTrue(console_task.done())
+        await console_task
+        self.assertIsNone(cli_console.live_display)
+        self.assertEqual(list(cli_console.console_steps), [1, 2])
+
+    async def test_only_changed_steps_are_rendered(self):
+        cli_console = make_console(max_live_steps=3)
+        console_task = asyncio.create_task(cli_console.start())
+        with (
+            patch.object(
+                cli_console,
+                "_create_step_display",
+                wraps=cli_console._create_step_display,  # pyright: ignore[reportPrivateUsage]
+            ) as step_display,
+            patch.object(
+                cli_console,
+                "_create_compact_step_display",
+                wraps=cli_console._create_compact_step_display,  # pyright: ignore[reportPrivateUsage]
+            ) as compact_display,
+        ):
+            for step_number in range(1, 51):
+                cli_console.update_status(make_step(step_number, AgentState.COMPLETED))
+                await asyncio.sleep(0)
+            cli_console.update_status(agent_execution=AgentExecution("t", steps=[]))
+            await asyncio.wait_for(console_task, 1)
+
+        self.assertEqual(step_display.call_count, 50)
+        self.assertEqual(compact_display.call_count, 50)
+        # Older steps went to the scrollback instead of the live display
+        self.assertEqual(list(cli_console.console_steps), [48, 49, 50])
+        output = cli_console.console.file.getvalue()  # pyright: ignore[reportAttributeAccessIssue]
+        self.assertLess(output.index("Step 1 "), output.index("Step 47 "))
+
+    async def test_lakeview_panels_replace_compact_ones(self):
+        cli_console = make_console(max_live_steps=1)
+        pipeline = FakePipeline(delay=0.1)
+        cli_console.lakeview_pipeline = pipeline  # pyright: ignore[reportAttributeAccessIssue]
+        console_task = asyncio.create_task(cli_console.start())
+        for step_number in (1, 2, 3):
+            cli_console.update_status(make_step(step_number, AgentState.COMPLETED))
+        cli_console.update_status(agent_execution=AgentExecution("t", steps=[]))
+
+        # Steps waiting for their summary stay in the live display
+        await asyncio.sleep(0.05)
+        self.assertEqual(list(cli_console.console_steps), [1, 2, 3])
+        await asyncio.wait_for(console_task, 1)
+
+        self.assertTrue(pipeline.closed)
+        self.assertEqual(list(cli_console.console_steps), [3])
+        output = cli_console.console.file.getvalue()  # pyright: ignore[reportAttributeAccessIssue]
+        self.assertIn("did step 2.", output)
+        self.assertIn("Step 1 ", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from tests.helpers import make_repo
+from trae_agent.utils.git_utils import git_diff, has_changes, run_git
+
+
+def append(project_path: str, path: str, content: str) -> None:
+    with open(os.path.join(project_path, path), "a") as f:
+        _ = f.write(content)
+
+
+class TestGitUtils(unittest.TestCase):
+    def test_concurrent_diffs_of_different_projects(self):
+        projects = [make_repo(self, {"app.py": ""}) for _ in range(4)]
+        for index, project_path in enumerate(projects):
+            append(project_path, "app.py", f"value = {index}\n")
+
+        async def diffs() -> list[str]:
+            return await asyncio.gather(*[git_diff(path) for path in projects])
+
+        cwd = os.getcwd()
+        for index, diff in enumerate(asyncio.run(diffs())):
+            self.assertIn(f"+value = {index}", diff)
+            self.assertEqual(diff.count("+value"), 1)
+        self.assertEqual(os.getcwd(), cwd)
+
+    def test_test_changes_are_excluded(self):
+        project_path = make_repo(
+            self,
+            {
+                "src/app.py": "",
+                "tests/helpers.py": "",
+                "src/test_app.py": "",
+                "pkg/testing/fixtures.py": "",
+                "tox.ini": "",
+            },
+        )
+        for path in ("tests/helpers.py", "src/test_app.py", "pkg/testing/fixtures.py"):
+            append(project_path, path, "x = 1\n")
+        append(project_path, "tox.ini", "[tox]\n")
+
+        self.assertTrue(asyncio.run(has_changes(project_path)))
+        self.assertFalse(asyncio.run(has_changes(project_path, exclude_tests=True)))
+        self.assertEqual(asyncio.run(git_diff(project_path, exclude_tests=True)), "")
+
+        append(project_path, "src/app.py", "y = 2\n")
+        self.assertTrue(asyncio.run(has_changes(project_path, exclude_tests=True)))
+        diff = asyncio.run(git_diff(project_path, exclude_tests=True))
+        self.assertIn("src/app.py", diff)
+        self.assertNotIn("tests/helpers.py", diff)
+
+    def test_diff_since_base_commit(self):
+        project_path = make_repo(self, {"app.py": ""})
+        _, base_commit = asyncio.run(run_git(project_path, "rev-parse", "HEAD"))
+        append(project_path, "app.py", "a = 1\n")
+        _ = subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qam", "a"],
+            cwd=project_path,
+            check=True,
+        )
+
+        self.assertEqual(asyncio.run(git_diff(project_path)), "")
+        self.assertIn(
+            "+a = 1", asyncio.run(git_diff(project_path, base_commit.strip()))
+        )
+
+    def test_not_a_checkout(self):
+        self.assertEqual(asyncio.run(git_diff("/nonexistent/project")), "")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertFalse(asyncio.run(has_changes(tmp_dir)))
+
+
+if __name__ == "__main__":
+    unittest.main()
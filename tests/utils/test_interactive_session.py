@@ -0,0 +1,104 @@
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent import TraeAgent
+from trae_agent.tools.bash_tool import BashTool
+from trae_agent.utils.config import Config
+from trae_agent.utils.interactive_session import InteractiveSession
+from trae_agent.utils.mock_server import MockLLMServer
+
+
+class TestInteractiveSession(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir: str = tempfile.mkdtemp()
+        self.server: MockLLMServer = MockLLMServer().start()
+        config = Config(
+            {
+                "default_provider": "pollinations",
+                "max_steps": 10,
+                "enable_lakeview": False,
+                "model_providers": {
+                    "pollinations": {
+                        "model": "m",
+                        "api_key": "mock",
+                        "base_url": self.server.base_url,
+                        "max_retries": 1,
+                    }
+                },
+            }
+        )
+        self.agent: TraeAgent = TraeAgent(config)
+        _ = self.agent.setup_trajectory_recording(os.path.join(self.tmp_dir, "t.json"))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def history(self) -> list[dict[str, Any]]:
+        return self.agent.llm_client.client.message_history  # pyright: ignore[reportAttributeAccessIssue]
+
+    def history_text(self) -> str:
+        return "\n".join(str(message.get("content")) for message in self.history())
+
+    def test_tools_persist_and_history_continues(self):
+        session = InteractiveSession(self.agent, continue_history=True)
+        try:
+            first = session.run_task("first task", self.tmp_dir)
+            bash = next(tool for tool in session.tools if isinstance(tool, BashTool))
+            bash_session = bash._session  # pyright: ignore[reportPrivateUsage]
+            self.assertIsNotNone(bash_session)
+
+            # The mock model sees three earlier answers and calls task_done
+            second = session.run_task("second task", self.tmp_dir)
+            self.assertIs(bash._session, bash_session)  # pyright: ignore[reportPrivateUsage]
+        finally:
+            session.close()
+
+        self.assertTrue(first.success and second.success)
+        self.assertEqual((len(first.steps), len(second.steps)), (3, 1))
+        self.assertIn("first task", self.history_text())
+        self.assertIn("The task is finished.", self.history_text())
+        self.assertEqual(
+            [message["role"] for message in self.history()].count("system"), 1
+        )
+
+    def test_tasks_start_fresh_by_default(self):
+        session = InteractiveSession(self.agent)
+        try:
+            _ = session.run_task("first task", self.tmp_dir)
+            second = session.run_task("second task", self.tmp_dir)
+        finally:
+            session.close()
+
+        self.assertEqual(len(second.steps), 3)
+        self.assertNotIn("first task", self.history_text())
+
+    def test_long_history_is_compacted(self):
+        session = InteractiveSession(
+            self.agent, continue_history=True, max_history_tokens=0
+        )
+        try:
+            _ = session.run_task("first task", self.tmp_dir)
+            _ = session.run_task("second task", self.tmp_dir)
+        finally:
+            session.close()
+
+        history = self.history()
+        self.assertEqual(
+            [message["role"] for message in history[:3]],
+            ["system", "user", "assistant"],
+        )
+        self.assertIn("first task", history[1]["content"])
+        self.assertIn("were compacted", history[2]["content"])
+        self.assertIn("- bash", history[2]["content"])
+        # The first task's tool calls and results are gone
+        self.assertNotIn("tool", [message["role"] for message in history[:3]])
+        self.assertIn("second task", self.history_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
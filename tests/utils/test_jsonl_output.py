@@ -0,0 +1,137 @@
+import asyncio
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from collections.abc import Buffer
+from pathlib import Path
+from typing import override
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent import TraeAgent
+from trae_agent.agent.agent_basics import AgentState, AgentStep
+from trae_agent.utils.config import Config
+from trae_agent.utils.jsonl_output import JSONLEventWriter
+from trae_agent.utils.llm_basics import LLMResponse
+from trae_agent.utils.mock_server import MockLLMServer
+
+
+def read_events(stream: io.BytesIO) -> list[dict[str, object]]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class StalledStream(io.BytesIO):
+    """Takes a few bytes, then none, like a non-blocking pipe nobody reads."""
+
+    @override
+    def write(self, buffer: Buffer, /) -> int:
+        if self.tell() >= 5:
+            return 0
+        return super().write(bytes(memoryview(buffer)[:5]))
+
+
+class TestJSONLEventWriter(unittest.TestCase):
+    def test_one_compact_line_per_state_change(self):
+        stream = io.BytesIO()
+        writer = JSONLEventWriter(stream)
+        step = AgentStep(step_number=1, state=AgentState.THINKING)
+        writer.on_step(step)
+        step.llm_response = LLMResponse(content="Done ✅")
+        step.state = AgentState.COMPLETED
+        writer.on_step(step)
+        writer.on_step(step)
+
+        self.assertEqual(
+            read_events(stream),
+            [
+                {"event": "step", "step_number": 1, "state": "thinking"},
+                {
+                    "event": "step",
+                    "step_number": 1,
+                    "state": "completed",
+                    "content": "Done ✅",
+                },
+            ],
+        )
+        self.assertNotIn(b", ", stream.getvalue())
+
+    def test_stalled_stream_stops_the_output(self):
+        stream = StalledStream()
+        writer = JSONLEventWriter(stream)
+        writer.emit({"event": "started"})
+        self.assertTrue(writer.closed)
+        writer.emit({"event": "started"})
+
+    def test_unix_socket_and_gone_consumer(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir) / "events.sock")
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(path)
+            server.listen(1)
+            writer = JSONLEventWriter.connect(path)
+            connection, _ = server.accept()
+            writer.emit({"event": "started"})
+            self.assertEqual(connection.recv(100), b'{"event":"started"}\n')
+
+            connection.close()
+            server.close()
+            for _ in range(10):
+                writer.emit({"event": "step", "content": "x" * 100000})
+            self.assertTrue(writer.closed)
+
+            with self.assertRaises(OSError):
+                _ = JSONLEventWriter.connect(path)
+
+
+class TestJSONLAgentRun(unittest.TestCase):
+    def test_agent_run_events(self):
+        stream = io.BytesIO()
+        writer = JSONLEventWriter(stream)
+        with tempfile.TemporaryDirectory() as tmp_dir, MockLLMServer() as server:
+            config = Config(
+                {
+                    "default_provider": "pollinations",
+                    "max_steps": 10,
+                    "enable_lakeview": False,
+                    "model_providers": {
+                        "pollinations": {
+                            "model": "m",
+                            "api_key": "mock",
+                            "base_url": server.base_url,
+                            "max_retries": 1,
+                        }
+                    },
+                }
+            )
+            agent = TraeAgent(config)
+            _ = agent.setup_trajectory_recording(str(Path(tmp_dir) / "t.json"))
+            agent.add_step_listener(writer.on_step)
+            agent.new_task("look", {"project_path": tmp_dir, "issue": "look"})
+
+            async def execute():
+                try:
+                    return await agent.execute_task()
+                finally:
+                    await agent.tool_caller.close_tools()
+
+            execution = asyncio.run(execute())
+            writer.emit_execution(execution)
+
+        events = read_events(stream)
+        states = [
+            (e["step_number"], e["state"]) for e in events if e["event"] == "step"
+        ]
+        self.assertEqual(states[0], (1, "thinking"))
+        self.assertIn((1, "calling_tool"), states)
+        self.assertEqual(states[-1], (len(execution.steps), "completed"))
+        self.assertTrue(any("tool_results" in event for event in events))
+        self.assertEqual(events[-1]["event"], "done")
+        self.assertEqual(events[-1]["steps"], len(execution.steps))
+
+
+if __name__ == "__main__":
+    unittest.main()
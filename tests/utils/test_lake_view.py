@@ -0,0 +1,306 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unittest
+from typing import override
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from tests.helpers import make_config
+from trae_agent.agent.agent_basics import AgentState, AgentStep
+from trae_agent.utils.config import ModelParameters
+from trae_agent.utils.lake_view import (
+    LakeView,
+    LakeViewContext,
+    LakeViewPipeline,
+    LakeViewStep,
+    parse_lakeview_summary,
+)
+from trae_agent.utils.llm_basics import LLMMessage, LLMResponse
+
+
+def make_lake_view(client: object, **lakeview: object) -> LakeView:
+    with patch("trae_agent.utils.lake_view.LLMClient", return_value=client):
+        return LakeView(make_config(lakeview=lakeview))
+
+
+def make_step(step_number: int) -> AgentStep:
+    return AgentStep(
+        step_number=step_number,
+        state=AgentState.COMPLETED,
+        llm_response=LLMResponse(content=f"step {step_number}"),
+    )
+
+
+SUMMARY = '{"task": "is looking.", "details": "At a.py", "tags": ["EXAMINE_CODE"]}'
+
+
+class SlowLLMClient:
+    """Answers like a Lakeview model, blocking like a provider SDK."""
+
+    def __init__(
+        self, release: threading.Event | None = None, answers: list[str] | None = None
+    ):
+        self.release: threading.Event | None = release
+        self.answers: list[str] = answers or []
+        self.calls: list[list[LLMMessage]] = []
+
+    def chat(
+        self,
+        messages: list[LLMMessage],
+        model_parameters: ModelParameters,
+        **_: object,
+    ) -> LLMResponse:
+        assert model_parameters.json_mode
+        # Blocks until something else on the event loop runs
+        if self.release is not None and not self.release.wait(5):
+            raise TimeoutError("the event loop was blocked")
+        self.calls.append(list(messages))
+        if self.answers:
+            return LLMResponse(content=self.answers.pop(0))
+        return LLMResponse(content=SUMMARY)
+
+
+class HistoryLLMClient:
+    """Keeps the messages of its last chat and answers from them, like the
+    provider clients do with their message history."""
+
+    def __init__(self):
+        self.message_history: list[LLMMessage] = []
+
+    def chat(self, messages: list[LLMMessage], **_: object) -> LLMResponse:
+        self.message_history = messages
+        time.sleep(0.1)
+        match = re.search(
+            r"<this_step>step (\d+)</this_step>",
+            self.message_history[0].content or "",
+        )
+        assert match is not None
+        return LLMResponse(
+            content=json.dumps({"task": f"is on step {match[1]}.", "tags": []})
+        )
+
+
+class FakeLakeView(LakeView):
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        super().__init__(make_config(lakeview={}))
+        self.delay: float = delay
+        self.fail: bool = fail
+        self.summarized: list[int] = []
+        self.in_flight: int = 0
+        self.peak_in_flight: int = 0
+
+    @override
+    async def create_lakeview_step(self, agent_step: AgentStep) -> LakeViewStep | None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.fail:
+            raise RuntimeError("provider down")
+        self.summarized.append(agent_step.step_number)
+        return LakeViewStep(f"task {agent_step.step_number}", "", "")
+
+
+class TestLakeViewSummary(unittest.IsolatedAsyncioTestCase):
+    def test_parse(self):
+        self.assertEqual(
+            parse_lakeview_summary(f"```json\n{SUMMARY}\n```"),
+            ("is looking.", "At a.py", ["EXAMINE_CODE"]),
+        )
+        self.assertEqual(
+            parse_lakeview_summary(
+                '{"task": "The agent reads.", "tags": "think, report"}'
+            ),
+            ("reads.", "", ["THINK", "REPORT"]),
+        )
+        for content in (
+            "no json",
+            '{"task": "reads.",',
+            "[1]",
+            '{"task": ""}',
+            '{"task": "reads.", "details": 1}',
+            '{"task": "reads.", "tags": ["DANCE"]}',
+        ):
+            with self.assertRaises(ValueError, msg=content):
+                _ = parse_lakeview_summary(content)
+
+    async def test_single_request(self):
+        client = SlowLLMClient()
+        lake_view = make_lake_view(client)
+        lake_view_step = await lake_view.create_lakeview_step(make_step(1))
+
+        assert lake_view_step is not None
+        self.assertEqual(
+            (lake_view_step.desc_task, lake_view_step.desc_details),
+            ("is looking.", "[italic]At a.py[/italic]"),
+        )
+        self.assertEqual(len(client.calls), 1)
+
+    async def test_one_repair_attempt(self):
+        client = SlowLLMClient(answers=['{"task": "is looking."', SUMMARY])
+        lake_view = make_lake_view(client)
+        lake_view_step = await lake_view.create_lakeview_step(make_step(1))
+
+        assert lake_view_step is not None
+        self.assertEqual(lake_view_step.desc_task, "is looking.")
+        self.assertEqual(len(client.calls), 2)
+        repair = client.calls[1]
+        self.assertEqual(repair[-2].content, '{"task": "is looking."')
+        self.assertIn("invalid JSON", repair[-1].content or "")
+
+        client.answers = ["nothing", "still nothing", SUMMARY]
+        self.assertIsNone(await lake_view.create_lakeview_step(make_step(2)))
+        self.assertEqual(len(client.calls), 4)
+
+
+class TestLakeViewContext(unittest.IsolatedAsyncioTestCase):
+    def test_window_and_running_summary(self):
+        context = LakeViewContext(window_steps=2, max_tokens=1000)
+        self.assertEqual(context.render(), "<previous_step>(none)</previous_step>")
+        context.add_step(1, "read a.py\nmore")
+        context.describe_step(1, "is reading code.", ["EXAMINE_CODE"])
+        context.add_step(2, "edit a.py")
+        context.add_step(3, "run tests")
+
+        rendered = context.render()
+        self.assertIn("Step 1: The agent is reading code. (EXAMINE_CODE)", rendered)
+        self.assertNotIn("read a.py", rendered)
+        self.assertIn('<previous_step number="2">edit a.py</previous_step>', rendered)
+        self.assertIn('<previous_step number="3">run tests</previous_step>', rendered)
+
+        # Undescribed steps fall back to their first line
+        context.add_step(4, "done")
+        self.assertIn("Step 2: edit a.py", context.render())
+
+    def test_size_stays_bounded(self):
+        context = LakeViewContext(window_steps=3, max_tokens=500)
+        sizes: list[int] = []
+        for step_number in range(1, 1001):
+            context.add_step(step_number, f"step {step_number} " + "x" * 5000)
+            context.describe_step(step_number, "is working on it.", ["THINK"])
+            sizes.append(len(context.render()))
+
+        self.assertLess(max(sizes), 500 * 4 + 300)
+        self.assertGreater(context.omitted_steps, 900)
+        self.assertIn("step 1000", context.render())
+
+    async def test_requests_include_previous_steps(self):
+        client = SlowLLMClient()
+        lake_view = make_lake_view(client, context_window_steps=1)
+        for step_number in range(1, 4):
+            _ = await lake_view.create_lakeview_step(make_step(step_number))
+
+        first, third = client.calls[0][0].content, client.calls[2][0].content
+        assert first is not None and third is not None
+        self.assertIn("(none)", first)
+        self.assertIn("Step 1: The agent is looking. (EXAMINE_CODE)", third)
+        self.assertIn('<previous_step number="2">step 2</previous_step>', third)
+        self.assertIn("<this_step>step 3</this_step>", third)
+
+
+class TestLakeViewPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_llm_calls_do_not_block_the_event_loop(self):
+        release = threading.Event()
+        lake_view = make_lake_view(SlowLLMClient(release))
+
+        async def release_call():
+            release.set()
+
+        # The call only returns once the loop has run this task
+        releaser = asyncio.create_task(release_call())
+        lake_view_step = await lake_view.create_lakeview_step(make_step(1))
+        await releaser
+
+        self.assertIsNotNone(lake_view_step)
+        assert lake_view_step is not None
+        self.assertEqual(lake_view_step.desc_task, "is looking.")
+        self.assertIn("EXAMINE_CODE", lake_view_step.tags_emoji)
+
+    async def test_workers_run_in_parallel(self):
+        lake_view = FakeLakeView(delay=0.2)
+        pipeline = LakeViewPipeline(lake_view, workers=4, max_queue_size=8)
+        results = await asyncio.gather(
+            *(pipeline.submit(make_step(i)) for i in range(1, 5))
+        )
+        await pipeline.close()
+
+        self.assertEqual(
+            [r.desc_task for r in results if r], [f"task {i}" for i in range(1, 5)]
+        )
+        # A single worker would summarize one step at a time
+        self.assertGreaterEqual(lake_view.peak_in_flight, 2)
+
+    async def test_workers_use_their_own_client(self):
+        clients: list[HistoryLLMClient] = []
+
+        def create_client(*_: object) -> HistoryLLMClient:
+            clients.append(HistoryLLMClient())
+            return clients[-1]
+
+        with patch("trae_agent.utils.lake_view.LLMClient", side_effect=create_client):
+            pipeline = LakeViewPipeline(LakeView(make_config(lakeview={})), workers=2)
+            results = await asyncio.gather(
+                *(pipeline.submit(make_step(i)) for i in range(1, 5))
+            )
+            await pipeline.close()
+
+        self.assertEqual(
+            [r.desc_task if r else None for r in results],
+            [f"is on step {i}." for i in range(1, 5)],
+        )
+        self.assertEqual(len(clients), 2)
+
+    async def test_drop_oldest_when_full(self):
+        lake_view = FakeLakeView(delay=0.1)
+        pipeline = LakeViewPipeline(lake_view, workers=1, max_queue_size=2)
+        futures = [pipeline.submit(make_step(i)) for i in range(1, 5)]
+        results = await asyncio.gather(*futures)
+        await pipeline.close()
+
+        # Step 1 was waiting in the queue when steps 3 and 4 arrived
+        self.assertEqual([r is not None for r in results], [False, False, True, True])
+        self.assertEqual(pipeline.dropped, 2)
+        self.assertEqual(lake_view.summarized, [3, 4])
+
+    async def test_skip_new_when_full(self):
+        lake_view = FakeLakeView(delay=0.1)
+        pipeline = LakeViewPipeline(
+            lake_view, workers=1, max_queue_size=2, overflow_policy="skip_new"
+        )
+        futures = [pipeline.submit(make_step(i)) for i in range(1, 5)]
+        results = await asyncio.gather(*futures)
+        await pipeline.close()
+
+        self.assertEqual([r is not None for r in results], [True, True, False, False])
+        self.assertEqual(lake_view.summarized, [1, 2])
+
+    async def test_failures_resolve_to_none(self):
+        pipeline = LakeViewPipeline(FakeLakeView(fail=True), workers=1)
+        self.assertIsNone(await pipeline.submit(make_step(1)))
+        self.assertEqual(pipeline.failed, 1)
+        await pipeline.close()
+
+    def test_config(self):
+        lakeview_config = make_config(
+            lakeview={"workers": 3, "overflow_policy": "skip_new"}
+        ).lakeview_config
+        assert lakeview_config is not None
+        self.assertEqual(
+            (lakeview_config.workers, lakeview_config.max_queue_size), (3, 8)
+        )
+        with self.assertRaises(ValueError):
+            _ = make_config(lakeview={"overflow_policy": "block"})
+        with self.assertRaises(ValueError):
+            _ = make_config(lakeview={"context_window_steps": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from tests.helpers import make_config
+from trae_agent.tools.base import ToolCall
+from trae_agent.utils.lakeview_batch import summarize_trajectories
+from trae_agent.utils.llm_basics import LLMMessage, LLMResponse
+from trae_agent.utils.trajectory_recorder import TrajectoryRecorder
+
+
+class LakeviewLLMClient:
+    def __init__(self):
+        self.calls: list[list[LLMMessage]] = []
+
+    def chat(self, messages: list[LLMMessage], **_: object) -> LLMResponse:
+        self.calls.append(messages)
+        return LLMResponse(
+            content=json.dumps(
+                {"task": "is reading.", "details": "Reads a.py", "tags": ["THINK"]}
+            )
+        )
+
+
+class HistoryLLMClient:
+    """Answers from the messages of its last chat, like the provider clients."""
+
+    def __init__(self):
+        self.message_history: list[LLMMessage] = []
+
+    def chat(self, messages: list[LLMMessage], **_: object) -> LLMResponse:
+        self.message_history = messages
+        time.sleep(0.05)
+        match = re.search(r"<this_step>(\w+)", self.message_history[0].content or "")
+        assert match is not None
+        return LLMResponse(content=json.dumps({"task": f"says {match[1]}."}))
+
+
+def record_trajectory(path: Path) -> None:
+    recorder = TrajectoryRecorder(str(path))
+    recorder.start_recording("fix it", "pollinations", "m", 10)
+    tool_call = ToolCall(name="bash", call_id="1", arguments={"command": "cat a.py"})
+    recorder.record_agent_step(
+        1,
+        "calling_tool",
+        llm_response=LLMResponse(content="Look", tool_calls=[tool_call]),
+    )
+    recorder.record_agent_step(2, "error", error="provider down")
+    recorder.record_agent_step(3, "completed", llm_response=LLMResponse("Done"))
+
+
+class TestLakeviewBatch(unittest.TestCase):
+    def test_summaries_are_written_back_and_reused(self):
+        client = LakeviewLLMClient()
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            patch("trae_agent.utils.lake_view.LLMClient", return_value=client),
+        ):
+            paths = [str(Path(tmp_dir) / name) for name in ("a.json", "b.json")]
+            for path in paths:
+                record_trajectory(Path(path))
+
+            results = asyncio.run(
+                summarize_trajectories(
+                    paths, make_config(lakeview={"model_name": "cheap"}), concurrency=3
+                )
+            )
+            self.assertEqual(
+                [(r.steps, r.summarized, r.cached, r.failed) for r in results],
+                [(3, 2, 0, 0), (3, 2, 0, 0)],
+            )
+            self.assertEqual(len(client.calls), 4)
+            with open(paths[0], encoding="utf-8") as f:
+                steps = json.load(f)["agent_steps"]
+            self.assertEqual(
+                steps[0]["lakeview"],
+                {
+                    "model": "pollinations/cheap",
+                    "task": "is reading.",
+                    "details": "Reads a.py",
+                    "tags": ["THINK"],
+                },
+            )
+            self.assertNotIn("lakeview", steps[1])
+            # The third step is summarized in the context of the first
+            self.assertIn("cat a.py", client.calls[-1][0].content or "")
+
+            results = asyncio.run(
+                summarize_trajectories(
+                    paths, make_config(lakeview={"model_name": "cheap"})
+                )
+            )
+            self.assertEqual([r.cached for r in results], [2, 2])
+            self.assertEqual(len(client.calls), 4)
+
+            results = asyncio.run(
+                summarize_trajectories(
+                    paths[:1], make_config(lakeview={"model_name": "cheap"}), force=True
+                )
+            )
+            self.assertEqual(results[0].summarized, 2)
+            self.assertEqual(len(client.calls), 6)
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ["a.json", "b.json"])
+
+    def test_concurrent_requests_use_their_own_client(self):
+        clients: list[HistoryLLMClient] = []
+
+        def create_client(*_: object) -> HistoryLLMClient:
+            clients.append(HistoryLLMClient())
+            return clients[-1]
+
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            patch("trae_agent.utils.lake_view.LLMClient", side_effect=create_client),
+        ):
+            paths = [str(Path(tmp_dir) / f"{index}.json") for index in range(4)]
+            for path in paths:
+                record_trajectory(Path(path))
+
+            results = asyncio.run(
+                summarize_trajectories(
+                    paths, make_config(lakeview={"model_name": "cheap"}), concurrency=2
+                )
+            )
+            self.assertEqual([r.summarized for r in results], [2, 2, 2, 2])
+            for path in paths:
+                with open(path, encoding="utf-8") as f:
+                    steps = json.load(f)["agent_steps"]
+                self.assertEqual(steps[0]["lakeview"]["task"], "says Look.")
+                self.assertEqual(steps[2]["lakeview"]["task"], "says Done.")
+        # One client per request in flight, however many files there are
+        self.assertEqual(len(clients), 2)
+
+    def test_unreadable_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "bad.json"
+            _ = path.write_text("{")
+            results = asyncio.run(
+                summarize_trajectories(
+                    [str(path)], make_config(lakeview={"model_name": "cheap"})
+                )
+            )
+        self.assertIsNotNone(results[0].error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.tools.base import ToolCall
+from trae_agent.utils.config import ModelParameters
+from trae_agent.utils.llm_basics import LLMMessage, LLMResponse, LLMUsage
+from trae_agent.utils.llm_cache import LLMCacheMissError, LLMResponseCache
+from trae_agent.utils.llm_client import LLMClient
+
+
+def make_model_parameters() -> ModelParameters:
+    return ModelParameters(
+        model="openai",
+        api_key="",
+        max_tokens=1024,
+        temperature=0.5,
+        top_p=1,
+        top_k=0,
+        parallel_tool_calls=False,
+        max_retries=1,
+    )
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "cache.sqlite"
+        self.model_parameters = make_model_parameters()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        cache = LLMResponseCache(self.path)
+        response = LLMResponse(
+            content="hello",
+            usage=LLMUsage(input_tokens=10, output_tokens=2),
+            model="openai",
+            finish_reason="tool_calls",
+            tool_calls=[
+                ToolCall(name="bash", call_id="c1", arguments={"command": "ls"})
+            ],
+        )
+        key = cache.make_key(
+            "pollinations", self.model_parameters, [LLMMessage("user", "hi")], None
+        )
+        self.assertIsNone(cache.get(key))
+        cache.put(key, response)
+        self.assertEqual(cache.get(key), response)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_depends_on_parameters_and_messages(self):
+        messages = [LLMMessage("user", "hi")]
+        key = LLMResponseCache.make_key("openai", self.model_parameters, messages, None)
+        self.assertNotEqual(
+            key,
+            LLMResponseCache.make_key(
+                "openai", self.model_parameters, [LLMMessage("user", "ho")], None
+            ),
+        )
+        self.model_parameters.temperature = 0.0
+        self.assertNotEqual(
+            key,
+            LLMResponseCache.make_key("openai", self.model_parameters, messages, None),
+        )
+        key = LLMResponseCache.make_key("openai", self.model_parameters, messages, None)
+        self.model_parameters.json_mode = True
+        self.assertNotEqual(
+            key,
+            LLMResponseCache.make_key("openai", self.model_parameters, messages, None),
+        )
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = LLMResponseCache(self.path, max_size_bytes=300)
+        for key in ["a", "b", "c"]:
+            cache.put(key, LLMResponse(content=key * 50))
+            _ = cache.get("a")
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_read_only_mode(self):
+        LLMResponseCache(self.path).put("a", LLMResponse(content="a"))
+        cache = LLMResponseCache(self.path, read_only=True)
+        cache.put("b", LLMResponse(content="b"))
+        self.assertEqual(cache.get("a").content, "a")
+        with self.assertRaises(LLMCacheMissError):
+            _ = cache.get("b")
+
+
+class TestLLMClientCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "cache.sqlite"
+        self.model_parameters = make_model_parameters()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_client(self) -> LLMClient:
+        llm_client = LLMClient(
+            "pollinations", self.model_parameters, LLMResponseCache(self.path)
+        )
+        llm_client.client = MagicMock()
+        llm_client.client.trajectory_recorder = None
+        llm_client.client.retry_count = llm_client.client.rate_limited_count = 0
+        llm_client.client.chat.side_effect = [
+            LLMResponse(content="first"),
+            LLMResponse(content="second"),
+            LLMResponse(content="third"),
+        ]
+        return llm_client
+
+    def test_rerun_replays_and_resyncs_history(self):
+        first_run = self.make_client()
+        first_run.chat([LLMMessage("user", "one")], self.model_parameters)
+        first_run.chat([LLMMessage("user", "two")], self.model_parameters)
+
+        rerun = self.make_client()
+        self.assertEqual(
+            rerun.chat([LLMMessage("user", "one")], self.model_parameters).content,
+            "first",
+        )
+        self.assertEqual(
+            rerun.chat([LLMMessage("user", "two")], self.model_parameters).content,
+            "second",
+        )
+        rerun.client.chat.assert_not_called()
+
+        _ = rerun.chat([LLMMessage("user", "three")], self.model_parameters)
+        history = rerun.client.set_chat_history.call_args.args[0]
+        self.assertEqual(
+            [message.content for message in history],
+            ["one", "first", "two", "second"],
+        )
+        rerun.client.chat.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent import TraeAgent
+from trae_agent.utils.config import Config
+from trae_agent.utils.metrics import (
+    BASH_SESSIONS,
+    LLM_REQUEST_DURATION,
+    LLM_TOKENS,
+    TOOL_DURATION,
+    TRAJECTORY_BYTES,
+    MetricsRegistry,
+    start_metrics_server,
+)
+from trae_agent.utils.mock_server import MockLLMServer
+from trae_agent.utils.pollinations_client import PollinationsClient
+
+
+class RateLimitError(Exception):
+    status_code: int = 429
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests.", ("route",))
+        in_flight = registry.gauge("in_flight", "In flight.")
+        latency = registry.histogram(
+            "latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)
+        )
+        requests.inc(route='a"b')
+        requests.inc(2, route='a"b')
+        with in_flight.track_inprogress():
+            self.assertEqual(in_flight.value(), 1)
+        latency.observe(0.05, route="x")
+        latency.observe(0.5, route="x")
+        latency.observe(5, route="x")
+
+        text = registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{route="a\\"b"} 3', text)
+        self.assertIn("in_flight 0", text)
+        self.assertIn('latency_seconds_bucket{route="x",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="x",le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{route="x",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{route="x"} 3', text)
+        self.assertIn('latency_seconds_sum{route="x"} 5.55', text)
+
+        with self.assertRaises(ValueError):
+            requests.inc(other="x")
+        with self.assertRaises(ValueError):
+            _ = registry.counter("requests_total", "Again.")
+
+    def test_textfile_and_server(self):
+        registry = MetricsRegistry()
+        registry.counter("hits_total", "Hits.").inc()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "polli.prom"
+            registry.write_textfile(path)
+            self.assertIn("hits_total 1", path.read_text())
+            self.assertEqual(os.listdir(tmp_dir), ["polli.prom"])
+
+        server = start_metrics_server(0, registry=registry)
+        try:
+            with urllib.request.urlopen(
+                f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            ) as response:
+                self.assertIn(b"hits_total 1", response.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_rate_limited_retries_are_counted(self):
+        config = Config(
+            {"model_providers": {"pollinations": {"model": "m", "api_key": "k"}}}
+        )
+        client = PollinationsClient(config.model_providers["pollinations"])
+        with patch("time.sleep"):
+            client.sleep_before_retry(RateLimitError())
+            client.sleep_before_retry(ValueError())
+        self.assertEqual((client.retry_count, client.rate_limited_count), (2, 1))
+
+
+class TestAgentMetrics(unittest.TestCase):
+    def test_agent_run_updates_metrics(self):
+        labels = {"provider": "pollinations", "model": "metrics-mock"}
+        requests_before = LLM_REQUEST_DURATION.count(**labels)
+        bash_calls_before = TOOL_DURATION.count(tool="bash")
+        bytes_before = TRAJECTORY_BYTES.value()
+
+        with tempfile.TemporaryDirectory() as tmp_dir, MockLLMServer() as server:
+            config = Config(
+                {
+                    "default_provider": "pollinations",
+                    "max_steps": 10,
+                    "enable_lakeview": False,
+                    "model_providers": {
+                        "pollinations": {
+                            "model": "metrics-mock",
+                            "api_key": "mock",
+                            "base_url": server.base_url,
+                            "max_retries": 1,
+                        }
+                    },
+                }
+            )
+            agent = TraeAgent(config)
+            _ = agent.setup_trajectory_recording(str(Path(tmp_dir) / "t.json"))
+            agent.new_task("look", {"project_path": tmp_dir, "issue": "look"})
+
+            async def execute():
+                try:
+                    execution = await agent.execute_task()
+                    self.assertGreaterEqual(BASH_SESSIONS.value(), 1)
+                    return execution
+                finally:
+                    await agent.tool_caller.close_tools()
+
+            execution = asyncio.run(execute())
+
+        self.assertTrue(execution.success)
+        self.assertEqual(
+            LLM_REQUEST_DURATION.count(**labels) - requests_before,
+            len(execution.steps),
+        )
+        self.assertGreater(LLM_TOKENS.value(direction="input", **labels), 0)
+        self.assertEqual(TOOL_DURATION.count(tool="bash") - bash_calls_before, 1)
+        self.assertGreater(TRAJECTORY_BYTES.value(), bytes_before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+import openai
+
+from trae_agent.utils.mock_server import (
+    LatencyDistribution,
+    MockLLMServer,
+    ScriptedResponse,
+    ScriptedToolCall,
+)
+
+SCRIPT = [
+    ScriptedResponse(
+        content="Viewing the project.",
+        tool_calls=[
+            ScriptedToolCall(
+                name="str_replace_based_edit_tool",
+                arguments={"command": "view", "path": "{project_root}/a.py"},
+            )
+        ],
+    ),
+    ScriptedResponse(content="Done.", tool_calls=[ScriptedToolCall(name="task_done")]),
+]
+
+USER_MESSAGE = {"role": "user", "content": "[Project root path]:\n/repo\n\nFix it"}
+
+
+class TestLatencyDistribution(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(
+            LatencyDistribution.parse("0.5"), LatencyDistribution("fixed", 0.5)
+        )
+        self.assertEqual(
+            LatencyDistribution.parse("uniform:0.1:0.3"),
+            LatencyDistribution("uniform", 0.1, 0.3),
+        )
+        with self.assertRaises(ValueError):
+            _ = LatencyDistribution.parse("uniform:0.1")
+        with self.assertRaises(ValueError):
+            _ = LatencyDistribution.parse("fast")
+
+
+class TestMockLLMServer(unittest.TestCase):
+    def setUp(self):
+        self.server = MockLLMServer(script=SCRIPT, seed=0).start()
+        self.client = openai.OpenAI(
+            api_key="mock", base_url=self.server.base_url, max_retries=0
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_chat_completions_follow_the_script(self):
+        first = self.client.chat.completions.create(
+            model="mock", messages=[USER_MESSAGE]
+        )
+        tool_call = first.choices[0].message.tool_calls[0]
+        self.assertEqual(tool_call.function.name, "str_replace_based_edit_tool")
+        self.assertIn('"/repo/a.py"', tool_call.function.arguments)
+
+        second = self.client.chat.completions.create(
+            model="mock",
+            messages=[USER_MESSAGE, {"role": "assistant", "content": "Viewing."}],
+        )
+        self.assertEqual(
+            second.choices[0].message.tool_calls[0].function.name, "task_done"
+        )
+
+    def test_chat_completions_stream(self):
+        stream = self.client.chat.completions.create(
+            model="mock",
+            messages=[USER_MESSAGE],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        chunks = list(stream)
+        content = "".join(
+            chunk.choices[0].delta.content or "" for chunk in chunks if chunk.choices
+        )
+        self.assertEqual(content, "Viewing the project.")
+        self.assertIsNotNone(chunks[-1].usage)
+
+    def test_responses_api(self):
+        response = self.client.responses.create(model="mock", input=[USER_MESSAGE])
+        self.assertEqual(
+            [item.type for item in response.output], ["message", "function_call"]
+        )
+        self.assertEqual(response.output_text, "Viewing the project.")
+
+        events = list(
+            self.client.responses.create(
+                model="mock",
+                input=[USER_MESSAGE, *[item.model_dump() for item in response.output]],
+                stream=True,
+            )
+        )
+        self.assertEqual(events[-1].type, "response.completed")
+        self.assertEqual(events[-1].response.output[-1].name, "task_done")
+
+    def test_error_injection(self):
+        self.server.rate_limit_rate = 1.0
+        with self.assertRaises(openai.RateLimitError):
+            _ = self.client.chat.completions.create(
+                model="mock", messages=[USER_MESSAGE]
+            )
+        self.server.rate_limit_rate = 0.0
+        self.server.server_error_rate = 1.0
+        with self.assertRaises(openai.InternalServerError):
+            _ = self.client.responses.create(model="mock", input=[USER_MESSAGE])
+        self.assertEqual(self.server.stats["rate_limited"], 1)
+        self.assertEqual(self.server.stats["server_errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.tools.base import ToolCall, ToolResult
+from trae_agent.tools.run import TRUNCATED_MESSAGE
+from trae_agent.utils.observation_dedup import ObservationDeduplicator
+
+
+def view(call_id: str, path: str, view_range: list[int] | None = None):
+    arguments = {"command": "view", "path": path}
+    if view_range is not None:
+        arguments["view_range"] = view_range
+    return ToolCall(
+        name="str_replace_based_edit_tool", call_id=call_id, arguments=arguments
+    )
+
+
+def think(call_id: str, number: int, total: int):
+    return ToolCall(
+        name="sequentialthinking",
+        call_id=call_id,
+        arguments={
+            "thought": "...",
+            "thought_number": number,
+            "total_thoughts": total,
+            "next_thought_needed": True,
+        },
+    )
+
+
+def ok(tool_call: ToolCall, result: str = "content"):
+    return ToolResult(
+        call_id=tool_call.call_id, name=tool_call.name, success=True, result=result
+    )
+
+
+class TestObservationDeduplicator(unittest.TestCase):
+    def setUp(self):
+        self.dedup = ObservationDeduplicator()
+
+    def observe(self, step: int, tool_call: ToolCall, result: str = "content"):
+        return self.dedup.observe(step, [tool_call], [ok(tool_call, result)])
+
+    def test_full_view_supersedes_earlier_views(self):
+        self.observe(1, view("a", "/repo/foo.py"))
+        self.observe(2, view("b", "/repo/foo.py", [10, 20]))
+        superseded = self.observe(3, view("c", "/repo/foo.py"))
+        self.assertEqual(set(superseded), {"a", "b"})
+        self.assertIn("step 3", superseded["a"])
+
+    def test_range_view_only_supersedes_contained_ranges(self):
+        self.observe(1, view("a", "/repo/foo.py", [10, 20]))
+        self.observe(2, view("b", "/repo/foo.py", [30, 40]))
+        superseded = self.observe(3, view("c", "/repo/foo.py", [5, 25]))
+        self.assertEqual(set(superseded), {"a"})
+        self.assertEqual(self.observe(4, view("d", "/repo/foo.py", [35, -1])), {})
+        self.assertEqual(
+            set(self.observe(5, view("e", "/repo/foo.py", [30, -1]))), {"b", "d"}
+        )
+
+    def test_other_paths_and_failures_are_kept(self):
+        self.observe(1, view("a", "/repo/foo.py"))
+        self.assertEqual(self.observe(2, view("b", "/repo/bar.py")), {})
+        failed = view("c", "/repo/foo.py")
+        result = ToolResult(call_id="c", name=failed.name, success=False, error="x")
+        self.assertEqual(self.dedup.observe(3, [failed], [result]), {})
+
+    def test_truncated_full_view_keeps_ranged_views(self):
+        self.observe(1, view("a", "/repo/big.py", [900, 950]))
+        superseded = self.observe(
+            2, view("b", "/repo/big.py"), "content" + TRUNCATED_MESSAGE
+        )
+        self.assertEqual(superseded, {})
+
+    def test_thinking_results_collapse(self):
+        self.observe(1, think("t1", 1, 3))
+        superseded = self.observe(2, think("t2", 2, 3))
+        self.assertEqual(list(superseded), ["t1"])
+        self.assertIn("Thought 1/3", superseded["t1"])
+        self.assertEqual(list(self.observe(3, think("t3", 3, 3))), ["t2"])
+
+    def test_same_step_results_are_not_superseded(self):
+        first, second = view("a", "/repo/foo.py"), view("b", "/repo/foo.py")
+        superseded = self.dedup.observe(1, [first, second], [ok(first), ok(second)])
+        self.assertEqual(superseded, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from openai.types.chat import ChatCompletion
+
+from trae_agent.tools.base import ToolResult
+from trae_agent.tools.bash_tool import BashTool
+from trae_agent.tools.task_done_tool import TaskDoneTool
+from trae_agent.utils.config import ModelParameters
+from trae_agent.utils.llm_basics import LLMMessage
+from trae_agent.utils.pollinations_client import PollinationsClient
+
+
+def completion(arguments: str, cached_tokens: int) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "openai",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call_1",
+                                "type": "function",
+                                "function": {"name": "bash", "arguments": arguments},
+                            }
+                        ],
+                    },
+                }
+            ],
+            "usage": {
+                "prompt_tokens": 1000,
+                "completion_tokens": 20,
+                "total_tokens": 1020,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+    )
+
+
+class TestPollinationsClient(unittest.TestCase):
+    def setUp(self):
+        self.model_parameters = ModelParameters(
+            model="openai",
+            api_key="",
+            max_tokens=1024,
+            temperature=0.5,
+            top_p=1,
+            top_k=0,
+            parallel_tool_calls=False,
+            max_retries=1,
+        )
+        self.client = PollinationsClient(self.model_parameters)
+        self.client.client = MagicMock()
+        self.create = self.client.client.chat.completions.create
+
+    def test_cached_tokens_are_parsed(self):
+        self.create.return_value = completion('{"command": "ls"}', 768)
+        response = self.client.chat([LLMMessage("user", "hi")], self.model_parameters)
+        self.assertEqual(response.usage.input_tokens, 1000)
+        self.assertEqual(response.usage.cache_read_input_tokens, 768)
+
+    def test_request_prefix_is_stable(self):
+        tools = [TaskDoneTool(), BashTool()]
+        self.create.return_value = completion('{"restart": false, "command": "ls"}', 0)
+        self.client.chat(
+            [LLMMessage("system", "system"), LLMMessage("user", "hi")],
+            self.model_parameters,
+            tools,
+        )
+        first = self.create.call_args.kwargs
+        # The history now ends with the stored assistant reply
+        first_messages = [dict(message) for message in self.client.message_history]
+
+        result = ToolResult(call_id="call_1", name="bash", success=True, result="a")
+        self.client.chat(
+            [LLMMessage(role="user", tool_result=result)],
+            self.model_parameters,
+            list(reversed(tools)),
+        )
+        second = self.create.call_args.kwargs
+
+        self.assertEqual(first["tools"], second["tools"])
+        self.assertEqual(
+            [tool["function"]["name"] for tool in second["tools"]],
+            ["bash", "task_done"],
+        )
+        self.assertEqual(second["messages"][: len(first_messages)], first_messages)
+        assistant = first_messages[-1]
+        self.assertEqual(
+            assistant["tool_calls"][0]["function"]["arguments"],
+            '{"command": "ls", "restart": false}',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.utils.config import ModelParameters
+from trae_agent.utils.llm_basics import LLMMessage
+from trae_agent.utils.llm_client import LLMClient
+from trae_agent.utils.replay_client import ReplayClient, recorded_project_path
+
+TRAJECTORY = {
+    "task": "fix the bug",
+    "start_time": "2025-01-01T00:00:00",
+    "llm_interactions": [
+        {
+            "input_messages": [
+                {"role": "user", "content": "[Project root path]:\n/old/repo\n\n"}
+            ],
+            "response": {
+                "content": "looking",
+                "model": "openai",
+                "finish_reason": "tool_calls",
+                "usage": {"input_tokens": 10, "output_tokens": 2},
+                "tool_calls": [
+                    {
+                        "name": "str_replace_based_edit_tool",
+                        "call_id": "call_1",
+                        "arguments": {"command": "view", "path": "/old/repo/a.py"},
+                    }
+                ],
+            },
+        },
+        {
+            "input_messages": [],
+            "response": {"content": "done", "usage": None, "tool_calls": None},
+        },
+    ],
+    "agent_steps": [
+        {"step_number": 1, "timestamp": "2025-01-01T00:00:02.500000"},
+        {"step_number": 2, "timestamp": "2025-01-01T00:00:03"},
+    ],
+}
+
+
+class TestReplayClient(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "trajectory.json"
+        self.path.write_text(json.dumps(TRAJECTORY))
+        self.model_parameters = ModelParameters(
+            model="openai",
+            api_key="",
+            max_tokens=1024,
+            temperature=0.5,
+            top_p=1,
+            top_k=0,
+            parallel_tool_calls=False,
+            max_retries=1,
+            base_url=str(self.path),
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_responses_are_replayed_in_order(self):
+        client = LLMClient("replay", self.model_parameters)
+        first = client.chat([LLMMessage("user", "hi")], self.model_parameters)
+        self.assertEqual(first.content, "looking")
+        self.assertEqual(first.usage.input_tokens, 10)
+        self.assertEqual(first.tool_calls[0].arguments["path"], "/old/repo/a.py")
+        second = client.chat([LLMMessage("user", "go on")], self.model_parameters)
+        self.assertEqual(second.content, "done")
+        self.assertIsNone(second.tool_calls)
+        with self.assertRaises(ValueError):
+            _ = client.chat([LLMMessage("user", "more")], self.model_parameters)
+
+    def test_paths_are_remapped_to_the_replay_checkout(self):
+        client = ReplayClient(self.model_parameters)
+        client.path_remap = (recorded_project_path(TRAJECTORY), "/new/repo")
+        response = client.chat([LLMMessage("user", "hi")], self.model_parameters)
+        self.assertEqual(response.tool_calls[0].arguments["path"], "/new/repo/a.py")
+
+    def test_step_durations(self):
+        self.assertEqual(ReplayClient.step_durations(TRAJECTORY), {1: 2.5, 2: 0.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
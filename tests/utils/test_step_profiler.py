@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent import TraeAgent
+from trae_agent.utils.config import Config
+from trae_agent.utils.mock_server import MockLLMServer
+from trae_agent.utils.step_profiler import StackSampler, StepProfiler
+
+
+def spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def busy_caller() -> None:
+    spin(0.2)
+
+
+class TestStackSampler(unittest.TestCase):
+    def test_samples_the_stack_of_the_thread(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.002)
+        sampler.start()
+        busy_caller()
+        sampler.stop()
+
+        self.assertGreater(sampler.stacks.total(), 10)
+        stack, _ = sampler.stacks.most_common(1)[0]
+        frames = stack.split(";")
+        self.assertTrue(frames[-2].startswith("busy_caller (test_step_profiler.py:"))
+        self.assertTrue(frames[-1].startswith("spin ("))
+
+
+class TestStepProfiler(unittest.TestCase):
+    def test_agent_steps_are_profiled(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, MockLLMServer() as server:
+            config = Config(
+                {
+                    "default_provider": "pollinations",
+                    "max_steps": 10,
+                    "enable_lakeview": False,
+                    "model_providers": {
+                        "pollinations": {
+                            "model": "mock",
+                            "api_key": "mock",
+                            "base_url": server.base_url,
+                            "max_retries": 1,
+                        }
+                    },
+                }
+            )
+            agent = TraeAgent(config)
+            profiler = StepProfiler(Path(tmp_dir) / "profile", overhead_threshold=0)
+            agent.set_step_profiler(profiler)
+            agent.new_task("look", {"project_path": tmp_dir, "issue": "look"})
+
+            async def execute():
+                try:
+                    return await agent.execute_task()
+                finally:
+                    await agent.tool_caller.close_tools()
+
+            execution = asyncio.run(execute())
+            summary_path = profiler.finish()
+
+            self.assertTrue(execution.success)
+            self.assertIsNotNone(summary_path)
+            summary = json.loads(Path(summary_path).read_text())  # pyright: ignore[reportArgumentType]
+            self.assertEqual(len(summary["steps"]), len(execution.steps))
+            self.assertEqual(
+                summary["flagged_steps"], [step.step_number for step in execution.steps]
+            )
+            for step in summary["steps"]:
+                self.assertTrue(Path(step["profile_file"]).exists())
+                self.assertTrue(Path(step["allocations_file"]).exists())
+                self.assertLessEqual(step["non_llm_time"], step["total_time"])
+            folded = (Path(tmp_dir) / "profile" / "merged.folded").read_text()
+            counts = [int(line.rsplit(" ", 1)[1]) for line in folded.splitlines()]
+            self.assertEqual(
+                sum(counts), sum(step["samples"] for step in summary["steps"])
+            )
+            self.assertTrue(all(count > 0 for count in counts))
+            _ = pstats.Stats(str(Path(tmp_dir) / "profile" / "merged.prof"))
+
+
+if __name__ == "__main__":
+    unittest.main()
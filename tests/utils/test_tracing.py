@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import override
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.agent import TraeAgent
+from trae_agent.tools.base import (
+    Tool,
+    ToolCall,
+    ToolCallArguments,
+    ToolExecResult,
+    ToolExecutor,
+    ToolParameter,
+)
+from trae_agent.utils.config import Config
+from trae_agent.utils.mock_server import MockLLMServer
+from trae_agent.utils.tracing import (
+    FileSpanExporter,
+    Tracer,
+    load_spans,
+    parse_traceparent,
+)
+
+
+class SleepTool(Tool):
+    @override
+    def get_name(self) -> str:
+        return "sleep"
+
+    @override
+    def get_description(self) -> str:
+        return "Sleep for a while"
+
+    @override
+    def get_parameters(self) -> list[ToolParameter]:
+        return []
+
+    @override
+    async def execute(self, arguments: ToolCallArguments) -> ToolExecResult:
+        await asyncio.sleep(0.2)
+        return ToolExecResult(output="slept")
+
+
+def attribute(span: dict[str, object], key: str) -> object:
+    for item in span["attributes"]:  # pyright: ignore[reportGeneralTypeIssues]
+        if item["key"] == key:
+            return next(iter(item["value"].values()))
+    return None
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.trace_path = self.root / "traces.jsonl"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_parallel_tool_spans_overlap(self):
+        tracer = Tracer(FileSpanExporter(self.trace_path))
+        executor = ToolExecutor([SleepTool()], tracer)
+        with tracer.span("step"):
+            _ = await executor.parallel_tool_call(
+                [
+                    ToolCall(name="sleep", call_id="a"),
+                    ToolCall(name="sleep", call_id="b"),
+                ]
+            )
+        tracer.flush()
+
+        spans = {span["name"]: span for span in load_spans(self.trace_path)}
+        tool_spans = [
+            span
+            for span in load_spans(self.trace_path)
+            if span["name"] == "tool.execute"
+        ]
+        self.assertEqual(len(tool_spans), 2)
+        for span in tool_spans:
+            self.assertEqual(span["parentSpanId"], spans["step"]["spanId"])
+            self.assertEqual(span["traceId"], spans["step"]["traceId"])
+            self.assertEqual(attribute(span, "polli.tool.output_size"), "5")
+        first, second = sorted(
+            tool_spans, key=lambda span: int(span["startTimeUnixNano"])
+        )
+        self.assertLess(int(second["startTimeUnixNano"]), int(first["endTimeUnixNano"]))
+
+    def test_traceparent(self):
+        self.assertEqual(
+            parse_traceparent(
+                "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+            ),
+            ("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331"),
+        )
+        self.assertIsNone(parse_traceparent("garbage"))
+
+    def test_full_queue_drops_spans(self):
+        tracer = Tracer(FileSpanExporter(self.trace_path), max_queue_size=2)
+        for name in ("a", "b", "c"):
+            with tracer.span(name):
+                pass
+
+        # Nothing is exported before the flush
+        self.assertFalse(self.trace_path.exists())
+        self.assertEqual(tracer.dropped_spans, 1)
+        tracer.shutdown()
+        self.assertEqual(
+            [span["name"] for span in load_spans(self.trace_path)], ["a", "b"]
+        )
+
+    async def test_agent_span_hierarchy(self):
+        with MockLLMServer() as server:
+            config = Config(
+                {
+                    "default_provider": "pollinations",
+                    "max_steps": 10,
+                    "enable_lakeview": False,
+                    "tracing": {"exporter": "file", "path": str(self.trace_path)},
+                    "model_providers": {
+                        "pollinations": {
+                            "model": "mock",
+                            "api_key": "mock",
+                            "base_url": server.base_url,
+                            "max_retries": 1,
+                        }
+                    },
+                }
+            )
+            agent = TraeAgent(config)
+            agent.new_task("look", {"project_path": str(self.root), "issue": "look"})
+            try:
+                execution = await agent.execute_task()
+            finally:
+                await agent.tool_caller.close_tools()
+
+        self.assertTrue(execution.success)
+        spans = load_spans(self.trace_path)
+        by_id = {span["spanId"]: span for span in spans}
+        [task_span] = [span for span in spans if span["name"] == "task"]
+        step_spans = [span for span in spans if span["name"] == "step"]
+        self.assertEqual(len(step_spans), len(execution.steps))
+        for step_span in step_spans:
+            self.assertEqual(step_span["parentSpanId"], task_span["spanId"])
+
+        llm_spans = [span for span in spans if span["name"] == "llm.chat"]
+        tool_spans = [span for span in spans if span["name"] == "tool.execute"]
+        self.assertEqual(len(llm_spans), len(execution.steps))
+        self.assertEqual(len(tool_spans), 2)
+        for span in llm_spans + tool_spans:
+            self.assertEqual(by_id[span["parentSpanId"]]["name"], "step")
+        self.assertEqual(attribute(llm_spans[0], "gen_ai.request.model"), "mock")
+        self.assertIsNotNone(attribute(llm_spans[0], "gen_ai.usage.input_tokens"))
+        self.assertEqual(attribute(task_span, "polli.success"), True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from trae_agent.utils.git_utils import GitError
+from trae_agent.utils.workspace_snapshots import BEFORE_ROLLBACK, WorkspaceSnapshots
+
+
+def git(project_path: str, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=project_path,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def write(project_path: str, path: str, content: str) -> None:
+    full_path = os.path.join(project_path, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "w") as f:
+        _ = f.write(content)
+
+
+def read(project_path: str, path: str) -> str:
+    with open(os.path.join(project_path, path)) as f:
+        return f.read()
+
+
+class TestWorkspaceSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.project_path: str = tempfile.mkdtemp()
+        write(self.project_path, "app.py", "a = 1\n")
+        write(self.project_path, "lib/util.py", "u = 1\n")
+        write(self.project_path, ".gitignore", "*.log\n")
+        _ = git(self.project_path, "init", "-q")
+        _ = git(self.project_path, "add", ".")
+        _ = git(self.project_path, "commit", "-qm", "initial")
+        self.snapshots: WorkspaceSnapshots = WorkspaceSnapshots(self.project_path)
+
+    def test_rollback_restores_edits_deletions_and_new_files(self):
+        write(self.project_path, "app.py", "a = 2\n")
+        write(self.project_path, "notes.txt", "untracked\n")
+        _ = asyncio.run(self.snapshots.create("good"))
+
+        write(self.project_path, "app.py", "broken\n")
+        os.remove(os.path.join(self.project_path, "lib/util.py"))
+        write(self.project_path, "scratch.py", "tmp\n")
+        write(self.project_path, "run.log", "ignored\n")
+        head = git(self.project_path, "rev-parse", "HEAD")
+
+        changed = asyncio.run(self.snapshots.rollback("good"))
+
+        self.assertEqual(sorted(changed), ["app.py", "lib/util.py", "scratch.py"])
+        self.assertEqual(read(self.project_path, "app.py"), "a = 2\n")
+        self.assertEqual(read(self.project_path, "notes.txt"), "untracked\n")
+        self.assertTrue(os.path.exists(os.path.join(self.project_path, "lib/util.py")))
+        self.assertFalse(os.path.exists(os.path.join(self.project_path, "scratch.py")))
+        # Ignored files, HEAD and the index are left alone
+        self.assertTrue(os.path.exists(os.path.join(self.project_path, "run.log")))
+        self.assertEqual(git(self.project_path, "rev-parse", "HEAD"), head)
+        self.assertEqual(git(self.project_path, "diff", "--cached"), "")
+
+    def test_rollback_can_be_undone(self):
+        _ = asyncio.run(self.snapshots.create("start"))
+        write(self.project_path, "app.py", "work in progress\n")
+
+        _ = asyncio.run(self.snapshots.rollback())
+        self.assertEqual(read(self.project_path, "app.py"), "a = 1\n")
+
+        _ = asyncio.run(self.snapshots.rollback(BEFORE_ROLLBACK))
+        self.assertEqual(read(self.project_path, "app.py"), "work in progress\n")
+
+    def test_rollback_without_changes(self):
+        _ = asyncio.run(self.snapshots.create("start"))
+        self.assertEqual(asyncio.run(self.snapshots.rollback("start")), [])
+
+    def test_list_create_and_delete(self):
+        first = asyncio.run(self.snapshots.create())
+        second = asyncio.run(self.snapshots.create())
+        self.assertEqual((first.name, second.name), ("snapshot-1", "snapshot-2"))
+
+        asyncio.run(self.snapshots.delete("snapshot-1"))
+        names = [s.name for s in asyncio.run(self.snapshots.list_snapshots())]
+        self.assertEqual(names, ["snapshot-2"])
+        # Snapshots are not branches or stash entries
+        self.assertEqual(git(self.project_path, "branch", "--list").count("\n"), 1)
+        self.assertEqual(git(self.project_path, "stash", "list"), "")
+
+    def test_snapshots_of_the_same_second_keep_their_order(self):
+        for _ in range(11):
+            _ = asyncio.run(self.snapshots.create())
+        _ = asyncio.run(self.snapshots.create("snapshot-3"))
+
+        names = [s.name for s in asyncio.run(self.snapshots.list_snapshots())]
+        expected = [f"snapshot-{n}" for n in range(1, 12) if n != 3]
+        self.assertEqual(names, [*expected, "snapshot-3"])
+        self.assertEqual(asyncio.run(self.snapshots.get()).name, "snapshot-3")
+
+    def test_invalid_and_missing_snapshots(self):
+        with self.assertRaises(GitError):
+            _ = asyncio.run(self.snapshots.create("../escape"))
+        with self.assertRaises(GitError):
+            _ = asyncio.run(self.snapshots.rollback("missing"))
+        with self.assertRaises(GitError):
+            _ = asyncio.run(WorkspaceSnapshots(tempfile.mkdtemp()).create())
+
+    def test_rollback_refuses_a_subdirectory(self):
+        lib_snapshots = WorkspaceSnapshots(os.path.join(self.project_path, "lib"))
+        _ = asyncio.run(self.snapshots.create("clean"))
+        write(self.project_path, "app.py", "edited\n")
+
+        with self.assertRaises(GitError):
+            _ = asyncio.run(lib_snapshots.rollback("clean"))
+        self.assertEqual(read(self.project_path, "app.py"), "edited\n")
+
+    def test_fork_is_isolated_and_has_its_own_snapshots(self):
+        write(self.project_path, "app.py", "uncommitted\n")
+        fork_path = os.path.join(tempfile.mkdtemp(), "attempt")
+
+        path = asyncio.run(self.snapshots.fork(fork_path))
+        try:
+            self.assertEqual(read(path, "app.py"), "uncommitted\n")
+            write(path, "app.py", "attempt\n")
+            fork_snapshots = WorkspaceSnapshots(path)
+            _ = asyncio.run(fork_snapshots.create("in-fork"))
+
+            self.assertEqual(read(self.project_path, "app.py"), "uncommitted\n")
+            names = [s.name for s in asyncio.run(self.snapshots.list_snapshots())]
+            self.assertNotIn("in-fork", names)
+        finally:
+            asyncio.run(self.snapshots.remove_fork(path))
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
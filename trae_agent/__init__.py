@@ -3,11 +3,33 @@
 
 """Trae Agent - LLM-based agent for general purpose software engineering tasks."""
 
+import importlib
+from typing import TYPE_CHECKING
+
 __version__ = "0.1.0"
 
-from .agent.base import Agent
-from .agent.trae_agent import TraeAgent
-from .tools.base import Tool, ToolExecutor
-from .utils.llm_client import LLMClient
+if TYPE_CHECKING:
+    from .agent.base import Agent
+    from .agent.trae_agent import TraeAgent
+    from .tools.base import Tool, ToolExecutor
+    from .utils.llm_client import LLMClient
 
 __all__ = ["Agent", "TraeAgent", "LLMClient", "Tool", "ToolExecutor"]
+
+# The exports are imported on first access, so that `polli --help` and other
+# commands that never run an agent do not load the agent and its dependencies.
+_lazy_exports = {
+    "Agent": ".agent.base",
+    "TraeAgent": ".agent.trae_agent",
+    "Tool": ".tools.base",
+    "ToolExecutor": ".tools.base",
+    "LLMClient": ".utils.llm_client",
+}
+
+
+def __getattr__(name: str) -> object:
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_lazy_exports[name], __name__), name)
+    globals()[name] = value
+    return value
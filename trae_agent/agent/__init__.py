@@ -3,7 +3,28 @@
 
 """Agent module for Trae Agent."""
 
-from .base import Agent
-from .trae_agent import TraeAgent
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["Agent", "TraeAgent"]
+if TYPE_CHECKING:
+    from .base import Agent
+    from .sub_agent import SubAgent
+    from .trae_agent import TraeAgent
+
+__all__ = ["Agent", "SubAgent", "TraeAgent"]
+
+# Imported on first access, so that importing `agent_basics` alone stays cheap
+# and does not pull the agent's dependencies into modules it depends on.
+_lazy_exports = {
+    "Agent": ".base",
+    "SubAgent": ".sub_agent",
+    "TraeAgent": ".trae_agent",
+}
+
+
+def __getattr__(name: str) -> object:
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_lazy_exports[name], __name__), name)
+    globals()[name] = value
+    return value
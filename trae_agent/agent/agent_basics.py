@@ -1,7 +1,7 @@
 # Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 
 from ..tools.base import ToolCall, ToolResult
@@ -19,6 +19,26 @@ class AgentState(Enum):
     ERROR = "error"
 
 
+@dataclass
+class StepTimings:
+    """Where the wall time of a step went, in seconds."""
+
+    total_time: float = 0.0
+    # LLM call, without the trajectory writes made while recording it
+    llm_time: float = 0.0
+    # Only known for streamed responses
+    time_to_first_token: float | None = None
+    # Part of llm_time spent sleeping between retries
+    retry_wait_time: float = 0.0
+    # Tool call id to duration
+    tool_durations: dict[str, float] = field(default_factory=dict)
+    recorder_time: float = 0.0
+    console_time: float = 0.0
+
+    def to_dict(self) -> dict[str, object]:
+        return asdict(self)
+
+
 @dataclass
 class AgentStep:
     """Represents a single step in agent execution."""
@@ -33,6 +53,41 @@ class AgentStep:
     error: str | None = None
     extra: dict[str, object] | None = None
     llm_usage: LLMUsage | None = None
+    timings: StepTimings = field(default_factory=StepTimings)
+
+    def to_event(self) -> dict[str, object]:
+        """Summarize the step as a compact JSON-serializable event."""
+        event: dict[str, object] = {
+            "step_number": self.step_number,
+            "state": self.state.value,
+        }
+        if self.llm_response and self.llm_response.content:
+            event["content"] = self.llm_response.content
+        if self.tool_calls:
+            event["tool_calls"] = [
+                {
+                    "call_id": tool_call.call_id,
+                    "name": tool_call.name,
+                    "arguments": tool_call.arguments,
+                }
+                for tool_call in self.tool_calls
+            ]
+        if self.tool_results:
+            event["tool_results"] = [
+                {
+                    "call_id": tool_result.call_id,
+                    "name": tool_result.name,
+                    "success": tool_result.success,
+                    "result": tool_result.result,
+                    "error": tool_result.error,
+                }
+                for tool_result in self.tool_results
+            ]
+        if self.reflection:
+            event["reflection"] = self.reflection
+        if self.error:
+            event["error"] = self.error
+        return event
 
 
 @dataclass
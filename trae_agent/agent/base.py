@@ -3,13 +3,24 @@
 
 """Base Agent class for LLM-based agents."""
 
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+import httpx
 
 from ..tools.base import Tool, ToolExecutor, ToolResult
+from ..utils.checkpoint import StepCheckpointer
 from ..utils.cli_console import CLIConsole
 from ..utils.config import Config, ModelParameters
-from ..utils.llm_basics import LLMMessage, LLMResponse
+from ..utils.llm_basics import LLMMessage, LLMResponse, LLMUsage
+from ..utils.llm_cache import LLMResponseCache
 from ..utils.llm_client import LLMClient
+from ..utils.metrics import ACTIVE_AGENTS
+from ..utils.observation_dedup import ObservationDeduplicator
+from ..utils.step_profiler import StepProfiler
+from ..utils.tracing import Tracer, create_tracer, trace_span
 from ..utils.trajectory_recorder import TrajectoryRecorder
 from .agent_basics import AgentExecution, AgentState, AgentStep
 
@@ -17,9 +28,26 @@ from .agent_basics import AgentExecution, AgentState, AgentStep
 class Agent(ABC):
     """Base class for LLM-based agents."""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, http_client: httpx.Client | None = None):
+        llm_cache: LLMResponseCache | None = None
+        if config.llm_cache_config is not None:
+            llm_cache = LLMResponseCache(
+                config.llm_cache_config.path,
+                max_size_bytes=config.llm_cache_config.max_size_mb * 1024 * 1024,
+                read_only=config.llm_cache_config.read_only,
+            )
+        # Spans of this agent's tasks, steps, LLM calls and tool calls
+        self.tracer: Tracer | None = (
+            create_tracer(config.tracing_config, http_client)
+            if config.tracing_config is not None
+            else None
+        )
         self.llm_client: LLMClient = LLMClient(
-            config.default_provider, config.model_providers[config.default_provider]
+            config.default_provider,
+            config.model_providers[config.default_provider],
+            cache=llm_cache,
+            http_client=http_client,
+            tracer=self.tracer,
         )
         self.max_steps: int = config.max_steps
         self.model_parameters: ModelParameters = config.model_providers[
@@ -28,12 +56,23 @@ class Agent(ABC):
         self.initial_messages: list[LLMMessage] = []
         self.task: str = ""
         self.tools: list[Tool] = []
-        self.tool_caller: ToolExecutor = ToolExecutor([])
+        self.tool_caller: ToolExecutor = ToolExecutor([], self.tracer)
+        # Where execute_task starts, other than at step 1 when resuming a run
+        self.first_step_number: int = 1
+        self.initial_total_tokens: LLMUsage | None = None
 
         self.cli_console: CLIConsole | None = None
+        self.step_profiler: StepProfiler | None = None
+        self.step_listeners: list[Callable[[AgentStep], None]] = []
+
+        # Replaces stale file views and thinking results in the chat history
+        self.observation_dedup: ObservationDeduplicator | None = (
+            ObservationDeduplicator() if config.enable_observation_dedup else None
+        )
 
         # Trajectory recorder
         self.trajectory_recorder: TrajectoryRecorder | None = None
+        self.checkpointer: StepCheckpointer | None = None
 
     def set_trajectory_recorder(self, recorder: TrajectoryRecorder | None) -> None:
         """Set the trajectory recorder for this agent."""
@@ -41,196 +80,180 @@ class Agent(ABC):
         # Also set it on the LLM client
         self.llm_client.set_trajectory_recorder(recorder)
 
+    def set_checkpointer(self, checkpointer: StepCheckpointer | None) -> None:
+        """Set the checkpointer that records each completed step of new tasks."""
+        self.checkpointer = checkpointer
+
     def set_cli_console(self, cli_console: CLIConsole | None) -> None:
         """Set the CLI console for this agent."""
         self.cli_console = cli_console
 
+    def set_step_profiler(self, step_profiler: StepProfiler | None) -> None:
+        """Set the profiler that wraps each step of this agent."""
+        self.step_profiler = step_profiler
+
+    def add_step_listener(self, listener: Callable[[AgentStep], None]) -> None:
+        """Register a callback invoked whenever a step changes state."""
+        self.step_listeners.append(listener)
+
+    def _update_step_status(self, step: AgentStep) -> None:
+        start_time = time.perf_counter()
+        if self.cli_console:
+            self.cli_console.update_status(step)
+        for listener in self.step_listeners:
+            listener(step)
+        step.timings.console_time += time.perf_counter() - start_time
+
+    def _recorder_write_time(self) -> float:
+        return self.trajectory_recorder.write_time if self.trajectory_recorder else 0.0
+
+    def _record_step(
+        self, step: AgentStep, messages: list[LLMMessage], recorder_start: float
+    ) -> None:
+        """Record the step in the trajectory, with its timings so far."""
+        if self.trajectory_recorder:
+            step.timings.recorder_time = self._recorder_write_time() - recorder_start
+            self.trajectory_recorder.record_agent_step(
+                step_number=step.step_number,
+                state=step.state.value,
+                llm_messages=messages,
+                llm_response=step.llm_response,
+                tool_calls=step.tool_calls,
+                tool_results=step.tool_results,
+                reflection=step.reflection,
+                error=step.error,
+                timings=step.timings.to_dict(),
+            )
+        # Includes the write above, which the recorded timings cannot
+        step.timings.recorder_time = self._recorder_write_time() - recorder_start
+
+    async def _checkpoint_step(
+        self, step: AgentStep, messages: list[LLMMessage], execution: AgentExecution
+    ) -> None:
+        """Checkpoint a completed step with the state of the tools it called."""
+        if (
+            self.checkpointer is None
+            or not self.checkpointer.started
+            or step.llm_response is None
+        ):
+            return
+        tool_states: dict[str, dict[str, object]] = {}
+        for name in {tool_call.name for tool_call in step.tool_calls or []}:
+            tool = self.tool_caller.tools.get(name)
+            state = await tool.get_state() if tool else None
+            if state is not None:
+                tool_states[name] = state
+        self.checkpointer.write_step(
+            step.step_number,
+            step.llm_response,
+            messages,
+            execution.total_tokens,
+            tool_states,
+        )
+
     @abstractmethod
     def new_task(
         self,
         task: str,
         extra_args: dict[str, str] | None = None,
         tool_names: list[str] | None = None,
+        tools: list[Tool] | None = None,
     ):
-        """Create a new task."""
+        """Create a new task. Pre-built `tools` take precedence over `tool_names`."""
         pass
 
     async def execute_task(self) -> AgentExecution:
         """Execute a task using the agent."""
-        import time
-
         start_time = time.time()
 
-        execution = AgentExecution(task=self.task, steps=[])
-
-        try:
-            messages = self.initial_messages
-            step_number = 1
-
-            while step_number <= self.max_steps:
-                step = AgentStep(step_number=step_number, state=AgentState.THINKING)
-
-                try:
-                    # Get LLM response
-                    step.state = AgentState.THINKING
-
-                    # Display thinking state
-                    if self.cli_console:
-                        self.cli_console.update_status(step)
-
-                    llm_response = self.llm_client.chat(
-                        messages, self.model_parameters, self.tools
-                    )
-                    step.llm_response = llm_response
-
-                    # Display step with LLM response
-                    if self.cli_console:
-                        self.cli_console.update_status(step)
+        execution = AgentExecution(
+            task=self.task, steps=[], total_tokens=self.initial_total_tokens
+        )
 
-                    # Update token usage
-                    if llm_response.usage:
-                        if execution.total_tokens:
-                            execution.total_tokens += llm_response.usage
-                        else:
-                            execution.total_tokens = llm_response.usage
+        with (
+            ACTIVE_AGENTS.track_inprogress(),
+            trace_span(
+                self.tracer,
+                "task",
+                {
+                    "gen_ai.system": self.llm_client.provider.value,
+                    "gen_ai.request.model": self.model_parameters.model,
+                    "polli.max_steps": self.max_steps,
+                },
+            ) as task_span,
+        ):
+            try:
+                messages = self.initial_messages
+                step_number = self.first_step_number
+
+                while step_number <= self.max_steps:
+                    step = AgentStep(step_number=step_number, state=AgentState.THINKING)
+                    step_start = time.perf_counter()
+                    recorder_start = self._recorder_write_time()
+                    if self.step_profiler:
+                        self.step_profiler.start_step()
+
+                    with trace_span(
+                        self.tracer, "step", {"polli.step.number": step_number}
+                    ) as step_span:
+                        try:
+                            messages = await self._run_step(step, messages, execution)
+                            step.timings.total_time = time.perf_counter() - step_start
+                            self._record_step(step, messages, recorder_start)
+                            if step.state != AgentState.COMPLETED:
+                                await self._checkpoint_step(step, messages, execution)
+                            self._update_step_status(step)
+                            execution.steps.append(step)
+                        except Exception as e:
+                            step.state = AgentState.ERROR
+                            step.error = str(e)
 
-                    if self.llm_indicates_task_completed(llm_response):
-                        if self.is_task_completed(llm_response):
-                            step.state = AgentState.COMPLETED
-                            execution.final_result = llm_response.content
-                            execution.success = True
+                            # Display error
+                            self._update_step_status(step)
 
                             # Record agent step
-                            if self.trajectory_recorder:
-                                self.trajectory_recorder.record_agent_step(
-                                    step_number=step.step_number,
-                                    state=step.state.value,
-                                    llm_messages=messages,
-                                    llm_response=step.llm_response,
-                                    tool_calls=step.tool_calls,
-                                    tool_results=step.tool_results,
-                                    reflection=step.reflection,
-                                    error=step.error,
-                                )
-                            if self.cli_console:
-                                self.cli_console.update_status(step)
+                            step.timings.total_time = time.perf_counter() - step_start
+                            self._record_step(step, messages, recorder_start)
+                            self._update_step_status(step)
                             execution.steps.append(step)
                             break
-                        else:
-                            step.state = AgentState.THINKING
-                            messages = [
-                                LLMMessage(
-                                    role="user", content=self.task_incomplete_message()
-                                )
-                            ]
-                    else:
-                        # Check if the response contains a tool call
-                        tool_calls = llm_response.tool_calls
-
-                        if tool_calls and len(tool_calls) > 0:
-                            # Execute tool call
-                            step.state = AgentState.CALLING_TOOL
-                            step.tool_calls = tool_calls
-
-                            # Display tool calling state with tool calls
-                            if self.cli_console:
-                                self.cli_console.update_status(step)
-
-                            if self.model_parameters.parallel_tool_calls:
-                                tool_results = (
-                                    await self.tool_caller.parallel_tool_call(
-                                        tool_calls
-                                    )
-                                )
-                            else:
-                                tool_results = (
-                                    await self.tool_caller.sequential_tool_call(
-                                        tool_calls
-                                    )
-                                )
-                            step.tool_results = tool_results
-
-                            # Display tool results
-                            if self.cli_console:
-                                self.cli_console.update_status(step)
-
-                            messages = []
-                            for tool_result in tool_results:
-                                # Add tool result to conversation
-                                message = LLMMessage(
-                                    role="user", tool_result=tool_result
-                                )
-                                messages.append(message)
-
-                            reflection = self.reflect_on_result(tool_results)
-                            if reflection:
-                                step.state = AgentState.REFLECTING
-                                step.reflection = reflection
-
-                                # Display reflection
-                                if self.cli_console:
-                                    self.cli_console.update_status(step)
-
-                                messages.append(
-                                    LLMMessage(role="assistant", content=reflection)
-                                )
-                        else:
-                            messages = [
-                                LLMMessage(
-                                    role="user",
-                                    content="It seems that you have not completed the task.",
-                                )
-                            ]
-
-                    # Record agent step
-                    if self.trajectory_recorder:
-                        self.trajectory_recorder.record_agent_step(
-                            step_number=step.step_number,
-                            state=step.state.value,
-                            llm_messages=messages,
-                            llm_response=step.llm_response,
-                            tool_calls=step.tool_calls,
-                            tool_results=step.tool_results,
-                            reflection=step.reflection,
-                            error=step.error,
-                        )
-                    if self.cli_console:
-                        self.cli_console.update_status(step)
-                    execution.steps.append(step)
+                        finally:
+                            step_span.set_attribute(
+                                "polli.step.state", step.state.value
+                            )
+                            step_span.error = step.error
+                            if self.step_profiler:
+                                _ = self.step_profiler.end_step(step)
+
+                    if step.state == AgentState.COMPLETED:
+                        break
                     step_number += 1
 
-                except Exception as e:
-                    step.state = AgentState.ERROR
-                    step.error = str(e)
-
-                    # Display error
-                    if self.cli_console:
-                        self.cli_console.update_status(step)
-
-                    # Record agent step
-                    if self.trajectory_recorder:
-                        self.trajectory_recorder.record_agent_step(
-                            step_number=step.step_number,
-                            state=step.state.value,
-                            llm_messages=messages,
-                            llm_response=step.llm_response,
-                            tool_calls=step.tool_calls,
-                            tool_results=step.tool_results,
-                            reflection=step.reflection,
-                            error=step.error,
-                        )
-                    if self.cli_console:
-                        self.cli_console.update_status(step)
-                    execution.steps.append(step)
-                    break
-
-            if step_number > self.max_steps and not execution.success:
-                execution.final_result = (
-                    "Task execution exceeded maximum steps without completion."
+                if step_number > self.max_steps and not execution.success:
+                    execution.final_result = (
+                        "Task execution exceeded maximum steps without completion."
+                    )
+
+            except Exception as e:
+                execution.final_result = f"Agent execution failed: {str(e)}"
+
+            if self.checkpointer and self.checkpointer.started and execution.success:
+                self.checkpointer.finish(execution.success, execution.final_result)
+
+            task_span.set_attribute("polli.success", execution.success)
+            task_span.set_attribute("polli.steps", len(execution.steps))
+            if execution.total_tokens:
+                task_span.set_attribute(
+                    "gen_ai.usage.input_tokens", execution.total_tokens.input_tokens
+                )
+                task_span.set_attribute(
+                    "gen_ai.usage.output_tokens", execution.total_tokens.output_tokens
                 )
+            if not execution.success:
+                task_span.error = execution.final_result
 
-        except Exception as e:
-            execution.final_result = f"Agent execution failed: {str(e)}"
+        if self.tracer:
+            await asyncio.to_thread(self.tracer.flush)
 
         execution.execution_time = time.time() - start_time
 
@@ -240,6 +263,113 @@ class Agent(ABC):
 
         return execution
 
+    async def _run_step(
+        self, step: AgentStep, messages: list[LLMMessage], execution: AgentExecution
+    ) -> list[LLMMessage]:
+        """Send the messages to the LLM and act on its response.
+
+        Returns:
+            The messages to send with the next LLM request, or the given ones
+            if the step completed the task.
+        """
+        # Get LLM response
+        step.state = AgentState.THINKING
+
+        # Display thinking state
+        self._update_step_status(step)
+
+        # The provider SDKs block, so the call runs in a worker thread
+        # to keep other agents on the same event loop going
+        llm_start = time.perf_counter()
+        recorder_start = self._recorder_write_time()
+        retry_wait_start = self.llm_client.retry_wait_time
+        llm_response = await asyncio.to_thread(
+            self.llm_client.chat, messages, self.model_parameters, self.tools
+        )
+        step.timings.llm_time = (
+            time.perf_counter()
+            - llm_start
+            - (self._recorder_write_time() - recorder_start)
+        )
+        step.timings.retry_wait_time = (
+            self.llm_client.retry_wait_time - retry_wait_start
+        )
+        step.llm_response = llm_response
+
+        # Display step with LLM response
+        self._update_step_status(step)
+
+        # Update token usage
+        if llm_response.usage:
+            if execution.total_tokens:
+                execution.total_tokens += llm_response.usage
+            else:
+                execution.total_tokens = llm_response.usage
+
+        if self.llm_indicates_task_completed(llm_response):
+            if await self.is_task_completed(llm_response):
+                step.state = AgentState.COMPLETED
+                execution.final_result = llm_response.content
+                execution.success = True
+                return messages
+            step.state = AgentState.THINKING
+            return [LLMMessage(role="user", content=self.task_incomplete_message())]
+
+        # Check if the response contains a tool call
+        tool_calls = llm_response.tool_calls
+        if not tool_calls:
+            return [
+                LLMMessage(
+                    role="user",
+                    content="It seems that you have not completed the task.",
+                )
+            ]
+
+        # Execute tool call
+        step.state = AgentState.CALLING_TOOL
+        step.tool_calls = tool_calls
+
+        # Display tool calling state with tool calls
+        self._update_step_status(step)
+
+        if self.model_parameters.parallel_tool_calls:
+            tool_results = await self.tool_caller.parallel_tool_call(tool_calls)
+        else:
+            tool_results = await self.tool_caller.sequential_tool_call(tool_calls)
+        step.tool_results = tool_results
+        step.timings.tool_durations = {
+            tool_result.call_id: tool_result.duration
+            for tool_result in tool_results
+            if tool_result.duration is not None
+        }
+
+        if self.observation_dedup:
+            superseded = self.observation_dedup.observe(
+                step.step_number, tool_calls, tool_results
+            )
+            if superseded:
+                _ = self.llm_client.supersede_tool_results(superseded)
+
+        # Display tool results
+        self._update_step_status(step)
+
+        # Add tool results to conversation
+        messages = [
+            LLMMessage(role="user", tool_result=tool_result)
+            for tool_result in tool_results
+        ]
+
+        reflection = self.reflect_on_result(tool_results)
+        if reflection:
+            step.state = AgentState.REFLECTING
+            step.reflection = reflection
+
+            # Display reflection
+            self._update_step_status(step)
+
+            messages.append(LLMMessage(role="assistant", content=reflection))
+        return messages
+
     def reflect_on_result(self, tool_results: list[ToolResult]) -> str | None:
         """Reflect on tool execution result. Override for custom reflection logic."""
         if len(tool_results) == 0:
@@ -266,7 +396,7 @@ class Agent(ABC):
         response_lower = llm_response.content.lower()
         return any(indicator in response_lower for indicator in completion_indicators)
 
-    def is_task_completed(self, llm_response: LLMResponse) -> bool:  # pyright: ignore[reportUnusedParameter]
+    async def is_task_completed(self, llm_response: LLMResponse) -> bool:  # pyright: ignore[reportUnusedParameter]
         """Check if the task is completed based on the response. Override for custom logic."""
         return True
 
@@ -0,0 +1,123 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""SubAgent answers one focused question for a parent agent."""
+
+import copy
+from dataclasses import replace
+from typing import override
+
+import httpx
+
+from ..tools import tools_registry
+from ..tools.base import Tool, ToolExecutor
+from ..utils.config import Config
+from ..utils.llm_basics import LLMMessage, LLMResponse
+from .agent_basics import AgentError, AgentExecution
+from .base import Agent
+
+# task_done is always added to the tools of a sub-agent
+DefaultSubAgentToolNames = ["str_replace_based_edit_tool", "bash"]
+
+
+def sub_agent_config(config: Config) -> Config:
+    """A copy of the parent's configuration with the delegation limits and model."""
+    delegation = config.delegation_config
+    result = copy.copy(config)
+    result.max_steps = delegation.max_steps
+    result.enable_lakeview = False
+    if delegation.model_provider is not None:
+        result.default_provider = delegation.model_provider
+    if delegation.model_name is not None:
+        result.model_providers = {
+            **config.model_providers,
+            result.default_provider: replace(
+                config.model_providers[result.default_provider],
+                model=delegation.model_name,
+            ),
+        }
+    return result
+
+
+class SubAgent(Agent):
+    """Agent with its own small context and step limit, started by the delegate tool."""
+
+    def __init__(
+        self,
+        config: Config,
+        http_client: httpx.Client | None = None,
+        read_only: bool = True,
+    ):
+        self.project_path: str = ""
+        self.read_only: bool = read_only
+        super().__init__(sub_agent_config(config), http_client)
+
+    @override
+    def new_task(
+        self,
+        task: str,
+        extra_args: dict[str, str] | None = None,
+        tool_names: list[str] | None = None,
+        tools: list[Tool] | None = None,
+    ):
+        """Create a new task. `extra_args` must hold the `project_path`."""
+        if not extra_args or "project_path" not in extra_args:
+            raise AgentError("Project path is required")
+        self.task: str = task
+        self.project_path = extra_args["project_path"]
+
+        if tools is None:
+            provider = self.llm_client.provider.value
+            tools = [
+                tools_registry[tool_name](model_provider=provider)
+                for tool_name in [
+                    *(tool_names or DefaultSubAgentToolNames),
+                    "task_done",
+                ]
+            ]
+        self.tools: list[Tool] = tools
+        for tool in self.tools:
+            # The fork of a read-only sub-agent, not the parent's checkout
+            tool.set_cwd(self.project_path)
+        self.tool_caller: ToolExecutor = ToolExecutor(self.tools, self.tracer)
+
+        self.llm_client.set_chat_history([])
+        self.initial_messages: list[LLMMessage] = [
+            LLMMessage(role="system", content=self.get_system_prompt()),
+            LLMMessage(
+                role="user",
+                content=f"[Project root path]:\n{self.project_path}\n\n[Sub-task]:\n{task}\n",
+            ),
+        ]
+
+    def get_system_prompt(self) -> str:
+        """Get the system prompt for a sub-agent."""
+        if self.read_only:
+            mode = "You must not create, modify or delete any file: only read files and run commands that do not change the project. Any change you make is discarded when you finish."
+        else:
+            mode = "Only change files if the sub-task asks for it, and keep the changes minimal: other agents work in the same project at the same time."
+        return f"""You are a sub-agent working for a software engineering agent. It gave you one focused sub-task, such as finding where something is defined, validated or tested, and waits for your answer.
+
+Use the tools to explore the project at the `[Project root path]`, e.g. with `grep -rn`, `find` and by viewing files. Be quick: you have at most {self.max_steps} steps, so combine commands where you can.
+
+{mode}
+
+When you know the answer, call `task_done`, and put the answer in the text of that same message. The answer is all the other agent sees of your work, so make it concise and self-contained: the facts it asked for, with file paths and line numbers, and no narration of how you found them. If you could not find the answer, say so and say where you looked."""
+
+    @override
+    def llm_indicates_task_completed(self, llm_response: LLMResponse) -> bool:
+        """Check if the LLM called task_done."""
+        if llm_response.tool_calls is None:
+            return False
+        return any(
+            tool_call.name == "task_done" for tool_call in llm_response.tool_calls
+        )
+
+    def answer(self, execution: AgentExecution) -> str:
+        """The sub-agent's answer, or its last words if it did not finish."""
+        if execution.success and execution.final_result:
+            return execution.final_result
+        for step in reversed(execution.steps):
+            if step.llm_response and step.llm_response.content.strip():
+                return step.llm_response.content
+        return ""
@@ -4,13 +4,15 @@
 """TraeAgent for software engineering tasks."""
 
 import asyncio
-import os
-import subprocess
 from typing import override
 
-from ..tools import tools_registry
+import httpx
+
+from ..tools import DelegateTool, tools_registry
 from ..tools.base import Tool, ToolExecutor, ToolResult
+from ..utils.checkpoint import Checkpoint
 from ..utils.config import Config
+from ..utils.git_utils import git_diff, has_changes
 from ..utils.llm_basics import LLMMessage, LLMResponse
 from .agent_basics import AgentError, AgentExecution
 from .base import Agent
@@ -26,12 +28,16 @@ TraeAgentToolNames = [
 class TraeAgent(Agent):
     """Trae Agent specialized for software engineering tasks."""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, http_client: httpx.Client | None = None):
         self.project_path: str = ""
         self.base_commit: str | None = None
         self.must_patch: str = "false"
         self.patch_path: str | None = None
-        super().__init__(config)
+        self.enable_workspace_snapshots: bool = config.enable_workspace_snapshots
+        # Sub-agents of the delegate tool are built from the same settings
+        self.config: Config = config
+        self.http_client: httpx.Client | None = http_client
+        super().__init__(config, http_client)
 
     def setup_trajectory_recording(self, trajectory_path: str | None = None) -> str:
         """Set up trajectory recording for this agent.
@@ -64,26 +70,132 @@ class TraeAgent(Agent):
         task: str,
         extra_args: dict[str, str] | None = None,
         tool_names: list[str] | None = None,
+        tools: list[Tool] | None = None,
     ):
         """Create a new task."""
         self.task: str = task
 
-        if tool_names is None:
-            tool_names = TraeAgentToolNames
-
-        # Get the model provider from the LLM client
-        provider = self.llm_client.provider.value
-        self.tools: list[Tool] = [
-            tools_registry[tool_name](model_provider=provider)
-            for tool_name in tool_names
-        ]
-        self.tool_caller: ToolExecutor = ToolExecutor(self.tools)
-
+        if tools is None:
+            tools = self.create_tools(tool_names)
+        self.tools: list[Tool] = tools
+        self.tool_caller: ToolExecutor = ToolExecutor(self.tools, self.tracer)
+        if self.observation_dedup:
+            self.observation_dedup.reset()
+
+        # A new task starts a new conversation
+        self.llm_client.set_chat_history([])
+        self.first_step_number = 1
+        self.initial_total_tokens = None
         self.initial_messages: list[LLMMessage] = []
         self.initial_messages.append(
             LLMMessage(role="system", content=self.get_system_prompt())
         )
+        self.initial_messages.append(
+            LLMMessage(role="user", content=self._task_message(extra_args))
+        )
+        for tool in self.tools:
+            tool.set_cwd(self.project_path)
+        self._start_recording()
+        if self.checkpointer:
+            self.checkpointer.start(
+                task=task,
+                extra_args=extra_args or {},
+                provider=self.llm_client.provider.value,
+                model=self.model_parameters.model,
+                tool_names=[tool.name for tool in self.tools],
+                messages=self.initial_messages,
+            )
+
+    def resume_task(self, checkpoint: Checkpoint) -> None:
+        """Continue a checkpointed task from its last completed step.
+
+        The chat history, the step counter, the token usage and the state of
+        the tools, such as the bash working directory, are restored, and the
+        checkpointer, if set, appends to the same checkpoint.
+
+        Raises:
+            AgentError: If the checkpointed task already finished.
+        """
+        if checkpoint.finished:
+            raise AgentError("The checkpointed task already finished.")
+        self.task = checkpoint.task
+        self.tools = self.create_tools(checkpoint.tool_names or None)
+        _ = self._task_message(checkpoint.extra_args)
+        for tool in self.tools:
+            tool.set_cwd(self.project_path)
+            if tool.name in checkpoint.tool_states:
+                tool.restore_state(checkpoint.tool_states[tool.name])
+        self.tool_caller = ToolExecutor(self.tools, self.tracer)
+        if self.observation_dedup:
+            self.observation_dedup.reset()
+
+        self.llm_client.set_chat_history(checkpoint.history)
+        self.initial_messages = checkpoint.pending_messages
+        self.first_step_number = checkpoint.step_number + 1
+        self.initial_total_tokens = checkpoint.total_tokens
+        self._start_recording()
+        if self.checkpointer:
+            self.checkpointer.resume(checkpoint)
+
+    def follow_up_task(
+        self,
+        task: str,
+        extra_args: dict[str, str] | None,
+        previous: AgentExecution,
+        history: list[LLMMessage] | None = None,
+    ) -> None:
+        """Continue the conversation of the previous task with a new task.
+
+        The tools, and the bash session among them, are kept.
+
+        Args:
+            task: The new task
+            extra_args: The project path and issue, as for new_task
+            previous: The execution of the previous task
+            history: Compacted history to continue from instead of the full
+                conversation so far
+        """
+        self.task = task
+        self.first_step_number = 1
+        self.initial_total_tokens = None
+        if self.checkpointer:
+            # A checkpoint holds the conversation of one task
+            self.checkpointer.close()
+        if history is not None:
+            self.llm_client.set_chat_history(history)
+            if self.observation_dedup:
+                self.observation_dedup.reset()
+
+        self.initial_messages = []
+        last_step = previous.steps[-1] if previous.steps else None
+        if (
+            history is None
+            and last_step is not None
+            and last_step.llm_response is not None
+            and last_step.llm_response.tool_calls
+            and not last_step.tool_results
+        ):
+            # The calls that ended the previous task, e.g. task_done, were never run
+            self.initial_messages.extend(
+                LLMMessage(
+                    role="user",
+                    tool_result=ToolResult(
+                        call_id=tool_call.call_id,
+                        name=tool_call.name,
+                        success=True,
+                        result="The task is finished.",
+                        id=tool_call.id,
+                    ),
+                )
+                for tool_call in last_step.llm_response.tool_calls
+            )
+        self.initial_messages.append(
+            LLMMessage(role="user", content=self._task_message(extra_args))
+        )
+        self._start_recording()
 
+    def _task_message(self, extra_args: dict[str, str] | None) -> str:
+        """Build the user message of a task and set the task's attributes."""
         user_message = ""
         if not extra_args:
             raise AgentError("Project path and issue information are required.")
@@ -99,18 +211,38 @@ class TraeAgent(Agent):
         for attr in optional_attrs_to_set:
             if attr in extra_args:
                 setattr(self, attr, extra_args[attr])
+        return user_message
 
-        self.initial_messages.append(LLMMessage(role="user", content=user_message))
-
+    def _start_recording(self) -> None:
         # If trajectory recorder is set, start recording
         if self.trajectory_recorder:
             self.trajectory_recorder.start_recording(
-                task=task,
+                task=self.task,
                 provider=self.llm_client.provider.value,
                 model=self.model_parameters.model,
                 max_steps=self.max_steps,
             )
 
+    def create_tools(self, tool_names: list[str] | None = None) -> list[Tool]:
+        """Create fresh tool instances for the LLM provider of this agent."""
+        if tool_names is None:
+            tool_names = TraeAgentToolNames
+            if self.enable_workspace_snapshots:
+                tool_names = tool_names + ["workspace_snapshot"]
+            if self.config.enable_delegation:
+                tool_names = tool_names + ["delegate"]
+
+        # Get the model provider from the LLM client
+        provider = self.llm_client.provider.value
+        tools = [
+            tools_registry[tool_name](model_provider=provider)
+            for tool_name in tool_names
+        ]
+        for tool in tools:
+            if isinstance(tool, DelegateTool):
+                tool.configure(self.config, self.http_client)
+        return tools
+
     @override
     async def execute_task(self) -> AgentExecution:
         """Execute the task and finalize trajectory recording."""
@@ -128,8 +260,9 @@ class TraeAgent(Agent):
             )
 
         if self.patch_path is not None:
+            patch = await self.get_git_diff()
             with open(self.patch_path, "w") as patch_f:
-                patch_f.write(self.get_git_diff())
+                patch_f.write(patch)
 
         return execution
 
@@ -187,53 +320,9 @@ If you are sure the issue has been solved, you should call the `task_done` to fi
     def reflect_on_result(self, tool_results: list[ToolResult]) -> str | None:
         return None
 
-    def get_git_diff(self) -> str:
+    async def get_git_diff(self, exclude_tests: bool = False) -> str:
         """Get the git diff of the project."""
-        pwd = os.getcwd()
-        if not os.path.isdir(self.project_path):
-            return ""
-        os.chdir(self.project_path)
-        try:
-            if not self.base_commit:
-                stdout = subprocess.check_output(["git", "--no-pager", "diff"]).decode()
-            else:
-                stdout = subprocess.check_output(
-                    ["git", "--no-pager", "diff", self.base_commit, "HEAD"]
-                ).decode()
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            stdout = ""
-        finally:
-            os.chdir(pwd)
-        return stdout
-
-    # Copyright (c) 2024 paul-gauthier
-    # SPDX-License-Identifier: Apache-2.0
-    # Original remove_patches_to_tests function was released under Apache-2.0 License, with the full license text
-    # available at https://github.com/Aider-AI/aider-swe-bench/blob/6e98cd6c3b2cbcba12976d6ae1b07f847480cb74/LICENSE.txt
-    # Original function is at https://github.com/Aider-AI/aider-swe-bench/blob/6e98cd6c3b2cbcba12976d6ae1b07f847480cb74/tests.py#L45
-
-    def remove_patches_to_tests(self, model_patch: str) -> str:
-        """
-        Remove any changes to the tests directory from the provided patch.
-        This is to ensure that the model_patch does not disturb the repo's
-        tests when doing acceptance testing with the `test_patch`.
-        """
-        lines = model_patch.splitlines(keepends=True)
-        filtered_lines: list[str] = []
-        test_patterns = ["/test/", "/tests/", "/testing/", "test_", "tox.ini"]
-        is_tests = False
-
-        for line in lines:
-            if line.startswith("diff --git a/"):
-                target_path = line.split()[-1]
-                is_tests = target_path.startswith("b/") and any(
-                    p in target_path for p in test_patterns
-                )
-
-            if not is_tests:
-                filtered_lines.append(line)
-
-        return "".join(filtered_lines)
+        return await git_diff(self.project_path, self.base_commit, exclude_tests)
 
     @override
     def llm_indicates_task_completed(self, llm_response: LLMResponse) -> bool:
@@ -245,13 +334,13 @@ If you are sure the issue has been solved, you should call the `task_done` to fi
         )
 
     @override
-    def is_task_completed(self, llm_response: LLMResponse) -> bool:
+    async def is_task_completed(self, llm_response: LLMResponse) -> bool:
         """Enhanced task completion detection."""
         if self.must_patch == "true":
-            model_patch = self.get_git_diff()
-            patch = self.remove_patches_to_tests(model_patch)
-            if not patch.strip():
-                return False
+            # Only changes outside the tests count as a patch
+            return await has_changes(
+                self.project_path, self.base_commit, exclude_tests=True
+            )
 
         return True
 
@@ -3,28 +3,37 @@
 
 """Command Line Interface for Polli Agent."""
 
-import asyncio
+import json
 import os
 import sys
 import traceback
+from collections.abc import Callable
+from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
-from dotenv import load_dotenv
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
 
-from trae_agent.utils.cli_console import CLIConsole
-
-from .agent import TraeAgent
-from .utils.api_key_manager import ensure_api_key_available, update_config_with_api_key
-from .utils.config import Config, resolve_config_value
+from .utils.config import (
+    Config,
+    LakeviewConfig,
+    LLMCacheConfig,
+    TracingConfig,
+    resolve_config_value,
+)
+from .utils.deferred_console import DeferredConsole
 
-# Load environment variables
-_ = load_dotenv()
+if TYPE_CHECKING:
+    from .agent import TraeAgent
+    from .utils.batch_runner import BatchResult
+    from .utils.best_of_n import AttemptResult
+    from .utils.jsonl_output import JSONLEventWriter
+    from .utils.mock_server import MockLLMServer
+    from .utils.step_profiler import StepProfiler
 
-console = Console()
+# The agent, the provider SDKs and rich are imported by the commands that use
+# them, which keeps `polli --help`, `polli tools` and `polli show-config` fast.
+console = DeferredConsole()
 
 
 def load_config(
@@ -91,7 +100,7 @@ def load_config(
     return config
 
 
-def create_agent(config: Config) -> TraeAgent:
+def create_agent(config: Config) -> "TraeAgent":
     """
     create_agent creates a Polli Agent with the specified configuration.
     Args:
@@ -99,6 +108,8 @@ def create_agent(config: Config) -> TraeAgent:
     Return:
         TraeAgent object
     """
+    from .agent import TraeAgent
+
     try:
         # Create agent
         agent = TraeAgent(config)
@@ -110,6 +121,143 @@ def create_agent(config: Config) -> TraeAgent:
         sys.exit(1)
 
 
+def print_profile_summary(step_profiler: "StepProfiler") -> None:
+    """Write the merged profile and show the steps with slow non-LLM work."""
+    summary_path = step_profiler.finish()
+    if summary_path is None:
+        return
+    console.print(f"[blue]Step profiles saved to: {step_profiler.output_dir}[/blue]")
+    for step in step_profiler.steps:
+        if step.flagged:
+            console.print(
+                f"[yellow]Step {step.step_number}: {step.non_llm_time:.2f}s outside the LLM "
+                f"(tools {step.tool_time:.2f}s), see {step.profile_file}[/yellow]"
+            )
+
+
+def run_best_of_n(
+    config: Config,
+    config_file: str,
+    task: str,
+    working_dir: str,
+    attempts: int,
+    must_patch: bool,
+    patch_path: str | None,
+    trajectory_file: str | None,
+    verify_command: str | None,
+    verify_timeout: float,
+    attempt_temperatures: str | None,
+    attempt_providers: str | None,
+) -> None:
+    """Run parallel attempts at a task and write the winning patch."""
+    import asyncio
+
+    from .utils.api_key_manager import ensure_api_key_available
+    from .utils.best_of_n import attempt_specs, run_attempts
+    from .utils.git_utils import GitError
+
+    providers = (
+        [entry.strip() for entry in attempt_providers.split(",") if entry.strip()]
+        if attempt_providers
+        else None
+    )
+    try:
+        temperatures = (
+            [float(value) for value in attempt_temperatures.split(",")]
+            if attempt_temperatures
+            else None
+        )
+        # Resolve the API key of each extra provider like the default one's
+        for provider_name in {entry.partition(":")[0] for entry in providers or []}:
+            if provider_name == config.default_provider:
+                continue
+            provider_config = load_config(
+                provider_name, None, None, config_file, config.max_steps
+            )
+            parameters = provider_config.model_providers[provider_name]
+            parameters.api_key = (
+                ensure_api_key_available(
+                    provider_name, parameters.model, parameters.api_key
+                )
+                or parameters.api_key
+            )
+            config.model_providers[provider_name] = parameters
+        specs = attempt_specs(config, attempts, temperatures, providers)
+    except (KeyError, ValueError) as e:
+        console.print(f"[red]Invalid attempt settings: {e}[/red]")
+        sys.exit(1)
+
+    trajectory_dir = (
+        Path(trajectory_file).with_suffix("")
+        if trajectory_file
+        else Path(f"trajectories/attempts_{datetime.now():%Y%m%d_%H%M%S}")
+    )
+    console.print(
+        f"[blue]Running {attempts} attempts in parallel in {working_dir}[/blue]"
+    )
+    for index, spec in enumerate(specs):
+        console.print(
+            f"[blue]  attempt-{index}: {spec.provider}/{spec.model}, temperature {spec.temperature}[/blue]"
+        )
+
+    def report(result: "AttemptResult") -> None:
+        if result.accepted:
+            status = "[green]✅"
+        elif result.success:
+            status = "[yellow]⚠️"
+        else:
+            status = "[red]❌"
+        verified = {True: ", verified", False: ", failed verification"}.get(
+            result.verified, ""
+        )
+        console.print(
+            f"{status} attempt-{result.attempt}: {result.steps} steps in {result.execution_time:.1f}s{verified}[/]"
+            + (f" ({result.error})" if result.error else "")
+        )
+
+    try:
+        best = asyncio.run(
+            run_attempts(
+                config,
+                task,
+                working_dir,
+                specs,
+                trajectory_dir,
+                verify_command,
+                verify_timeout,
+                must_patch,
+                report,
+            )
+        )
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Task execution interrupted by user[/yellow]")
+        sys.exit(1)
+    except GitError as e:
+        console.print(f"[red]Cannot run attempts: {e.message}[/red]")
+        sys.exit(1)
+
+    cancelled = sum(1 for result in best.attempts if result.cancelled)
+    if cancelled:
+        console.print(f"[blue]Cancelled {cancelled} attempts still running[/blue]")
+    console.print(f"[green]Trajectories and patches saved to: {trajectory_dir}[/green]")
+    winner = best.winner
+    if winner is None:
+        console.print("[red]No attempt produced a patch[/red]")
+        sys.exit(1)
+    if winner.verified is False:
+        console.print(
+            f"[yellow]No patch passed verification; keeping attempt-{winner.attempt}'s unverified patch[/yellow]"
+        )
+    else:
+        console.print(f"[green]attempt-{winner.attempt} wins[/green]")
+    if patch_path:
+        with open(patch_path, "w", encoding="utf-8") as f:
+            _ = f.write(winner.patch)
+        console.print(f"[green]Patch saved to: {patch_path}[/green]")
+    else:
+        console.print(f"[green]Patch saved to: {winner.patch_file}[/green]")
+
+
 # Display functions moved to agent/base.py for real-time progress display
 
 
@@ -117,7 +265,10 @@ def create_agent(config: Config) -> TraeAgent:
 @click.version_option(version="0.1.0")
 def cli():
     """Polli Agent 🌸 - AI-powered coding assistant with Pollinations models."""
-    pass
+    from dotenv import load_dotenv
+
+    # Load environment variables
+    _ = load_dotenv()
 
 
 @cli.command()
@@ -133,6 +284,68 @@ def cli():
 )
 @click.option("--trajectory-file", "-t", help="Path to save trajectory file")
 @click.option("--patch-path", "-pp", help="Path to patch file")
+@click.option("--llm-cache", help="Path to an LLM response cache file to reuse")
+@click.option(
+    "--llm-cache-read-only",
+    is_flag=True,
+    help="Only replay responses from the LLM cache and never call the provider",
+)
+@click.option("--trace-file", help="Append trace spans to this JSON lines file")
+@click.option("--otlp-endpoint", help="Export trace spans to this OTLP/HTTP endpoint")
+@click.option("--metrics-file", help="Write Prometheus metrics to this textfile")
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Write per-step CPU and allocation profiles next to the trajectory",
+)
+@click.option(
+    "--profile-threshold",
+    type=float,
+    default=1.0,
+    show_default=True,
+    help="Flag profiled steps whose non-LLM time exceeds this many seconds",
+)
+@click.option(
+    "--output",
+    type=click.Choice(["rich", "jsonl"]),
+    default="rich",
+    show_default=True,
+    help="Progress display: the rich console, or one JSON event per line",
+)
+@click.option(
+    "--output-socket",
+    help="Send the JSON lines to this Unix socket path or host:port instead of stdout",
+)
+@click.option(
+    "--checkpoint",
+    help="Checkpoint every completed step to this file, for `polli resume`",
+)
+@click.option(
+    "--attempts",
+    type=int,
+    default=1,
+    show_default=True,
+    help="Run this many attempts in parallel, each in its own git worktree, and keep the best patch",
+)
+@click.option(
+    "--verify-command",
+    help="Shell command that must pass in an attempt's worktree for its patch to be accepted",
+)
+@click.option(
+    "--verify-timeout",
+    type=float,
+    default=600.0,
+    show_default=True,
+    help="Seconds before the verification command is killed",
+)
+@click.option(
+    "--attempt-temperatures",
+    help="Comma-separated temperatures for the attempts, used round-robin",
+)
+@click.option(
+    "--attempt-providers",
+    help="Comma-separated provider or provider:model entries for the attempts, used round-robin",
+)
 def run(
     task: str,
     patch_path: str,
@@ -144,6 +357,21 @@ def run(
     must_patch: bool = False,
     config_file: str = "trae_config.json",
     trajectory_file: str | None = None,
+    llm_cache: str | None = None,
+    llm_cache_read_only: bool = False,
+    trace_file: str | None = None,
+    otlp_endpoint: str | None = None,
+    metrics_file: str | None = None,
+    profile: bool = False,
+    profile_threshold: float = 1.0,
+    output: str = "rich",
+    output_socket: str | None = None,
+    checkpoint: str | None = None,
+    attempts: int = 1,
+    verify_command: str | None = None,
+    verify_timeout: float = 600.0,
+    attempt_temperatures: str | None = None,
+    attempt_providers: str | None = None,
 ):
     """
     Run is the main function of Polli. It runs a task using Polli Agent.
@@ -155,6 +383,40 @@ def run(
     Return:
         None (it is expected to be ended after calling the run function)
     """
+    import asyncio
+
+    from .utils.api_key_manager import ensure_api_key_available
+    from .utils.checkpoint import StepCheckpointer
+    from .utils.cli_console import CLIConsole
+    from .utils.metrics import REGISTRY
+    from .utils.step_profiler import StepProfiler
+
+    if attempts < 1:
+        console.print("[red]--attempts must be at least 1[/red]")
+        sys.exit(1)
+    if attempts > 1 and (output == "jsonl" or checkpoint or profile):
+        console.print(
+            "[red]--attempts cannot be combined with --output jsonl, --checkpoint or --profile[/red]"
+        )
+        sys.exit(1)
+
+    # Machine-readable progress replaces the rich console entirely
+    events: "JSONLEventWriter | None" = None
+    if output == "jsonl":
+        from .utils.jsonl_output import JSONLEventWriter
+
+        try:
+            events = (
+                JSONLEventWriter.connect(output_socket)
+                if output_socket
+                else JSONLEventWriter.to_stdout()
+            )
+        except OSError as e:
+            console.print(f"[red]Error connecting to {output_socket}: {e}[/red]")
+            sys.exit(1)
+    elif output_socket:
+        console.print("[red]--output-socket requires --output jsonl[/red]")
+        sys.exit(1)
 
     # Change working directory if specified
     if not working_dir:
@@ -171,6 +433,17 @@ def run(
         task = task_path.read_text()
 
     config = load_config(provider, model, api_key, config_file, max_steps)
+    if llm_cache:
+        config.llm_cache_config = LLMCacheConfig(path=llm_cache)
+    if llm_cache_read_only:
+        if config.llm_cache_config is None:
+            console.print("[red]--llm-cache-read-only requires an LLM cache[/red]")
+            sys.exit(1)
+        config.llm_cache_config.read_only = True
+    if otlp_endpoint:
+        config.tracing_config = TracingConfig(exporter="otlp", endpoint=otlp_endpoint)
+    elif trace_file:
+        config.tracing_config = TracingConfig(exporter="file", path=trace_file)
 
     # Check if API key is needed and prompt if necessary
     current_provider = config.default_provider
@@ -184,6 +457,25 @@ def run(
         # Update config with the API key
         config.model_providers[current_provider].api_key = required_api_key
 
+    if attempts > 1:
+        run_best_of_n(
+            config,
+            config_file,
+            task,
+            working_dir,
+            attempts,
+            must_patch,
+            patch_path,
+            trajectory_file,
+            verify_command,
+            verify_timeout,
+            attempt_temperatures,
+            attempt_providers,
+        )
+        if metrics_file:
+            REGISTRY.write_textfile(metrics_file)
+        return
+
     # Create agent
     agent: TraeAgent = create_agent(config)
 
@@ -194,19 +486,44 @@ def run(
     else:
         trajectory_path = agent.setup_trajectory_recording()
 
-    # Create CLI Console
-    cli_console = CLIConsole(config)
-    cli_console.print_task_details(
-        task,
-        working_dir,
-        config.default_provider,
-        config.model_providers[config.default_provider].model,
-        config.max_steps,
-        config_file,
-        trajectory_path,
-    )
+    if events is not None:
+        agent.add_step_listener(events.on_step)
+        events.emit(
+            {
+                "event": "started",
+                "task": task,
+                "working_dir": working_dir,
+                "provider": config.default_provider,
+                "model": config.model_providers[config.default_provider].model,
+                "max_steps": config.max_steps,
+                "trajectory_file": trajectory_path,
+            }
+        )
+    else:
+        # Create CLI Console
+        cli_console = CLIConsole(config)
+        cli_console.print_task_details(
+            task,
+            working_dir,
+            config.default_provider,
+            config.model_providers[config.default_provider].model,
+            config.max_steps,
+            config_file,
+            trajectory_path,
+        )
 
-    agent.set_cli_console(cli_console)
+        agent.set_cli_console(cli_console)
+
+    step_profiler = None
+    if profile:
+        trajectory = Path(trajectory_path)
+        step_profiler = StepProfiler(
+            trajectory.with_name(f"{trajectory.stem}_profile"), profile_threshold
+        )
+        agent.set_step_profiler(step_profiler)
+
+    checkpointer = StepCheckpointer(checkpoint) if checkpoint else None
+    agent.set_checkpointer(checkpointer)
 
     try:
         task_args = {
@@ -216,7 +533,9 @@ def run(
             "patch_path": patch_path,
         }
         agent.new_task(task, task_args)
-        _ = asyncio.run(agent.execute_task())
+        execution = asyncio.run(agent.execute_task())
+        if events is not None:
+            events.emit_execution(execution)
 
         console.print(f"\n[green]Trajectory saved to: {trajectory_path}[/green]")
 
@@ -233,6 +552,95 @@ def run(
         if trajectory_path:
             console.print(f"[blue]Trajectory saved to: {trajectory_path}[/blue]")
         sys.exit(1)
+    finally:
+        if metrics_file:
+            REGISTRY.write_textfile(metrics_file)
+        if step_profiler:
+            print_profile_summary(step_profiler)
+        if events is not None:
+            events.close()
+        if checkpointer:
+            checkpointer.close()
+
+
+@cli.command()
+@click.argument("checkpoint", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--provider", "-p", help="LLM provider (defaults to the checkpointed one)"
+)
+@click.option("--model", "-m", help="Model (defaults to the checkpointed one)")
+@click.option("--api-key", "-k", help="API key (or set via environment variable)")
+@click.option("--max-steps", help="Maximum number of execution steps", type=int)
+@click.option(
+    "--config-file", help="Path to configuration file", default="trae_config.json"
+)
+@click.option("--trajectory-file", "-t", help="Path to save trajectory file")
+def resume(
+    checkpoint: str,
+    provider: str | None = None,
+    model: str | None = None,
+    api_key: str | None = None,
+    max_steps: int | None = None,
+    config_file: str = "trae_config.json",
+    trajectory_file: str | None = None,
+):
+    """
+    Resume a run from the last completed step of its checkpoint.
+    The checkpoint is the file given to `polli run --checkpoint`; the resumed
+    steps are appended to it, so a run can be resumed more than once.
+    """
+    import asyncio
+
+    from .utils.checkpoint import StepCheckpointer, load_checkpoint
+    from .utils.cli_console import CLIConsole
+
+    try:
+        saved = load_checkpoint(checkpoint)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    if saved.finished:
+        console.print(f"[yellow]The task of {checkpoint} already finished[/yellow]")
+        return
+
+    config = load_config(
+        provider or saved.provider or None,
+        model or saved.model or None,
+        api_key,
+        config_file,
+        max_steps,
+    )
+    agent = create_agent(config)
+    trajectory_path = agent.setup_trajectory_recording(trajectory_file)
+    checkpointer = StepCheckpointer(checkpoint)
+    agent.set_checkpointer(checkpointer)
+
+    project_path = saved.extra_args.get("project_path", "")
+    if os.path.isdir(project_path):
+        os.chdir(project_path)
+    cli_console = CLIConsole(config)
+    cli_console.print_task_details(
+        saved.task,
+        project_path,
+        config.default_provider,
+        config.model_providers[config.default_provider].model,
+        config.max_steps,
+        config_file,
+        trajectory_path,
+    )
+    agent.set_cli_console(cli_console)
+
+    console.print(f"[blue]Resuming {checkpoint} after step {saved.step_number}[/blue]")
+    try:
+        agent.resume_task(saved)
+        _ = asyncio.run(agent.execute_task())
+        console.print(f"\n[green]Trajectory saved to: {trajectory_path}[/green]")
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Task execution interrupted by user[/yellow]")
+        console.print(f"[blue]Resume again with: polli resume {checkpoint}[/blue]")
+        sys.exit(1)
+    finally:
+        checkpointer.close()
 
 
 @cli.command()
@@ -246,6 +654,19 @@ def run(
     "--max-steps", help="Maximum number of execution steps", type=int, default=20
 )
 @click.option("--trajectory-file", "-t", help="Path to save trajectory file")
+@click.option(
+    "--continue",
+    "continue_history",
+    is_flag=True,
+    help="Let each task continue the conversation of the previous ones",
+)
+@click.option(
+    "--max-history-tokens",
+    type=int,
+    default=60000,
+    show_default=True,
+    help="Compact the earlier tasks of a continued conversation beyond this context size",
+)
 def interactive(
     provider: str | None = None,
     model: str | None = None,
@@ -253,12 +674,19 @@ def interactive(
     config_file: str = "trae_config.json",
     max_steps: int | None = None,
     trajectory_file: str | None = None,
+    continue_history: bool = False,
+    max_history_tokens: int = 60000,
 ):
     """
     This function starts an interactive session with Polli Agent.
     Args:
         tasks: the task that you want your agent to solve. This is required to be in the input
     """
+    from rich.panel import Panel
+
+    from .utils.api_key_manager import ensure_api_key_available
+    from .utils.interactive_session import InteractiveSession
+
     config = load_config(
         provider, model, api_key, config_file=config_file, max_steps=max_steps
     )
@@ -281,7 +709,8 @@ def interactive(
     [bold]Provider:[/bold] {config.default_provider}
     [bold]Model:[/bold] {config.model_providers[config.default_provider].model}
     [bold]Max Steps:[/bold] {config.max_steps}
-    [bold]Config File:[/bold] {config_file}""",
+    [bold]Config File:[/bold] {config_file}
+    [bold]Continue Conversation:[/bold] {"Yes" if continue_history else "No"}""",
             title="Interactive Mode",
             border_style="green",
         )
@@ -289,6 +718,8 @@ def interactive(
 
     # Create agent
     agent = create_agent(config)
+    # One event loop, and one set of tools with its bash session, for all tasks
+    session = InteractiveSession(agent, continue_history, max_history_tokens)
 
     while True:
         try:
@@ -307,6 +738,7 @@ def interactive(
 • Type any task description to execute it
 • 'status' - Show agent status
 • 'clear' - Clear the screen
+• 'new' - Start a new conversation (with --continue)
 • 'exit' or 'quit' - End the session""",
                         title="Help",
                         border_style="yellow",
@@ -335,6 +767,11 @@ def interactive(
                 console.clear()
                 continue
 
+            if task.lower() == "new":
+                session.new_conversation()
+                console.print("[green]The next task starts a new conversation[/green]")
+                continue
+
             # Set up trajectory recording for this task
             trajectory_path = agent.setup_trajectory_recording(trajectory_file)
 
@@ -342,18 +779,9 @@ def interactive(
                 f"[blue]Trajectory will be saved to: {trajectory_path}[/blue]"
             )
 
-            task_args = {
-                "project_path": working_dir,
-                "issue": task,
-                "must_patch": "false",
-            }
-
             # Execute the task
             console.print(f"\n[blue]Executing task: {task}[/blue]")
-            agent.new_task(task, task_args)
-
-            # Configure agent for progress display
-            _ = asyncio.run(agent.execute_task())
+            _ = session.run_task(task, working_dir)
 
             console.print(f"\n[green]Trajectory saved to: {trajectory_path}[/green]")
 
@@ -365,6 +793,640 @@ def interactive(
         except Exception as e:
             console.print(f"[red]Error: {e}[/red]")
 
+    session.close()
+
+
+@cli.command()
+@click.argument("tasks_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--concurrency", "-c", type=int, default=4, help="Tasks running at the same time"
+)
+@click.option(
+    "--output", "-o", default="batch_results.jsonl", help="Path of the results JSONL"
+)
+@click.option("--trajectory-dir", help="Directory for the per-task trajectory files")
+@click.option("--provider", "-p", help="LLM provider to use")
+@click.option("--model", "-m", help="Specific model to use")
+@click.option("--api-key", "-k", help="API key (or set via environment variable)")
+@click.option("--max-steps", help="Maximum number of execution steps", type=int)
+@click.option(
+    "--config-file", help="Path to configuration file", default="trae_config.json"
+)
+@click.option("--metrics-port", type=int, help="Serve Prometheus metrics on this port")
+@click.option("--metrics-file", help="Write Prometheus metrics to this textfile")
+def batch(
+    tasks_file: str,
+    concurrency: int,
+    output: str,
+    trajectory_dir: str | None = None,
+    provider: str | None = None,
+    model: str | None = None,
+    api_key: str | None = None,
+    max_steps: int | None = None,
+    config_file: str = "trae_config.json",
+    metrics_port: int | None = None,
+    metrics_file: str | None = None,
+):
+    """
+    Run many tasks concurrently in one process.
+    TASKS_FILE is a JSONL file with one {"id", "task", "working_dir"} object per line.
+    """
+    import asyncio
+
+    from .utils.api_key_manager import ensure_api_key_available
+    from .utils.batch_runner import load_batch_tasks, run_batch
+    from .utils.metrics import REGISTRY, start_metrics_server
+
+    try:
+        tasks = load_batch_tasks(tasks_file)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error loading tasks: {e}[/red]")
+        sys.exit(1)
+    if concurrency < 1:
+        console.print("[red]--concurrency must be at least 1[/red]")
+        sys.exit(1)
+
+    config = load_config(provider, model, api_key, config_file, max_steps)
+    config.enable_lakeview = False
+    current_provider = config.default_provider
+    current_model = config.model_providers[current_provider].model
+    current_api_key = config.model_providers[current_provider].api_key
+    required_api_key = ensure_api_key_available(
+        current_provider, current_model, current_api_key
+    )
+    if required_api_key and required_api_key != current_api_key:
+        config.model_providers[current_provider].api_key = required_api_key
+
+    if trajectory_dir is None:
+        trajectory_dir = f"trajectories/batch_{datetime.now():%Y%m%d_%H%M%S}"
+
+    console.print(
+        f"[blue]Running {len(tasks)} tasks, {concurrency} at a time, with {current_provider}/{current_model}[/blue]"
+    )
+    if metrics_port is not None:
+        _ = start_metrics_server(metrics_port)
+        console.print(
+            f"[blue]Serving metrics on http://127.0.0.1:{metrics_port}/metrics[/blue]"
+        )
+
+    def report(result: "BatchResult") -> None:
+        status = "[green]✅" if result.success else "[red]❌"
+        console.print(
+            f"{status} {result.task_id}: {result.steps} steps in {result.execution_time:.1f}s[/]"
+            + (f" ({result.error})" if result.error else "")
+        )
+        if metrics_file:
+            REGISTRY.write_textfile(metrics_file)
+
+    results = asyncio.run(
+        run_batch(config, tasks, concurrency, output, trajectory_dir, report)
+    )
+    succeeded = sum(1 for result in results if result.success)
+    console.print(
+        f"\n[green]{succeeded}/{len(results)} tasks succeeded. Results saved to: {output}[/green]"
+    )
+    console.print(f"[green]Trajectories saved to: {trajectory_dir}[/green]")
+
+
+@cli.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    default=str(Path.home() / ".polli" / "serve.sock"),
+    show_default=True,
+    help="Unix socket to listen on, accessible only to the current user",
+)
+@click.option(
+    "--tcp",
+    is_flag=True,
+    help="Listen on --host and --port over TCP instead, with a bearer token",
+)
+@click.option("--host", default="127.0.0.1", help="Host to listen on with --tcp")
+@click.option("--port", type=int, default=8766, help="Port to listen on with --tcp")
+@click.option(
+    "--token-file",
+    default=str(Path.home() / ".polli" / "serve.token"),
+    show_default=True,
+    help="File the bearer token for --tcp is written to, readable only by the current user",
+)
+@click.option(
+    "--concurrency", "-c", type=int, default=4, help="Tasks running at the same time"
+)
+@click.option(
+    "--trajectory-dir",
+    default="trajectories/serve",
+    help="Directory for the per-task trajectory files",
+)
+@click.option("--provider", "-p", help="LLM provider to use")
+@click.option("--model", "-m", help="Specific model to use")
+@click.option("--api-key", "-k", help="API key (or set via environment variable)")
+@click.option("--max-steps", help="Maximum number of execution steps", type=int)
+@click.option(
+    "--config-file", help="Path to configuration file", default="trae_config.json"
+)
+def serve(
+    socket_path: str,
+    tcp: bool,
+    host: str,
+    port: int,
+    token_file: str,
+    concurrency: int,
+    trajectory_dir: str,
+    provider: str | None = None,
+    model: str | None = None,
+    api_key: str | None = None,
+    max_steps: int | None = None,
+    config_file: str = "trae_config.json",
+):
+    """
+    Run a long-lived agent service that accepts tasks over a local JSON API.
+    Agents, LLM clients, connections and bash sessions are kept warm between tasks.
+    """
+    import asyncio
+
+    from .utils.agent_daemon import AgentDaemon, generate_token, write_token_file
+    from .utils.api_key_manager import ensure_api_key_available
+
+    if concurrency < 1:
+        console.print("[red]--concurrency must be at least 1[/red]")
+        sys.exit(1)
+
+    config = load_config(provider, model, api_key, config_file, max_steps)
+    config.enable_lakeview = False
+    current_provider = config.default_provider
+    current_model = config.model_providers[current_provider].model
+    current_api_key = config.model_providers[current_provider].api_key
+    required_api_key = ensure_api_key_available(
+        current_provider, current_model, current_api_key
+    )
+    if required_api_key and required_api_key != current_api_key:
+        config.model_providers[current_provider].api_key = required_api_key
+
+    token = None
+    if tcp:
+        token = generate_token()
+        try:
+            write_token_file(token_file, token)
+        except OSError as e:
+            console.print(f"[red]Error writing the token file: {e}[/red]")
+            sys.exit(1)
+    else:
+        Path(socket_path).parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    daemon = AgentDaemon(config, concurrency, trajectory_dir, token=token)
+    address = f"http://{host}:{port}" if tcp else f"unix:{socket_path}"
+
+    def ready(_: asyncio.Server) -> None:
+        console.print(
+            f"[green]Serving {current_provider}/{current_model} on {address} ({concurrency} tasks at a time)[/green]"
+        )
+        if token:
+            console.print(
+                f"[blue]Bearer token (also in {token_file}): {token}[/blue]"
+            )
+
+    try:
+        asyncio.run(
+            daemon.serve(host, port, None if tcp else socket_path, on_ready=ready)
+        )
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Agent service stopped[/yellow]")
+    except OSError as e:
+        console.print(f"[red]Error starting agent service: {e}[/red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument("trajectory", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--working-dir",
+    "-w",
+    help="Checkout to run the recorded tool calls in (defaults to the recorded project path)",
+)
+@click.option("--trajectory-file", "-t", help="Path to save the replayed trajectory")
+@click.option("--timings-file", help="Path to write per-step timings as JSON")
+@click.option(
+    "--console", "show_console", is_flag=True, help="Render the live progress console"
+)
+def replay(
+    trajectory: str,
+    working_dir: str | None = None,
+    trajectory_file: str | None = None,
+    timings_file: str | None = None,
+    show_console: bool = False,
+):
+    """
+    Replay a recorded trajectory without any network access.
+    The recorded LLM responses are fed back in order and their tool calls are executed
+    against the working directory, so the agent's own overhead can be measured.
+    """
+    import asyncio
+
+    from rich.table import Table
+
+    from .utils.cli_console import CLIConsole
+    from .utils.replay_client import (
+        ReplayClient,
+        load_trajectory,
+        recorded_project_path,
+    )
+
+    recorded = load_trajectory(trajectory)
+    recorded_path = recorded_project_path(recorded)
+    project_path = os.path.abspath(working_dir or recorded_path or os.getcwd())
+    interactions = recorded.get("llm_interactions", [])
+
+    config = Config(
+        {
+            "default_provider": "replay",
+            "max_steps": max(int(recorded.get("max_steps") or 0), len(interactions)),
+            "enable_lakeview": False,
+            "model_providers": {
+                "replay": {
+                    "model": recorded.get("model") or "replay",
+                    "base_url": trajectory,
+                }
+            },
+        }
+    )
+    agent = create_agent(config)
+    if (
+        isinstance(agent.llm_client.client, ReplayClient)
+        and recorded_path
+        and os.path.abspath(recorded_path) != project_path
+    ):
+        agent.llm_client.client.path_remap = (recorded_path, project_path)
+
+    trajectory_path = agent.setup_trajectory_recording(trajectory_file)
+    if show_console:
+        agent.set_cli_console(CLIConsole(config))
+
+    console.print(
+        f"[blue]Replaying {len(interactions)} LLM responses from {trajectory} in {project_path}[/blue]"
+    )
+    agent.new_task(
+        recorded.get("task", ""),
+        {"project_path": project_path, "issue": recorded.get("task", "")},
+    )
+    execution = asyncio.run(agent.execute_task())
+
+    recorded_durations = ReplayClient.step_durations(recorded)
+    replayed = load_trajectory(trajectory_path)
+    replayed_steps = replayed.get("agent_steps", [])
+    replayed_durations = ReplayClient.step_durations(replayed)
+
+    timings_table = Table(title="Replay Step Timings")
+    timings_table.add_column("Step", style="cyan")
+    timings_table.add_column("State", style="green")
+    timings_table.add_column("Recorded (s)", justify="right")
+    timings_table.add_column("Replay (s)", justify="right")
+    step_timings: list[dict[str, object]] = []
+    for step in replayed_steps:
+        step_number = step["step_number"]
+        recorded_seconds = recorded_durations.get(step_number)
+        replay_seconds = replayed_durations.get(step_number)
+        step_timings.append(
+            {
+                "step_number": step_number,
+                "state": step["state"],
+                "recorded_seconds": recorded_seconds,
+                "replay_seconds": replay_seconds,
+            }
+        )
+        timings_table.add_row(
+            str(step_number),
+            step["state"],
+            f"{recorded_seconds:.3f}" if recorded_seconds is not None else "-",
+            f"{replay_seconds:.3f}" if replay_seconds is not None else "-",
+        )
+    timings_table.add_row(
+        "Total",
+        "✅" if execution.success else "❌",
+        f"{sum(recorded_durations.values()):.3f}",
+        f"{sum(replayed_durations.values()):.3f}",
+    )
+    console.print(timings_table)
+
+    if timings_file:
+        Path(timings_file).write_text(
+            json.dumps(
+                {
+                    "trajectory": trajectory,
+                    "replay_trajectory": trajectory_path,
+                    "success": execution.success,
+                    "execution_time": execution.execution_time,
+                    "steps": step_timings,
+                },
+                indent=2,
+            )
+        )
+        console.print(f"[green]Timings saved to: {timings_file}[/green]")
+
+    console.print(f"[green]Replay trajectory saved to: {trajectory_path}[/green]")
+
+
+@cli.command()
+@click.argument(
+    "trajectories",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--concurrency", "-c", type=int, default=4, help="Steps summarized at the same time"
+)
+@click.option("--provider", "-p", help="LLM provider of the Lakeview model")
+@click.option("--model", "-m", help="Lakeview model to use, preferably a cheap one")
+@click.option("--api-key", "-k", help="API key (or set via environment variable)")
+@click.option(
+    "--config-file", help="Path to configuration file", default="trae_config.json"
+)
+@click.option(
+    "--force", is_flag=True, help="Summarize steps again even if they have a summary"
+)
+def lakeview(
+    trajectories: tuple[str, ...],
+    concurrency: int,
+    provider: str | None = None,
+    model: str | None = None,
+    api_key: str | None = None,
+    config_file: str = "trae_config.json",
+    force: bool = False,
+):
+    """
+    Add Lakeview summaries to recorded trajectory files.
+    Each agent step gets a `lakeview` entry with its task, details and tags. Steps
+    already summarized by the same model are skipped, so reruns are free.
+    """
+    import asyncio
+    import dataclasses
+
+    from rich.table import Table
+
+    from .utils.lakeview_batch import summarize_trajectories
+
+    if concurrency < 1:
+        console.print("[red]--concurrency must be at least 1[/red]")
+        sys.exit(1)
+
+    config = load_config(provider, None, api_key, config_file)
+    lakeview_config = config.lakeview_config
+    if provider is None and lakeview_config is not None:
+        provider = lakeview_config.model_provider
+    provider = provider or config.default_provider
+    if provider not in config.model_providers:
+        console.print(f"[red]Provider {provider} is not configured[/red]")
+        sys.exit(1)
+    if model is None:
+        model = (
+            lakeview_config.model_name
+            if lakeview_config is not None
+            and lakeview_config.model_provider == provider
+            else config.model_providers[provider].model
+        )
+    config.lakeview_config = (
+        dataclasses.replace(lakeview_config, model_provider=provider, model_name=model)
+        if lakeview_config is not None
+        else LakeviewConfig(model_provider=provider, model_name=model)
+    )
+
+    console.print(
+        f"[blue]Summarizing {len(trajectories)} trajectories, {concurrency} steps at a time, with {provider}/{model}[/blue]"
+    )
+    results = asyncio.run(
+        summarize_trajectories(list(trajectories), config, concurrency, force)
+    )
+
+    results_table = Table(title="Lakeview Summaries")
+    results_table.add_column("Trajectory", style="cyan")
+    results_table.add_column("Steps", justify="right")
+    results_table.add_column("Summarized", justify="right", style="green")
+    results_table.add_column("Cached", justify="right")
+    results_table.add_column("Failed", justify="right", style="red")
+    for result in results:
+        if result.error:
+            results_table.add_row(result.trajectory_file, "-", "-", "-", result.error)
+            continue
+        results_table.add_row(
+            result.trajectory_file,
+            str(result.steps),
+            str(result.summarized),
+            str(result.cached),
+            str(result.failed),
+        )
+    console.print(results_table)
+    if any(result.error or result.failed for result in results):
+        sys.exit(1)
+
+
+def mock_server_options(func: Callable[..., None]) -> Callable[..., None]:
+    """Click options shared by the commands that start a mock LLM server."""
+    options = [
+        click.option("--script", help="JSON file with the scripted assistant turns"),
+        click.option(
+            "--latency",
+            default="0",
+            help="Response latency in seconds, e.g. 0.5, uniform:0.2:1.5, normal:1:0.3 or lognormal:0:0.5",
+        ),
+        click.option(
+            "--rate-limit-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with 429",
+        ),
+        click.option(
+            "--server-error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with 500, 502 or 503",
+        ),
+        click.option(
+            "--chunk-delay",
+            type=float,
+            default=0.0,
+            help="Delay between streamed chunks in seconds",
+        ),
+        click.option("--seed", type=int, help="Seed for latency and error injection"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def build_mock_server(
+    script: str | None,
+    latency: str,
+    rate_limit_rate: float,
+    server_error_rate: float,
+    chunk_delay: float,
+    seed: int | None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> "MockLLMServer":
+    from .utils.mock_server import LatencyDistribution, MockLLMServer, load_script
+
+    try:
+        return MockLLMServer(
+            script=load_script(script) if script else None,
+            latency=LatencyDistribution.parse(latency),
+            rate_limit_rate=rate_limit_rate,
+            server_error_rate=server_error_rate,
+            chunk_delay=chunk_delay,
+            seed=seed,
+            host=host,
+            port=port,
+        )
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error starting mock server: {e}[/red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", help="Host to listen on")
+@click.option("--port", type=int, default=8765, help="Port to listen on")
+@mock_server_options
+def mock_server(
+    host: str,
+    port: int,
+    script: str | None,
+    latency: str,
+    rate_limit_rate: float,
+    server_error_rate: float,
+    chunk_delay: float,
+    seed: int | None,
+):
+    """
+    Start a local mock of the OpenAI-compatible chat completions and responses APIs.
+    Point a provider's base_url at the printed URL to run the agent without network access.
+    """
+    server = build_mock_server(
+        script,
+        latency,
+        rate_limit_rate,
+        server_error_rate,
+        chunk_delay,
+        seed,
+        host,
+        port,
+    )
+    console.print(f"[green]Mock LLM server listening on {server.base_url}[/green]")
+    console.print(f"[blue]Request counters: {server.base_url[:-3]}/stats[/blue]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Mock LLM server stopped[/yellow]")
+    finally:
+        server.httpd.server_close()
+
+
+@cli.command()
+@click.option("--agents", "-n", type=int, default=10, help="Number of agents to run")
+@click.option(
+    "--concurrency", "-c", type=int, help="Agents running at once (default: all)"
+)
+@click.option(
+    "--api",
+    type=click.Choice(["chat", "responses"]),
+    default="chat",
+    help="API to exercise: chat completions (pollinations) or responses (openai)",
+)
+@click.option(
+    "--base-url", help="Use an already running server instead of starting a mock"
+)
+@click.option(
+    "--task", default="Look around the project.", help="Task given to every agent"
+)
+@click.option("--max-steps", type=int, default=20, help="Maximum steps per agent")
+@click.option("--max-retries", type=int, default=3, help="LLM retries per request")
+@click.option("--workspace", help="Directory for the agents' working directories")
+@click.option("--output", "-o", help="Path to write the report as JSON")
+@mock_server_options
+def load_test(
+    agents: int,
+    concurrency: int | None,
+    api: str,
+    base_url: str | None,
+    task: str,
+    max_steps: int,
+    max_retries: int,
+    workspace: str | None,
+    output: str | None,
+    script: str | None,
+    latency: str,
+    rate_limit_rate: float,
+    server_error_rate: float,
+    chunk_delay: float,
+    seed: int | None,
+):
+    """
+    Run many agents at once against the mock LLM server and report throughput,
+    retries and memory.
+    """
+    import tempfile
+
+    from rich.table import Table
+
+    from .utils.load_test import run_load_test
+
+    server = None
+    if base_url is None:
+        server = build_mock_server(
+            script, latency, rate_limit_rate, server_error_rate, chunk_delay, seed
+        ).start()
+        base_url = server.base_url
+
+    provider = "pollinations" if api == "chat" else "openai"
+    config = Config(
+        {
+            "default_provider": provider,
+            "max_steps": max_steps,
+            "enable_lakeview": False,
+            "model_providers": {
+                provider: {
+                    "model": "mock",
+                    "api_key": "mock",
+                    "base_url": base_url,
+                    "max_retries": max_retries,
+                }
+            },
+        }
+    )
+    concurrency = concurrency or agents
+
+    console.print(
+        f"[blue]Running {agents} agents ({concurrency} at once) against {base_url}[/blue]"
+    )
+    with tempfile.TemporaryDirectory(dir=workspace) as workspace_root:
+        report = run_load_test(config, task, agents, concurrency, Path(workspace_root))
+    if server:
+        report.server_stats = server.stats
+        server.stop()
+
+    summary = report.to_dict()
+    report_table = Table(title="Load Test Report")
+    report_table.add_column("Metric", style="cyan")
+    report_table.add_column("Value", style="green")
+    report_table.add_row("Agents succeeded", f"{report.succeeded}/{report.agents}")
+    report_table.add_row("Wall time", f"{report.wall_time:.2f}s")
+    report_table.add_row("Agents/s", f"{summary['agents_per_second']:.2f}")
+    report_table.add_row("Steps/s", f"{summary['steps_per_second']:.2f}")
+    report_table.add_row(
+        "Agent time p50 / p95",
+        f"{summary['execution_time_p50']:.2f}s / {summary['execution_time_p95']:.2f}s",
+    )
+    if report.max_rss_mb is not None:
+        report_table.add_row("Peak RSS", f"{report.max_rss_mb:.1f} MiB")
+    for name, value in (report.server_stats or {}).items():
+        report_table.add_row(f"Server {name.replace('_', ' ')}", str(value))
+    console.print(report_table)
+
+    for result in report.results:
+        if result.error:
+            console.print(f"[red]Agent {result.index}: {result.error}[/red]")
+
+    if output:
+        Path(output).write_text(json.dumps(summary, indent=2))
+        console.print(f"[green]Report saved to: {output}[/green]")
+
 
 @cli.command()
 @click.option(
@@ -372,6 +1434,9 @@ def interactive(
 )
 def show_config(config_file: str):
     """Show current configuration settings."""
+    from rich.panel import Panel
+    from rich.table import Table
+
     config_path = Path(config_file)
     if not config_path.exists():
         console.print(
@@ -419,6 +1484,8 @@ Using default settings and environment variables.""",
 @cli.command()
 def tools():
     """Show available tools and their descriptions."""
+    from rich.table import Table
+
     from .tools import tools_registry
 
     tools_table = Table(title="Available Tools")
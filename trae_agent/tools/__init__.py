@@ -7,8 +7,10 @@ from typing import Type
 
 from .base import Tool, ToolCall, ToolExecutor, ToolResult
 from .bash_tool import BashTool
+from .delegate_tool import DelegateTool
 from .edit_tool import TextEditorTool
 from .sequential_thinking_tool import SequentialThinkingTool
+from .snapshot_tool import WorkspaceSnapshotTool
 from .task_done_tool import TaskDoneTool
 
 __all__ = [
@@ -20,6 +22,8 @@ __all__ = [
     "TextEditorTool",
     "SequentialThinkingTool",
     "TaskDoneTool",
+    "WorkspaceSnapshotTool",
+    "DelegateTool",
 ]
 
 tools_registry: dict[str, Type[Tool]] = {
@@ -27,4 +31,6 @@ tools_registry: dict[str, Type[Tool]] = {
     "str_replace_based_edit_tool": TextEditorTool,
     "sequentialthinking": SequentialThinkingTool,
     "task_done": TaskDoneTool,
+    "workspace_snapshot": WorkspaceSnapshotTool,
+    "delegate": DelegateTool,
 }
@@ -4,11 +4,15 @@
 """Base classes for tools and tool calling."""
 
 import asyncio
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from functools import cached_property
 from typing import override
 
+from ..utils.metrics import TOOL_DURATION, TOOL_ERRORS
+from ..utils.tracing import Tracer, trace_span
+
 
 class ToolError(Exception):
     """Base class for tool errors."""
@@ -37,6 +41,7 @@ class ToolResult:
     result: str | None = None
     error: str | None = None
     id: str | None = None  # OpenAI-specific field
+    duration: float | None = None  # Seconds the tool call took
 
 
 ToolCallArguments = dict[
@@ -116,6 +121,30 @@ class Tool(ABC):
         """Execute the tool with given parameters."""
         pass
 
+    async def start(self) -> None:
+        """Acquire resources ahead of the first call, such as subprocesses."""
+        return
+
+    async def close(self) -> None:
+        """Release resources held by the tool, such as subprocesses."""
+        return
+
+    def set_cwd(self, cwd: str) -> None:
+        """Work in the task's project directory, for tools that run commands."""
+        return
+
+    async def get_state(self) -> dict[str, object] | None:
+        """JSON-serializable state to checkpoint after the tool was called, if any.
+
+        A list in the state is appended to the one checkpointed before, so it
+        must only hold the items added since the previous call.
+        """
+        return None
+
+    def restore_state(self, state: dict[str, object]) -> None:
+        """Restore the state returned by get_state, before the tool is called."""
+        return
+
     def json_definition(self) -> dict[str, object]:
         return {
             "name": self.name,
@@ -162,9 +191,10 @@ class Tool(ABC):
 class ToolExecutor:
     """Tool executor that manages tool execution."""
 
-    def __init__(self, tools: list[Tool]):
+    def __init__(self, tools: list[Tool], tracer: Tracer | None = None):
         self._tools = tools
         self._tool_map: dict[str, Tool] | None = None
+        self.tracer: Tracer | None = tracer
 
     @property
     def tools(self) -> dict[str, Tool]:
@@ -174,6 +204,30 @@ class ToolExecutor:
 
     async def execute_tool_call(self, tool_call: ToolCall) -> ToolResult:
         """Execute a tool call."""
+        with trace_span(
+            self.tracer,
+            "tool.execute",
+            {
+                "gen_ai.tool.name": tool_call.name,
+                "gen_ai.tool.call.id": tool_call.call_id,
+            },
+        ) as span:
+            tool_result = await self._execute_tool_call(tool_call)
+            if tool_result.duration is not None:
+                TOOL_DURATION.observe(tool_result.duration, tool=tool_call.name)
+            if not tool_result.success:
+                TOOL_ERRORS.inc(tool=tool_call.name)
+            span.set_attribute("polli.tool.success", tool_result.success)
+            span.set_attribute("polli.tool.duration", tool_result.duration)
+            span.set_attribute(
+                "polli.tool.output_size",
+                len(tool_result.result or "") + len(tool_result.error or ""),
+            )
+            if not tool_result.success:
+                span.error = tool_result.error
+            return tool_result
+
+    async def _execute_tool_call(self, tool_call: ToolCall) -> ToolResult:
         if tool_call.name not in self.tools:
             return ToolResult(
                 name=tool_call.name,
@@ -185,6 +239,7 @@ class ToolExecutor:
 
         tool = self.tools[tool_call.name]
 
+        start_time = time.perf_counter()
         try:
             tool_exec_result = await tool.execute(tool_call.arguments)
             return ToolResult(
@@ -194,6 +249,7 @@ class ToolExecutor:
                 error=tool_exec_result.error,
                 call_id=tool_call.call_id,
                 id=tool_call.id,
+                duration=time.perf_counter() - start_time,
             )
         except Exception as e:
             return ToolResult(
@@ -202,6 +258,7 @@ class ToolExecutor:
                 error=f"Error executing tool '{tool_call.name}': {str(e)}",
                 call_id=tool_call.call_id,
                 id=tool_call.id,
+                duration=time.perf_counter() - start_time,
             )
 
     async def parallel_tool_call(self, tool_calls: list[ToolCall]) -> list[ToolResult]:
@@ -210,6 +267,14 @@ class ToolExecutor:
             *[self.execute_tool_call(call) for call in tool_calls]
         )
 
+    async def start_tools(self) -> None:
+        """Start all tools, so the first tool calls do not pay for it."""
+        _ = await asyncio.gather(*[tool.start() for tool in self._tools])
+
+    async def close_tools(self) -> None:
+        """Close all tools, e.g. before their event loop is closed."""
+        _ = await asyncio.gather(*[tool.close() for tool in self._tools])
+
     async def sequential_tool_call(
         self, tool_calls: list[ToolCall]
     ) -> list[ToolResult]:
@@ -11,14 +11,21 @@
 
 import asyncio
 import os
+import shlex
+import signal
+import weakref
 from typing import override
 
+from ..utils.metrics import BASH_SESSIONS
 from .base import Tool, ToolCallArguments, ToolError, ToolExecResult, ToolParameter
 
 
 class _BashSession:
     """A session of a bash shell."""
 
+    # Started sessions, for the bash sessions gauge
+    _sessions: "weakref.WeakSet[_BashSession]" = weakref.WeakSet()
+
     _started: bool
     _timed_out: bool
 
@@ -27,10 +34,12 @@ class _BashSession:
     _timeout: float = 120.0  # seconds
     _sentinel: str = "<<exit>>"
 
-    def __init__(self) -> None:
+    def __init__(self, cwd: str | None = None) -> None:
         self._started = False
         self._timed_out = False
         self._process: asyncio.subprocess.Process | None = None
+        # Directory the shell starts in
+        self._cwd: str | None = cwd
 
     async def start(self) -> None:
         if self._started:
@@ -47,6 +56,7 @@ class _BashSession:
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 preexec_fn=os.setsid,
+                cwd=self._cwd,
             )
         else:
             self._process = await asyncio.create_subprocess_shell(
@@ -56,9 +66,15 @@ class _BashSession:
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
+                cwd=self._cwd,
             )
 
         self._started = True
+        _BashSession._sessions.add(self)
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
 
     def stop(self) -> None:
         """Terminate the bash shell."""
@@ -70,6 +86,51 @@ class _BashSession:
             return
         self._process.terminate()
 
+    async def close(self) -> None:
+        """Terminate the shell with its children and wait for it to exit."""
+        if self._process is None or self._process.returncode is not None:
+            return
+        try:
+            if os.name != "nt":
+                # The shell runs in its own session, so this also reaches the
+                # bash started by `sh -c` and anything it spawned.
+                os.killpg(self._process.pid, signal.SIGTERM)
+            else:
+                self._process.terminate()
+        except ProcessLookupError:
+            pass
+        _ = await self._process.communicate()
+
+    async def cwd(self) -> str | None:
+        """The current working directory of the shell."""
+        if not self.alive:
+            return None
+        assert self._process
+        try:
+            # Read it from /proc rather than running `pwd`, which takes an
+            # output delay. The process is `sh -c`, which may or may not
+            # have exec'd bash.
+            pid = self._process.pid
+            for _ in range(2):
+                with open(f"/proc/{pid}/comm", encoding="utf-8") as f:
+                    if f.read().strip() == "bash":
+                        return os.readlink(f"/proc/{pid}/cwd")
+                with open(f"/proc/{pid}/task/{pid}/children", encoding="utf-8") as f:
+                    children = f.read().split()
+                if not children:
+                    break
+                pid = int(children[0])
+        except (OSError, ValueError):
+            pass
+        try:
+            result = await self.run("pwd")
+        except ToolError:
+            # E.g. timed out; the session must be restarted first
+            return None
+        if result.error_code != 0 or not result.output:
+            return None
+        return result.output.strip()
+
     async def run(self, command: str) -> ToolExecResult:
         """Execute a command in the bash shell."""
         if not self._started or self._process is None:
@@ -131,6 +192,11 @@ class _BashSession:
         return ToolExecResult(output=output, error=error, error_code=error_code)
 
 
+BASH_SESSIONS.set_function(
+    lambda: sum(1 for session in list(_BashSession._sessions) if session.alive)
+)
+
+
 class BashTool(Tool):
     """
     A tool that allows the agent to run bash commands.
@@ -140,6 +206,12 @@ class BashTool(Tool):
     def __init__(self, model_provider: str | None = None):
         super().__init__(model_provider)
         self._session: _BashSession | None = None
+        # Working directory of the next session: the project of the task, or
+        # the one restored from a checkpoint. Concurrent agents share the
+        # process, so the shell must not start in its working directory.
+        self._cwd: str | None = None
+        # Where a session started ahead of its task moves before the next command
+        self._pending_cd: str | None = None
 
     @override
     def get_model_provider(self) -> str | None:
@@ -181,19 +253,58 @@ class BashTool(Tool):
             ),
         ]
 
+    @override
+    async def start(self) -> None:
+        """Spawn the bash session ahead of the first command."""
+        if self._session is None:
+            self._session = _BashSession(self._cwd)
+            await self._session.start()
+
+    @override
+    async def close(self) -> None:
+        """Terminate the bash session, if one was started."""
+        if self._session is None:
+            return
+        session, self._session = self._session, None
+        self._pending_cd = None
+        await session.close()
+
+    @override
+    def set_cwd(self, cwd: str) -> None:
+        if os.path.isdir(cwd):
+            self._cwd = cwd
+            if self._session is not None:
+                self._pending_cd = cwd
+
+    @override
+    async def get_state(self) -> dict[str, object] | None:
+        if self._session is None:
+            return None
+        if self._pending_cd is not None:
+            return {"cwd": self._pending_cd}
+        cwd = await self._session.cwd()
+        return {"cwd": cwd} if cwd else None
+
+    @override
+    def restore_state(self, state: dict[str, object]) -> None:
+        cwd = state.get("cwd")
+        if isinstance(cwd, str):
+            self.set_cwd(cwd)
+
     @override
     async def execute(self, arguments: ToolCallArguments) -> ToolExecResult:
         if arguments.get("restart"):
             if self._session:
                 self._session.stop()
-            self._session = _BashSession()
+            self._session = _BashSession(self._cwd)
+            self._pending_cd = None
             await self._session.start()
 
             return ToolExecResult(output="tool has been restarted.")
 
         if self._session is None:
             try:
-                self._session = _BashSession()
+                self._session = _BashSession(self._cwd)
                 await self._session.start()
             except Exception as e:
                 return ToolExecResult(
@@ -206,6 +317,10 @@ class BashTool(Tool):
                 error=f"No command provided for the {self.get_name()} tool",
                 error_code=-1,
             )
+        if self._pending_cd is not None:
+            # On a line of its own, so it does not change how the command parses
+            command = f"cd {shlex.quote(self._pending_cd)}\n{command}"
+            self._pending_cd = None
         try:
             return await self._session.run(command)
         except Exception as e:
@@ -0,0 +1,211 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import contextlib
+import os
+import shutil
+import tempfile
+from typing import TYPE_CHECKING, override
+
+import httpx
+
+from ..utils.git_utils import GitError
+from ..utils.workspace_snapshots import WorkspaceSnapshots
+from .base import Tool, ToolCallArguments, ToolExecResult, ToolParameter
+
+if TYPE_CHECKING:
+    from ..utils.config import Config
+
+# Tools the main agent may give to sub-agents
+DelegateToolSubAgentTools = [
+    "str_replace_based_edit_tool",
+    "bash",
+    "sequentialthinking",
+]
+
+
+class DelegateTool(Tool):
+    """Tool to run exploration sub-tasks in parallel sub-agents."""
+
+    def __init__(self, model_provider: str | None = None) -> None:
+        super().__init__(model_provider)
+        # Set by the agent that owns the tool, see configure()
+        self._config: "Config | None" = None
+        self._http_client: httpx.Client | None = None
+
+    def configure(self, config: "Config", http_client: httpx.Client | None) -> None:
+        """Give the tool the configuration and connection pool of its agent."""
+        self._config = config
+        self._http_client = http_client
+
+    @override
+    def get_model_provider(self) -> str | None:
+        return self._model_provider
+
+    @override
+    def get_name(self) -> str:
+        return "delegate"
+
+    @override
+    def get_description(self) -> str:
+        return """Hand focused sub-tasks to sub-agents that work on them in parallel and return concise answers
+* Use it for exploration that would take you several steps, e.g. "find where the session token is validated and which tests cover it". Several independent questions in one call are answered in the time of the slowest
+* Each sub-agent starts with an empty context: state everything it needs in its sub-task, such as names, symptoms and what to report back
+* Sub-agents are read-only by default: in git projects they work in a throwaway copy of the files, so nothing they do changes your checkout. Set `read_only` to false only for sub-tasks that must write files, such as generating fixtures
+* Only the sub-agents' answers are added to your context, not their steps
+"""
+
+    @override
+    def get_parameters(self) -> list[ToolParameter]:
+        # For OpenAI models, all parameters must be required=True
+        optional_required = self.model_provider == "openai"
+        max_subtasks = (
+            self._config.delegation_config.max_subtasks if self._config else 4
+        )
+
+        return [
+            ToolParameter(
+                name="tasks",
+                type="array",
+                description=f"The sub-tasks, one per sub-agent, at most {max_subtasks}.",
+                items={"type": "string"},
+                required=True,
+            ),
+            ToolParameter(
+                name="path",
+                type="string",
+                description="Absolute path of the project root, e.g. `/repo`.",
+                required=True,
+            ),
+            ToolParameter(
+                name="read_only",
+                type="boolean",
+                description="Whether the sub-agents must leave the files unchanged. Defaults to true.",
+                required=optional_required,
+            ),
+            ToolParameter(
+                name="tools",
+                type="array",
+                description=f"Tools of the sub-agents, from: {', '.join(DelegateToolSubAgentTools)}. Defaults to str_replace_based_edit_tool and bash.",
+                items={"type": "string", "enum": DelegateToolSubAgentTools},
+                required=optional_required,
+            ),
+        ]
+
+    @override
+    async def execute(self, arguments: ToolCallArguments) -> ToolExecResult:
+        if self._config is None:
+            return ToolExecResult(
+                error=f"The {self.name} tool is not available to this agent",
+                error_code=-1,
+            )
+        delegation = self._config.delegation_config
+
+        tasks = arguments.get("tasks")
+        if not isinstance(tasks, list) or not tasks:
+            return ToolExecResult(
+                error=f"No tasks provided for the {self.name} tool", error_code=-1
+            )
+        if len(tasks) > delegation.max_subtasks:
+            return ToolExecResult(
+                error=f"Too many tasks: at most {delegation.max_subtasks} can run at once",
+                error_code=-1,
+            )
+        path = str(arguments.get("path") or "")
+        if not path:
+            return ToolExecResult(
+                error=f"No path provided for the {self.name} tool", error_code=-1
+            )
+        read_only = arguments.get("read_only")
+        read_only = read_only is None or str(read_only).lower() not in ("false", "0")
+        tool_names = arguments.get("tools") or None
+        if tool_names is not None:
+            if not isinstance(tool_names, list) or any(
+                name not in DelegateToolSubAgentTools for name in tool_names
+            ):
+                return ToolExecResult(
+                    error=f"Sub-agents can only use these tools: {', '.join(DelegateToolSubAgentTools)}",
+                    error_code=-1,
+                )
+            tool_names = [str(name) for name in tool_names]
+
+        snapshots = WorkspaceSnapshots(path)
+        forks_dir: str | None = None
+        work_path = path
+        if read_only:
+            forks_dir = tempfile.mkdtemp(prefix="polli-delegate-")
+            try:
+                work_path = await self._fork(snapshots, path, forks_dir)
+            except GitError:
+                # Not a git project: the sub-agents are only told not to write
+                shutil.rmtree(forks_dir, ignore_errors=True)
+                forks_dir = None
+
+        try:
+            answers = await asyncio.gather(
+                *[
+                    self._run_subtask(str(task), work_path, read_only, tool_names)
+                    for task in tasks
+                ]
+            )
+        finally:
+            if forks_dir:
+                with contextlib.suppress(GitError):
+                    await snapshots.remove_fork(os.path.join(forks_dir, "fork"))
+                shutil.rmtree(forks_dir, ignore_errors=True)
+
+        output = "\n\n".join(
+            # Point the answers at the project rather than the removed fork
+            f"[{index}] {task}\n{answer.replace(work_path, path)}"
+            for index, (task, answer) in enumerate(zip(tasks, answers, strict=True), 1)
+        )
+        return ToolExecResult(output=output)
+
+    async def _fork(
+        self, snapshots: WorkspaceSnapshots, path: str, forks_dir: str
+    ) -> str:
+        """Fork the checkout of read-only sub-agents, so they cannot change it.
+
+        Returns:
+            The path in the fork that matches the project path.
+        """
+        root = await snapshots.root()
+        # Named after the unique temporary directory, so parallel calls do not clash
+        snapshot = await snapshots.create(os.path.basename(forks_dir))
+        try:
+            fork = await snapshots.fork(os.path.join(forks_dir, "fork"), snapshot.name)
+        finally:
+            # The fork keeps the snapshot's commit checked out
+            with contextlib.suppress(GitError):
+                await snapshots.delete(snapshot.name)
+        relative_path = os.path.relpath(os.path.abspath(path), root)
+        return os.path.normpath(os.path.join(fork, relative_path))
+
+    async def _run_subtask(
+        self, task: str, path: str, read_only: bool, tool_names: list[str] | None
+    ) -> str:
+        """Run one sub-agent and return its answer with how it ended."""
+        from ..agent.sub_agent import SubAgent
+
+        assert self._config is not None
+        limit = self._config.delegation_config.summary_max_chars
+        agent: SubAgent | None = None
+        try:
+            agent = SubAgent(self._config, self._http_client, read_only)
+            agent.new_task(task, {"project_path": path}, tool_names)
+            execution = await agent.execute_task()
+        except Exception as e:
+            return f"(The sub-agent failed: {e})"
+        finally:
+            if agent and agent.tools:
+                await agent.tool_caller.close_tools()
+
+        answer = agent.answer(execution).strip() or "(No answer)"
+        if len(answer) > limit:
+            answer = answer[:limit] + " [...]"
+        if execution.success:
+            status = f"(Finished in {len(execution.steps)} steps)"
+        else:
+            status = f"(Stopped without finishing after {len(execution.steps)} steps: {execution.final_result})"
+        return f"{answer}\n{status}"
@@ -10,7 +10,7 @@
 # This modified file is released under the same license.
 
 import json
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import override
 
 from .base import Tool, ToolCallArguments, ToolExecResult, ToolParameter
@@ -155,6 +155,30 @@ You should:
         super().__init__(model_provider)
         self.thought_history: list[ThoughtData] = []
         self.branches: dict[str, list[ThoughtData]] = {}
+        # Thoughts already returned by get_state, which checkpoints only new ones
+        self._checkpointed_thoughts: int = 0
+
+    @override
+    async def get_state(self) -> dict[str, object] | None:
+        new_thoughts = self.thought_history[self._checkpointed_thoughts :]
+        if not new_thoughts:
+            return None
+        self._checkpointed_thoughts = len(self.thought_history)
+        return {"thought_history": [asdict(thought) for thought in new_thoughts]}
+
+    @override
+    def restore_state(self, state: dict[str, object]) -> None:
+        thoughts = state.get("thought_history")
+        self.thought_history = [
+            ThoughtData(**thought)
+            for thought in (thoughts if isinstance(thoughts, list) else [])
+        ]
+        self._checkpointed_thoughts = len(self.thought_history)
+        # Branches hold the thoughts that started or continued them
+        self.branches = {}
+        for thought in self.thought_history:
+            if thought.branch_from_thought and thought.branch_id:
+                self.branches.setdefault(thought.branch_id, []).append(thought)
 
     @override
     def get_model_provider(self) -> str | None:
@@ -0,0 +1,123 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from datetime import datetime
+from typing import override
+
+from ..utils.git_utils import GitError
+from ..utils.workspace_snapshots import BEFORE_ROLLBACK, WorkspaceSnapshots
+from .base import Tool, ToolCallArguments, ToolExecResult, ToolParameter
+
+SnapshotToolSubCommands = [
+    "create",
+    "rollback",
+    "list",
+    "delete",
+]
+
+
+class WorkspaceSnapshotTool(Tool):
+    """Tool to snapshot the project's working tree and roll back to a snapshot."""
+
+    def __init__(self, model_provider: str | None = None) -> None:
+        super().__init__(model_provider)
+        # Snapshots by project path, which keep the checkout root they found
+        self._snapshots: dict[str, WorkspaceSnapshots] = {}
+
+    @override
+    def get_model_provider(self) -> str | None:
+        return self._model_provider
+
+    @override
+    def get_name(self) -> str:
+        return "workspace_snapshot"
+
+    @override
+    def get_description(self) -> str:
+        return f"""Save and restore snapshots of all files of a git project, including uncommitted and untracked changes
+* `create` saves the current state, e.g. before a risky sequence of edits. It is cheap: only changed files are stored
+* `rollback` restores a snapshot in one call, instead of undoing edits by hand. Without `name`, it restores the latest snapshot. The state before the rollback is saved as `{BEFORE_ROLLBACK}`, so a rollback can be undone
+* `list` shows the snapshots, oldest first, and `delete` removes one
+* Files ignored by git are neither saved nor restored, and commits, branches and the staging area are left alone
+* `path` must be the top-level directory of the git checkout, since snapshots cover all of its files
+"""
+
+    @override
+    def get_parameters(self) -> list[ToolParameter]:
+        # For OpenAI models, all parameters must be required=True
+        name_required = self.model_provider == "openai"
+
+        return [
+            ToolParameter(
+                name="command",
+                type="string",
+                description=f"The command to run. Allowed options are: {', '.join(SnapshotToolSubCommands)}.",
+                required=True,
+                enum=SnapshotToolSubCommands,
+            ),
+            ToolParameter(
+                name="path",
+                type="string",
+                description="Absolute path of the top-level directory of the git checkout, e.g. `/repo`.",
+                required=True,
+            ),
+            ToolParameter(
+                name="name",
+                type="string",
+                description="Snapshot name for `create`, `rollback` and `delete`, e.g. `before-refactor`. Optional for `create` and `rollback`.",
+                required=name_required,
+            ),
+        ]
+
+    @override
+    async def execute(self, arguments: ToolCallArguments) -> ToolExecResult:
+        command = str(arguments.get("command") or "")
+        if command not in SnapshotToolSubCommands:
+            return ToolExecResult(
+                error=f"Unrecognized command {command!r}. The allowed commands for the {self.name} tool are: {', '.join(SnapshotToolSubCommands)}",
+                error_code=-1,
+            )
+        path = str(arguments.get("path") or "")
+        if not path:
+            return ToolExecResult(
+                error=f"No path provided for the {self.name} tool", error_code=-1
+            )
+        name = str(arguments["name"]) if arguments.get("name") else None
+        snapshots = self._snapshots.setdefault(path, WorkspaceSnapshots(path))
+
+        try:
+            await snapshots.check_top_level()
+            if command == "create":
+                snapshot = await snapshots.create(name)
+                return ToolExecResult(
+                    output=f"Saved snapshot {snapshot.name} ({snapshot.commit[:12]})."
+                )
+            if command == "rollback":
+                changed = await snapshots.rollback(name)
+                if not changed:
+                    return ToolExecResult(
+                        output="The files already match the snapshot; nothing changed."
+                    )
+                return ToolExecResult(
+                    output=f"Rolled back {len(changed)} files: {', '.join(changed)}\n"
+                    f"The previous state was saved as snapshot {BEFORE_ROLLBACK}."
+                )
+            if command == "delete":
+                if name is None:
+                    return ToolExecResult(
+                        error="The `delete` command requires `name`", error_code=-1
+                    )
+                await snapshots.delete(name)
+                return ToolExecResult(output=f"Deleted snapshot {name}.")
+
+            listed = await snapshots.list_snapshots()
+            if not listed:
+                return ToolExecResult(output="There are no snapshots.")
+            return ToolExecResult(
+                output="\n".join(
+                    f"{snapshot.name}\t{datetime.fromtimestamp(snapshot.created):%H:%M:%S}"
+                    for snapshot in listed
+                )
+            )
+        except GitError as e:
+            return ToolExecResult(error=e.message, error_code=-1)
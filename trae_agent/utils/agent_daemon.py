@@ -0,0 +1,423 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+# TODO: remove these annotations by defining fine-grained types
+# pyright: reportAny=false
+# pyright: reportExplicitAny=false
+
+"""Long-running agent service with a local JSON API over HTTP or a Unix socket.
+
+Over TCP, every request must carry the service's bearer token in an
+`Authorization` header and a loopback `Host` header, and task submissions must
+be `application/json`, so that web pages cannot submit tasks to it. The Unix
+socket is only accessible to its owner and needs neither.
+
+Routes:
+    GET  /health             Service status and queue sizes
+    GET  /metrics            Prometheus metrics of the process
+    POST /tasks              Submit a task; with `"stream": true` the response
+                             is the task's event stream instead of its id
+    GET  /tasks/<id>         Task status, and its result once done
+    GET  /tasks/<id>/events  Newline-delimited JSON events of the task, from the
+                             start, until it is done
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from ..agent import TraeAgent
+from ..agent.agent_basics import AgentStep
+from ..tools.base import Tool, ToolExecutor
+from .batch_runner import (
+    BatchResult,
+    BatchTask,
+    create_shared_http_client,
+    run_batch_task,
+)
+from .config import Config
+from .metrics import CONTENT_TYPE, REGISTRY
+
+HTTP_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    411: "Length Required",
+    413: "Content Too Large",
+    415: "Unsupported Media Type",
+}
+
+# Host headers accepted over TCP; any other name may be a DNS rebinding attack
+LOOPBACK_HOSTS = {"localhost", "127.0.0.1", "::1"}
+MAX_BODY_SIZE = 1024 * 1024
+
+
+def generate_token() -> str:
+    """A random bearer token for the TCP API."""
+    return secrets.token_urlsafe(32)
+
+
+def write_token_file(path: str | Path, token: str) -> None:
+    """Write the bearer token to a file only its owner can read."""
+    path = Path(path)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        _ = f.write(token + "\n")
+    # The file may have existed with wider permissions
+    os.chmod(path, 0o600)
+
+
+def _host_name(host_header: str) -> str:
+    """The host of a Host header, without its port or IPv6 brackets."""
+    if host_header.startswith("["):
+        return host_header[1:].partition("]")[0]
+    return host_header.rpartition(":")[0] if ":" in host_header else host_header
+
+
+@dataclass
+class ServedTask:
+    """A task submitted to the daemon, with the events it has produced so far."""
+
+    batch_task: BatchTask
+    status: str = "queued"
+    events: list[dict[str, Any]] = field(default_factory=list)
+    result: BatchResult | None = None
+    _changed: asyncio.Event = field(
+        default_factory=asyncio.Event, init=False, repr=False
+    )
+
+    def publish(self, event: dict[str, Any]) -> None:
+        self.events.append({"task_id": self.batch_task.task_id, **event})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def iter_events(self) -> AsyncIterator[dict[str, Any]]:
+        """Yield all events from the start, waiting for new ones until done."""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.status == "done":
+                return
+            _ = await changed.wait()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.batch_task.task_id,
+            "status": self.status,
+            "result": asdict(self.result) if self.result else None,
+        }
+
+
+class AgentDaemon:
+    """Runs submitted tasks with warm agents, at most `concurrency` at a time.
+
+    Each worker prepares its next agent ahead of time: the agent and its LLM
+    client are built on the shared connection pool and its bash session is
+    already spawned when a task arrives.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        concurrency: int,
+        trajectory_dir: str | Path,
+        max_finished_tasks: int = 1000,
+        token: str | None = None,
+    ):
+        self.config: Config = config
+        self.concurrency: int = concurrency
+        self.trajectory_dir: Path = Path(trajectory_dir)
+        self.max_finished_tasks: int = max_finished_tasks
+        # Required from TCP clients; the Unix socket is protected by its mode
+        self.token: str | None = token
+        self._tcp: bool = False
+
+        self.tasks: OrderedDict[str, ServedTask] = OrderedDict()
+        self.running: int = 0
+        self._queue: asyncio.Queue[ServedTask] = asyncio.Queue()
+        self._http_client: httpx.Client | None = None
+
+    async def serve(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8766,
+        socket_path: str | None = None,
+        on_ready: Callable[[asyncio.Server], None] | None = None,
+    ) -> None:
+        """Start the workers and serve the API until cancelled.
+
+        Raises:
+            ValueError: If asked to serve over TCP without a token.
+        """
+        if not socket_path and not self.token:
+            raise ValueError("Serving over TCP requires a token")
+        self._tcp = not socket_path
+        self._http_client = create_shared_http_client(self.concurrency)
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            # Created without group or other access, not just chmod-ed afterwards
+            umask = os.umask(0o177)
+            try:
+                server = await asyncio.start_unix_server(self._handle, path=socket_path)
+            finally:
+                _ = os.umask(umask)
+            os.chmod(socket_path, 0o600)
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+
+        try:
+            async with server:
+                if on_ready:
+                    on_ready(server)
+                await server.serve_forever()
+        finally:
+            for worker in workers:
+                _ = worker.cancel()
+            _ = await asyncio.gather(*workers, return_exceptions=True)
+            self._http_client.close()
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+    def submit(self, data: dict[str, Any]) -> ServedTask:
+        """Queue a task from its JSON form, raising ValueError if it is invalid."""
+        batch_task = BatchTask.from_dict(data, uuid.uuid4().hex[:12])
+        existing = self.tasks.get(batch_task.task_id)
+        if existing and existing.status != "done":
+            raise KeyError(f"Task {batch_task.task_id} is already {existing.status}")
+
+        served_task = ServedTask(batch_task)
+        self.tasks[batch_task.task_id] = served_task
+        self.tasks.move_to_end(batch_task.task_id)
+        served_task.publish({"event": "queued"})
+        self._queue.put_nowait(served_task)
+        return served_task
+
+    def health(self) -> dict[str, Any]:
+        return {
+            "status": "ok",
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "tasks": len(self.tasks),
+        }
+
+    async def _prepare(self) -> tuple[TraeAgent, list[Tool]]:
+        agent = TraeAgent(self.config, self._http_client)
+        tools = agent.create_tools()
+        try:
+            await ToolExecutor(tools).start_tools()
+        except BaseException:
+            # E.g. cancelled by a shutdown while the bash session was starting
+            await ToolExecutor(tools).close_tools()
+            raise
+        return agent, tools
+
+    async def _worker(self) -> None:
+        prepared: tuple[TraeAgent, list[Tool]] | None = None
+        try:
+            while True:
+                try:
+                    prepared = await self._prepare()
+                except Exception:
+                    # The task builds its own agent then, and reports the error
+                    prepared = None
+                served_task = await self._queue.get()
+                agent, tools = prepared or (None, None)
+                prepared = None
+                await self._run(served_task, agent, tools)
+        finally:
+            if prepared:
+                await ToolExecutor(prepared[1]).close_tools()
+
+    async def _run(
+        self,
+        served_task: ServedTask,
+        agent: TraeAgent | None,
+        tools: list[Tool] | None,
+    ) -> None:
+        def on_step(step: AgentStep) -> None:
+            served_task.publish({"event": "step", **step.to_event()})
+
+        self.running += 1
+        served_task.status = "running"
+        served_task.publish({"event": "started"})
+        try:
+            served_task.result = await run_batch_task(
+                self.config,
+                served_task.batch_task,
+                self.trajectory_dir,
+                self._http_client,
+                agent=agent,
+                tools=tools,
+                on_step=on_step,
+            )
+        finally:
+            self.running -= 1
+            served_task.status = "done"
+            served_task.publish(
+                {
+                    "event": "done",
+                    "result": asdict(served_task.result)
+                    if served_task.result
+                    else None,
+                }
+            )
+            self._forget_finished_tasks()
+
+    def _forget_finished_tasks(self) -> None:
+        finished = [
+            task_id
+            for task_id, served_task in self.tasks.items()
+            if served_task.status == "done"
+        ]
+        for task_id in finished[: max(0, len(finished) - self.max_finished_tasks)]:
+            del self.tasks[task_id]
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers: dict[str, str] = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if len(request_line) < 2:
+                await self._send_json(writer, 400, {"error": "Malformed request"})
+                return
+            method, path = request_line[0], request_line[1].split("?")[0].rstrip("/")
+            error = self._check_request(method, headers)
+            if error is not None:
+                await self._send_json(writer, error[0], {"error": error[1]})
+                return
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            await self._route(writer, method, path, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _check_request(
+        self, method: str, headers: dict[str, str]
+    ) -> tuple[int, str] | None:
+        """The status and error of a request that must be refused, if any."""
+        content_length = headers.get("content-length")
+        if content_length is None:
+            if method == "POST":
+                return 411, "Content-Length is required"
+        elif not content_length.isdigit():
+            return 400, "Invalid Content-Length"
+        elif int(content_length) > MAX_BODY_SIZE:
+            return 413, f"The body is larger than {MAX_BODY_SIZE} bytes"
+
+        if not self._tcp:
+            return None
+        if _host_name(headers.get("host", "")).lower() not in LOOPBACK_HOSTS:
+            return 403, "Only loopback Host headers are accepted"
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if (
+            self.token is None
+            or scheme.lower() != "bearer"
+            or not hmac.compare_digest(token.strip().encode(), self.token.encode())
+        ):
+            return 401, "A valid bearer token is required"
+        content_type = headers.get("content-type", "").partition(";")[0].strip()
+        if method == "POST" and content_type.lower() != "application/json":
+            return 415, "Tasks must be submitted as application/json"
+        return None
+
+    async def _route(
+        self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes
+    ) -> None:
+        parts = path.strip("/").split("/")
+        if parts == ["health"] and method == "GET":
+            await self._send_json(writer, 200, self.health())
+        elif parts == ["metrics"] and method == "GET":
+            await self._send(writer, 200, REGISTRY.render().encode(), CONTENT_TYPE)
+        elif parts == ["tasks"] and method == "POST":
+            try:
+                data = json.loads(body or b"{}")
+                served_task = self.submit(data)
+            except (json.JSONDecodeError, ValueError, AttributeError) as e:
+                await self._send_json(writer, 400, {"error": str(e)})
+                return
+            except KeyError as e:
+                await self._send_json(writer, 409, {"error": str(e.args[0])})
+                return
+            if data.get("stream"):
+                await self._send_events(writer, served_task)
+            else:
+                await self._send_json(writer, 202, served_task.to_dict())
+        elif len(parts) in (2, 3) and parts[0] == "tasks" and method == "GET":
+            served_task = self.tasks.get(parts[1])
+            if served_task is None:
+                await self._send_json(writer, 404, {"error": "Unknown task"})
+            elif len(parts) == 2:
+                await self._send_json(writer, 200, served_task.to_dict())
+            elif parts[2] == "events":
+                await self._send_events(writer, served_task)
+            else:
+                await self._send_json(writer, 404, {"error": "Unknown route"})
+        elif parts[0] in ("health", "metrics", "tasks"):
+            await self._send_json(writer, 405, {"error": "Method not allowed"})
+        else:
+            await self._send_json(writer, 404, {"error": "Unknown route"})
+
+    async def _send_json(
+        self, writer: asyncio.StreamWriter, status: int, data: dict[str, Any]
+    ) -> None:
+        await self._send(writer, status, json.dumps(data).encode(), "application/json")
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str,
+    ) -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+
+    async def _send_events(
+        self, writer: asyncio.StreamWriter, served_task: ServedTask
+    ) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        async for event in served_task.iter_events():
+            writer.write(json.dumps(event, ensure_ascii=False).encode() + b"\n")
+            await writer.drain()
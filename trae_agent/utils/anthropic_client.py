@@ -5,11 +5,10 @@
 
 import json
 import os
-import random
-import time
 from typing import override
 
 import anthropic
+import httpx
 from anthropic.types.tool_union_param import TextEditor20250429
 
 from ..tools.base import Tool, ToolCall, ToolResult
@@ -17,12 +16,18 @@ from ..utils.config import ModelParameters
 from ..utils.llm_basics import LLMMessage, LLMResponse, LLMUsage
 from .base_client import BaseLLMClient
 
+# Anthropic allows at most four cache breakpoints per request: one for the
+# system prompt, one for the tool definitions and two rolling ones in history.
+HISTORY_CACHE_BREAKPOINTS = 2
+
 
 class AnthropicClient(BaseLLMClient):
     """Anthropic client wrapper with tool schema generation."""
 
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         if self.api_key == "":
             self.api_key: str = os.getenv("ANTHROPIC_API_KEY", "")
@@ -32,7 +37,9 @@ class AnthropicClient(BaseLLMClient):
                 "Anthropic API key not provided. Set ANTHROPIC_API_KEY in environment variables or config file."
             )
 
-        self.client: anthropic.Anthropic = anthropic.Anthropic(api_key=self.api_key)
+        self.client: anthropic.Anthropic = anthropic.Anthropic(
+            api_key=self.api_key, http_client=self.http_client
+        )
         self.message_history: list[anthropic.types.MessageParam] = []
         self.system_message: str | anthropic.NotGiven = anthropic.NOT_GIVEN
 
@@ -90,15 +97,33 @@ class AnthropicClient(BaseLLMClient):
                         )
                     )
 
+        request_messages = self.message_history
+        system: str | list[anthropic.types.TextBlockParam] | anthropic.NotGiven = (
+            self.system_message
+        )
+        if model_parameters.enable_prompt_caching:
+            cache_control = anthropic.types.CacheControlEphemeralParam(type="ephemeral")
+            if isinstance(self.system_message, str):
+                system = [
+                    anthropic.types.TextBlockParam(
+                        type="text",
+                        text=self.system_message,
+                        cache_control=cache_control,
+                    )
+                ]
+            if tool_schemas:
+                tool_schemas[-1] = {**tool_schemas[-1], "cache_control": cache_control}  # pyright: ignore[reportArgumentType]
+            request_messages = self.add_history_cache_breakpoints(self.message_history)
+
         response = None
         error_message = ""
         for i in range(model_parameters.max_retries):
             try:
                 response = self.client.messages.create(
                     model=model_parameters.model,
-                    messages=self.message_history,
+                    messages=request_messages,
                     max_tokens=model_parameters.max_tokens,
-                    system=self.system_message,
+                    system=system,
                     tools=tool_schemas if tool_schemas else anthropic.NOT_GIVEN,
                     temperature=model_parameters.temperature,
                     top_p=model_parameters.top_p,
@@ -107,8 +132,7 @@ class AnthropicClient(BaseLLMClient):
                 break
             except Exception as e:
                 error_message += f"Error {i + 1}: {str(e)}\n"
-                # Randomly sleep for 3-30 seconds
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -144,12 +168,19 @@ class AnthropicClient(BaseLLMClient):
 
         usage = None
         if response.usage:
+            cache_creation_input_tokens = (
+                response.usage.cache_creation_input_tokens or 0
+            )
+            cache_read_input_tokens = response.usage.cache_read_input_tokens or 0
+            # Anthropic reports uncached input only; count the whole prompt like
+            # the other providers do.
             usage = LLMUsage(
-                input_tokens=response.usage.input_tokens,
+                input_tokens=response.usage.input_tokens
+                + cache_creation_input_tokens
+                + cache_read_input_tokens,
                 output_tokens=response.usage.output_tokens,
-                cache_creation_input_tokens=response.usage.cache_creation_input_tokens
-                or 0,
-                cache_read_input_tokens=response.usage.cache_read_input_tokens or 0,
+                cache_creation_input_tokens=cache_creation_input_tokens,
+                cache_read_input_tokens=cache_read_input_tokens,
             )
 
         llm_response = LLMResponse(
@@ -188,6 +219,43 @@ class AnthropicClient(BaseLLMClient):
         ]
         return any(model in model_parameters.model for model in tool_capable_models)
 
+    def add_history_cache_breakpoints(
+        self, messages: list[anthropic.types.MessageParam]
+    ) -> list[anthropic.types.MessageParam]:
+        """Return a copy of the messages with rolling cache breakpoints.
+
+        The breakpoints are placed on the last block of the most recent user
+        messages, so each request reads the prefix cached by the previous one and
+        writes a new entry for the next. The stored history is left untouched so
+        that breakpoints do not accumulate across calls.
+        """
+        request_messages = list(messages)
+        remaining = HISTORY_CACHE_BREAKPOINTS
+        for index in range(len(request_messages) - 1, -1, -1):
+            if remaining == 0:
+                break
+            message = request_messages[index]
+            if message["role"] != "user":
+                continue
+
+            content = message["content"]
+            if isinstance(content, str):
+                last_block: dict[str, object] = {"type": "text", "text": content}
+                blocks: list[object] = []
+            else:
+                content_blocks = list(content)
+                if not content_blocks or not isinstance(content_blocks[-1], dict):
+                    continue
+                last_block = dict(content_blocks[-1])  # pyright: ignore[reportUnknownArgumentType]
+                blocks = content_blocks[:-1]
+            last_block["cache_control"] = {"type": "ephemeral"}
+            request_messages[index] = anthropic.types.MessageParam(
+                role="user",
+                content=[*blocks, last_block],  # pyright: ignore[reportArgumentType]
+            )
+            remaining -= 1
+        return request_messages
+
     def parse_messages(
         self, messages: list[LLMMessage]
     ) -> list[anthropic.types.MessageParam]:
@@ -5,9 +5,10 @@ import json
 from pathlib import Path
 from typing import Optional
 import click
-from rich.console import Console
 
-console = Console()
+from .deferred_console import DeferredConsole
+
+console = DeferredConsole()
 
 # Models that require API keys (premium tier)
 # Note: Most Pollinations models are free, but some premium models may require API keys
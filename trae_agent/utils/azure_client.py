@@ -5,10 +5,9 @@
 
 import json
 import os
-import random
-import time
 from typing import override
 
+import httpx
 import openai
 from openai.types.chat import (
     ChatCompletionAssistantMessageParam,
@@ -28,14 +27,17 @@ from openai.types.shared_params.function_definition import FunctionDefinition
 from ..tools.base import Tool, ToolCall
 from .base_client import BaseLLMClient
 from .config import ModelParameters
-from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+from .llm_basics import LLMMessage, LLMResponse
+from .openai_compat import dump_tool_arguments, parse_completion_usage, sort_tools
 
 
 class AzureClient(BaseLLMClient):
     """Azure client wrapper with tool schema generation."""
 
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         if self.api_key == "":
             self.api_key: str = os.getenv("AZURE_API_KEY", "")
@@ -63,6 +65,7 @@ class AzureClient(BaseLLMClient):
             azure_endpoint=self.base_url,
             api_version=self.api_version,
             api_key=self.api_key,
+            http_client=self.http_client,
         )
         self.message_history: list[ChatCompletionMessageParam] = []
 
@@ -98,7 +101,7 @@ class AzureClient(BaseLLMClient):
                     ),
                     type="function",
                 )
-                for tool in tools
+                for tool in sort_tools(tools)
             ]
 
         response = None
@@ -112,13 +115,15 @@ class AzureClient(BaseLLMClient):
                     temperature=model_parameters.temperature,
                     top_p=model_parameters.top_p,
                     max_tokens=model_parameters.max_tokens,
+                    response_format={"type": "json_object"}
+                    if model_parameters.json_mode
+                    else openai.NOT_GIVEN,
                     n=1,
                 )
                 break
             except Exception as e:
                 error_message += f"Error {i + 1}: {str(e)}\n"
-                # Randomly sleep for 3-30 seconds
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -147,12 +152,7 @@ class AzureClient(BaseLLMClient):
             tool_calls=tool_calls,
             finish_reason=choice.finish_reason,
             model=response.model,
-            usage=LLMUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens,
-            )
-            if response.usage
-            else None,
+            usage=parse_completion_usage(response.usage) if response.usage else None,
         )
 
         # update message history
@@ -166,7 +166,7 @@ class AzureClient(BaseLLMClient):
                             id=tool_call.call_id,
                             function=Function(
                                 name=tool_call.name,
-                                arguments=json.dumps(tool_call.arguments),
+                                arguments=dump_tool_arguments(tool_call.arguments),
                             ),
                             type="function",
                         )
@@ -208,7 +208,8 @@ class AzureClient(BaseLLMClient):
                             {
                                 "name": msg.tool_call.name,
                                 "arguments": msg.tool_call.arguments,
-                            }
+                            },
+                            sort_keys=True,
                         ),
                         role="function",
                         name=msg.tool_call.name,
@@ -2,8 +2,12 @@
 # SPDX-License-Identifier: MIT
 
 
+import random
+import time
 from abc import ABC, abstractmethod
 
+import httpx
+
 from ..tools.base import Tool
 from ..utils.config import ModelParameters
 from ..utils.llm_basics import LLMMessage, LLMResponse
@@ -13,18 +17,81 @@ from ..utils.trajectory_recorder import TrajectoryRecorder
 class BaseLLMClient(ABC):
     """Base class for LLM clients."""
 
-    def __init__(self, model_parameters: ModelParameters):
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
         self.api_key: str = model_parameters.api_key
         self.base_url: str | None = model_parameters.base_url
         self.api_version: str | None = model_parameters.api_version
+        # Connection pool shared with other clients, e.g. in batch runs
+        self.http_client: httpx.Client | None = http_client
         self.trajectory_recorder: TrajectoryRecorder | None = (
             None  # TrajectoryRecorder instance
         )
+        # Retries, the rate-limited ones among them, and the seconds spent
+        # sleeping before them, over all calls
+        self.retry_count: int = 0
+        self.rate_limited_count: int = 0
+        self.retry_wait_time: float = 0.0
 
     def set_trajectory_recorder(self, recorder: TrajectoryRecorder | None) -> None:
         """Set the trajectory recorder for this client."""
         self.trajectory_recorder = recorder
 
+    def sleep_before_retry(self, error: Exception | None = None) -> None:
+        """Sleep for a random 3-30 seconds after a failed request."""
+        # The OpenAI and Anthropic SDKs expose `status_code`, google-genai `code`
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        if status == 429:
+            self.rate_limited_count += 1
+        wait = random.randint(3, 30)
+        time.sleep(wait)
+        self.retry_count += 1
+        self.retry_wait_time += wait
+
+    def supersede_tool_results(self, replacements: dict[str, str]) -> int:
+        """Replace the content of earlier tool results in the chat history.
+
+        Args:
+            replacements: Mapping from tool call id to the replacement content
+
+        Returns:
+            The number of tool results that were replaced.
+        """
+        history = getattr(self, "message_history", None)
+        if not replacements or not isinstance(history, list):
+            return 0
+
+        replaced = 0
+        for message in history:  # pyright: ignore[reportUnknownVariableType]
+            if not isinstance(message, dict):
+                continue
+            # OpenAI responses API: function_call_output items
+            if message.get("type") == "function_call_output":
+                call_id = message.get("call_id")
+                if call_id in replacements:
+                    message["output"] = replacements[call_id]
+                    replaced += 1
+            # Chat completions API: tool messages
+            elif message.get("role") == "tool":
+                call_id = message.get("tool_call_id")
+                if call_id in replacements:
+                    message["content"] = replacements[call_id]
+                    replaced += 1
+            # Anthropic messages API: tool_result blocks inside user messages
+            elif message.get("role") == "user" and isinstance(
+                message.get("content"), list
+            ):
+                for block in message["content"]:  # pyright: ignore[reportUnknownVariableType]
+                    if (
+                        isinstance(block, dict)
+                        and block.get("type") == "tool_result"
+                        and block.get("tool_use_id") in replacements
+                    ):
+                        block["content"] = replacements[block["tool_use_id"]]
+                        replaced += 1
+        return replaced
+
     @abstractmethod
     def set_chat_history(self, messages: list[LLMMessage]) -> None:
         """Set the chat history."""
@@ -0,0 +1,225 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+# TODO: remove these annotations by defining fine-grained types
+# pyright: reportAny=false
+# pyright: reportExplicitAny=false
+
+"""Runs many agent tasks concurrently on one event loop."""
+
+import asyncio
+import json
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from ..agent import TraeAgent
+from ..agent.agent_basics import AgentStep
+from ..tools.base import Tool, ToolExecutor
+from .config import Config
+
+
+@dataclass
+class BatchTask:
+    """One line of a batch tasks file."""
+
+    task_id: str
+    task: str
+    working_dir: str
+    must_patch: bool = False
+    patch_path: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], default_id: str) -> "BatchTask":
+        """Build a task from its JSON form, raising ValueError if it is invalid."""
+        for key in ("task", "working_dir"):
+            if not data.get(key):
+                raise ValueError(f"Task has no `{key}`")
+        return cls(
+            task_id=str(data.get("id", default_id)),
+            task=str(data["task"]),
+            working_dir=str(Path(data["working_dir"]).resolve()),
+            must_patch=bool(data.get("must_patch", False)),
+            patch_path=data.get("patch_path"),
+        )
+
+
+@dataclass
+class BatchResult:
+    """One line of a batch results file."""
+
+    task_id: str
+    success: bool
+    steps: int
+    execution_time: float
+    final_result: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    trajectory_file: str | None = None
+    error: str | None = None
+
+
+def load_batch_tasks(tasks_path: str | Path) -> list[BatchTask]:
+    """Load a JSONL file of tasks.
+
+    Each line is an object with a `task` and a `working_dir`, and optionally an
+    `id`, `must_patch` and `patch_path`. Tasks without an id are named after
+    their line number.
+    """
+    tasks: list[BatchTask] = []
+    seen_ids: set[str] = set()
+    with open(tasks_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                batch_task = BatchTask.from_dict(json.loads(line), str(line_number))
+            except (json.JSONDecodeError, ValueError) as e:
+                raise ValueError(f"Line {line_number}: {e}") from e
+
+            if batch_task.task_id in seen_ids:
+                raise ValueError(
+                    f"Line {line_number} repeats task id {batch_task.task_id}"
+                )
+            seen_ids.add(batch_task.task_id)
+            tasks.append(batch_task)
+    return tasks
+
+
+def create_shared_http_client(max_connections: int) -> httpx.Client:
+    """Create the connection pool shared by all agents of a batch."""
+    return httpx.Client(
+        # Same timeouts as the provider SDKs use by default
+        timeout=httpx.Timeout(600.0, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        follow_redirects=True,
+    )
+
+
+async def run_batch_task(
+    config: Config,
+    batch_task: BatchTask,
+    trajectory_dir: Path,
+    http_client: httpx.Client | None = None,
+    agent: TraeAgent | None = None,
+    tools: list[Tool] | None = None,
+    on_step: Callable[[AgentStep], None] | None = None,
+) -> BatchResult:
+    """Run one task with its own agent, bash session and trajectory.
+
+    Args:
+        config: Agent configuration
+        batch_task: The task to run
+        trajectory_dir: Directory for the trajectory file
+        http_client: Connection pool shared with other agents
+        agent: Pre-built agent to run the task with instead of a new one
+        tools: Pre-built (and possibly pre-started) tools; closed afterwards
+        on_step: Called whenever a step of the agent changes state
+
+    Returns:
+        The outcome of the task.
+    """
+    trajectory_file = str(trajectory_dir / f"{batch_task.task_id}.json")
+    try:
+        if agent is None:
+            agent = TraeAgent(config, http_client)
+        if on_step:
+            agent.add_step_listener(on_step)
+        _ = agent.setup_trajectory_recording(trajectory_file)
+        agent.new_task(
+            batch_task.task,
+            {
+                "project_path": batch_task.working_dir,
+                "issue": batch_task.task,
+                "must_patch": "true" if batch_task.must_patch else "false",
+                "patch_path": batch_task.patch_path,
+            },
+            tools=tools,
+        )
+        execution = await agent.execute_task()
+    except Exception as e:
+        return BatchResult(
+            task_id=batch_task.task_id,
+            success=False,
+            steps=0,
+            execution_time=0.0,
+            trajectory_file=trajectory_file if agent else None,
+            error=str(e),
+        )
+    finally:
+        if agent and agent.tools:
+            await agent.tool_caller.close_tools()
+        elif tools:
+            await ToolExecutor(tools).close_tools()
+
+    return BatchResult(
+        task_id=batch_task.task_id,
+        success=execution.success,
+        steps=len(execution.steps),
+        execution_time=execution.execution_time,
+        final_result=execution.final_result,
+        input_tokens=execution.total_tokens.input_tokens
+        if execution.total_tokens
+        else 0,
+        output_tokens=execution.total_tokens.output_tokens
+        if execution.total_tokens
+        else 0,
+        trajectory_file=trajectory_file,
+    )
+
+
+async def run_batch(
+    config: Config,
+    tasks: list[BatchTask],
+    concurrency: int,
+    results_path: str | Path,
+    trajectory_dir: str | Path,
+    on_result: Callable[[BatchResult], None] | None = None,
+) -> list[BatchResult]:
+    """Run tasks on the current event loop, at most `concurrency` at a time.
+
+    All agents share one HTTP connection pool. Results are appended to
+    `results_path` as JSON lines in the order the tasks finish.
+
+    Args:
+        config: Configuration shared by all agents
+        tasks: Tasks to run
+        concurrency: Maximum number of tasks running at the same time
+        results_path: JSONL file the results are written to
+        trajectory_dir: Directory for the per-task trajectory files
+        on_result: Called with each result as soon as its task finishes
+
+    Returns:
+        The results, in the order the tasks finished.
+    """
+    trajectory_dir = Path(trajectory_dir)
+    semaphore = asyncio.Semaphore(concurrency)
+    results: list[BatchResult] = []
+
+    with (
+        create_shared_http_client(concurrency) as http_client,
+        open(results_path, "w", encoding="utf-8") as results_file,
+    ):
+
+        async def run_one(batch_task: BatchTask) -> None:
+            async with semaphore:
+                result = await run_batch_task(
+                    config, batch_task, trajectory_dir, http_client
+                )
+            results.append(result)
+            _ = results_file.write(
+                json.dumps(asdict(result), ensure_ascii=False) + "\n"
+            )
+            results_file.flush()
+            if on_result:
+                on_result(result)
+
+        _ = await asyncio.gather(*[run_one(batch_task) for batch_task in tasks])
+
+    return results
@@ -0,0 +1,342 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Best-of-N runs: several attempts at one task, each in its own fork.
+
+Every attempt is a separate agent with its own temperature or model, working in
+a detached worktree of a snapshot of the project, so attempts never see each
+other's edits. All attempts share one HTTP connection pool and one event loop.
+An attempt is accepted when it completes with a non-empty patch that passes the
+verification command, and the first accepted attempt cancels the others.
+"""
+
+import asyncio
+import contextlib
+import copy
+import os
+import shutil
+import signal
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import httpx
+
+from ..agent import TraeAgent
+from .batch_runner import create_shared_http_client
+from .config import Config
+from .git_utils import GitError, run_git
+from .workspace_snapshots import WorkspaceSnapshots
+
+# Only the end of the verification output is kept for the summary
+VERIFY_OUTPUT_LIMIT = 2000
+
+
+@dataclass
+class AttemptSpec:
+    """The model settings of one attempt."""
+
+    provider: str
+    model: str
+    temperature: float
+
+
+@dataclass
+class AttemptResult:
+    """The outcome of one attempt."""
+
+    attempt: int
+    provider: str
+    model: str
+    temperature: float
+    success: bool = False
+    steps: int = 0
+    execution_time: float = 0.0
+    # The changes of the attempt as a diff against the project it started from
+    patch: str = ""
+    # None when there is no verification command or the attempt was not verified
+    verified: bool | None = None
+    verify_output: str | None = None
+    trajectory_file: str | None = None
+    patch_file: str | None = None
+    cancelled: bool = False
+    error: str | None = None
+
+    @property
+    def accepted(self) -> bool:
+        """Whether the attempt completed with a patch that passed verification."""
+        return self.success and bool(self.patch.strip()) and self.verified is not False
+
+
+@dataclass
+class BestOfNResult:
+    """The winning attempt, if any, and all attempts in the order they started."""
+
+    winner: AttemptResult | None
+    attempts: list[AttemptResult]
+
+
+def attempt_specs(
+    config: Config,
+    attempts: int,
+    temperatures: list[float] | None = None,
+    providers: list[str] | None = None,
+) -> list[AttemptSpec]:
+    """The settings of each attempt.
+
+    Providers and temperatures are used round-robin. Without temperatures, they
+    are spread evenly from the provider's configured temperature up to 1.0.
+
+    Args:
+        config: Configuration with the default provider and its model
+        attempts: Number of attempts
+        temperatures: Temperatures to use
+        providers: `provider` or `provider:model` entries to use; the default
+            provider if not given
+
+    Raises:
+        ValueError: If there are no attempts or a provider is not configured.
+    """
+    if attempts < 1:
+        raise ValueError("There must be at least one attempt")
+
+    models: list[tuple[str, str]] = []
+    for entry in providers or [config.default_provider]:
+        provider, _, model = entry.partition(":")
+        if provider not in config.model_providers:
+            raise ValueError(f"Provider {provider!r} is not configured")
+        models.append((provider, model or config.model_providers[provider].model))
+
+    specs: list[AttemptSpec] = []
+    for index in range(attempts):
+        provider, model = models[index % len(models)]
+        if temperatures:
+            temperature = temperatures[index % len(temperatures)]
+        else:
+            base = config.model_providers[provider].temperature
+            top = max(base, 1.0)
+            step = (top - base) / (attempts - 1) if attempts > 1 else 0.0
+            temperature = round(base + step * index, 2)
+        specs.append(AttemptSpec(provider, model, temperature))
+    return specs
+
+
+def attempt_config(config: Config, spec: AttemptSpec) -> Config:
+    """A copy of the configuration that uses the attempt's model settings."""
+    result = copy.copy(config)
+    result.default_provider = spec.provider
+    result.model_providers = {
+        **config.model_providers,
+        spec.provider: replace(
+            config.model_providers[spec.provider],
+            model=spec.model,
+            temperature=spec.temperature,
+        ),
+    }
+    # Step summaries of N agents at once would only add LLM calls
+    result.enable_lakeview = False
+    return result
+
+
+async def verify_patch(
+    project_path: str, command: str, timeout: float
+) -> tuple[bool, str]:
+    """Run a shell command in a project and report whether it exited with 0.
+
+    Returns:
+        Whether the command passed, and the end of its combined output.
+    """
+    process = await asyncio.create_subprocess_shell(
+        command,
+        cwd=project_path,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        # Its own process group, so a timeout kills the whole test run
+        start_new_session=True,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill_process_group(process)
+        return False, f"Timed out after {timeout:g}s"
+    except asyncio.CancelledError:
+        await _kill_process_group(process)
+        raise
+    output = stdout.decode(errors="replace")
+    return process.returncode == 0, output[-VERIFY_OUTPUT_LIMIT:]
+
+
+async def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
+    _ = await process.wait()
+
+
+async def _run_attempt(
+    result: AttemptResult,
+    config: Config,
+    task: str,
+    fork_path: str,
+    base_commit: str,
+    trajectory_dir: Path,
+    http_client: httpx.Client,
+    must_patch: bool,
+    verify_command: str | None,
+    verify_timeout: float,
+) -> AttemptResult:
+    """Run one attempt in its fork and fill in its result."""
+    spec = AttemptSpec(result.provider, result.model, result.temperature)
+    result.trajectory_file = str(trajectory_dir / f"attempt-{result.attempt}.json")
+    agent: TraeAgent | None = None
+    start_time = time.time()
+    try:
+        agent = TraeAgent(attempt_config(config, spec), http_client)
+        _ = agent.setup_trajectory_recording(result.trajectory_file)
+        agent.new_task(
+            task,
+            {
+                "project_path": fork_path,
+                "issue": task,
+                "must_patch": "true" if must_patch else "false",
+            },
+        )
+        execution = await agent.execute_task()
+        result.success = execution.success
+        result.steps = len(execution.steps)
+
+        # A snapshot of the fork also picks up the files the agent created
+        final = await WorkspaceSnapshots(fork_path).create("final")
+        _, result.patch = await run_git(
+            fork_path, "diff", "--binary", base_commit, final.commit
+        )
+        result.patch_file = str(trajectory_dir / f"attempt-{result.attempt}.patch")
+        with open(result.patch_file, "w", encoding="utf-8") as f:
+            _ = f.write(result.patch)
+
+        if verify_command and result.success and result.patch.strip():
+            result.verified, result.verify_output = await verify_patch(
+                fork_path, verify_command, verify_timeout
+            )
+    except asyncio.CancelledError:
+        result.cancelled = True
+        raise
+    except Exception as e:
+        result.success = False
+        result.error = str(e)
+    finally:
+        result.execution_time = time.time() - start_time
+        if agent and agent.tools:
+            await agent.tool_caller.close_tools()
+    return result
+
+
+async def run_attempts(
+    config: Config,
+    task: str,
+    project_path: str,
+    specs: list[AttemptSpec],
+    trajectory_dir: str | Path,
+    verify_command: str | None = None,
+    verify_timeout: float = 600.0,
+    must_patch: bool = False,
+    on_result: Callable[[AttemptResult], None] | None = None,
+) -> BestOfNResult:
+    """Run one attempt per spec concurrently and pick the winning patch.
+
+    The winner is the first attempt to finish with an accepted patch; the
+    attempts still running are then cancelled. If no attempt is accepted, the
+    winner is the first one that completed with a non-empty patch, whose
+    `verified` flag tells whether it failed verification. The project itself is
+    never changed: apply the winner's patch to it.
+
+    Args:
+        config: Configuration shared by all attempts
+        task: The task to run
+        project_path: The git checkout to work on
+        specs: The model settings of each attempt
+        trajectory_dir: Directory for the per-attempt trajectories and patches
+        verify_command: Shell command run in an attempt's fork after it
+            completes; the patch is accepted if it exits with 0
+        verify_timeout: Seconds before the verification command is killed
+        must_patch: Whether an attempt must change files to complete
+        on_result: Called with each attempt as soon as it finishes
+
+    Raises:
+        GitError: If the project is not a git checkout or it cannot be forked.
+    """
+    trajectory_dir = Path(trajectory_dir)
+    trajectory_dir.mkdir(parents=True, exist_ok=True)
+    snapshots = WorkspaceSnapshots(project_path)
+    base = await snapshots.create(f"polli-attempts-{os.getpid()}")
+    # The project path relative to the checkout root is the same in each fork
+    relative_path = os.path.relpath(
+        os.path.abspath(project_path), await snapshots.root()
+    )
+    forks_dir = tempfile.mkdtemp(prefix="polli-attempts-")
+    forks: list[str] = []
+    results = [
+        AttemptResult(index, spec.provider, spec.model, spec.temperature)
+        for index, spec in enumerate(specs)
+    ]
+    winner: AttemptResult | None = None
+    # The attempts that ran to the end, in the order they finished
+    completed: list[AttemptResult] = []
+
+    try:
+        for index in range(len(specs)):
+            forks.append(
+                await snapshots.fork(
+                    os.path.join(forks_dir, f"attempt-{index}"), base.name
+                )
+            )
+        with create_shared_http_client(len(specs)) as http_client:
+            pending = {
+                asyncio.create_task(
+                    _run_attempt(
+                        result,
+                        config,
+                        task,
+                        os.path.normpath(os.path.join(fork, relative_path)),
+                        base.commit,
+                        trajectory_dir,
+                        http_client,
+                        must_patch,
+                        verify_command,
+                        verify_timeout,
+                    )
+                )
+                for result, fork in zip(results, forks, strict=True)
+            }
+            try:
+                while pending and winner is None:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for finished in done:
+                        result = finished.result()
+                        completed.append(result)
+                        if on_result:
+                            on_result(result)
+                        if winner is None and result.accepted:
+                            winner = result
+            finally:
+                for attempt_task in pending:
+                    _ = attempt_task.cancel()
+                _ = await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        for fork in forks:
+            with contextlib.suppress(GitError):
+                await snapshots.remove_fork(fork)
+        shutil.rmtree(forks_dir, ignore_errors=True)
+        with contextlib.suppress(GitError):
+            await snapshots.delete(base.name)
+
+    if winner is None:
+        winner = next(
+            (result for result in completed if result.success and result.patch.strip()),
+            None,
+        )
+    return BestOfNResult(winner=winner, attempts=results)
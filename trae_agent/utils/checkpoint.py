@@ -0,0 +1,273 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+# TODO: remove these annotations by defining fine-grained types
+# pyright: reportAny=false
+# pyright: reportExplicitAny=false
+
+"""Crash-safe checkpoints of a run, to resume it from its last completed step.
+
+A checkpoint is an append-only JSON lines file. The first line holds the task
+and its initial messages, and each completed step appends only what it added:
+
+    {"type":"task","task":...,"extra_args":{...},"tools":[...],"messages":[...]}
+    {"type":"step","step_number":1,"response":{...},"messages":[...],"total_tokens":{...},"tool_states":{...}}
+    {"type":"done","success":true,"final_result":...}
+
+`messages` of a step are the ones sent with the next LLM request, such as the
+tool results, and `tool_states` has the state of the tools called in the step
+that the chat history does not hold, like the bash working directory. A list
+in a tool state holds only the items added since the previous state, such as
+new thoughts, and is appended to the lists of the earlier steps. Every
+line is flushed to disk before the next step starts, and a line cut short by a
+crash is ignored when the checkpoint is loaded.
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from ..tools.base import ToolCall, ToolResult
+from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+
+CHECKPOINT_VERSION = 1
+
+
+def _compact(data: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def serialize_message(message: LLMMessage) -> dict[str, Any]:
+    """Serialize a message, leaving out empty fields."""
+    data: dict[str, Any] = {"role": message.role, "content": message.content}
+    if message.tool_call:
+        data["tool_call"] = _compact(asdict(message.tool_call))
+    if message.tool_result:
+        # The duration is a measurement, not part of the conversation
+        data["tool_result"] = _compact(asdict(message.tool_result) | {"duration": None})
+    return _compact(data)
+
+
+def deserialize_message(data: dict[str, Any]) -> LLMMessage:
+    """Parse a message written by serialize_message."""
+    tool_call = data.get("tool_call")
+    tool_result = data.get("tool_result")
+    return LLMMessage(
+        role=data["role"],
+        content=data.get("content"),
+        tool_call=ToolCall(**tool_call) if tool_call else None,
+        tool_result=ToolResult(**tool_result) if tool_result else None,
+    )
+
+
+def response_messages(response: dict[str, Any]) -> list[LLMMessage]:
+    """The assistant messages of a checkpointed response, as the LLM cache keeps them."""
+    messages: list[LLMMessage] = []
+    if response.get("content"):
+        messages.append(LLMMessage(role="assistant", content=response["content"]))
+    messages.extend(
+        LLMMessage(role="assistant", tool_call=ToolCall(**tool_call))
+        for tool_call in response.get("tool_calls") or []
+    )
+    return messages
+
+
+@dataclass
+class Checkpoint:
+    """The state of a run at its last completed step."""
+
+    task: str
+    extra_args: dict[str, str]
+    provider: str
+    model: str
+    tool_names: list[str]
+    # Chat history up to and including the last completed step's response
+    history: list[LLMMessage]
+    # Messages to send with the next LLM request
+    pending_messages: list[LLMMessage]
+    # 0 if no step completed
+    step_number: int = 0
+    total_tokens: LLMUsage | None = None
+    # Latest state of each tool, by tool name, with its lists in full
+    tool_states: dict[str, dict[str, Any]] = field(default_factory=dict)
+    finished: bool = False
+    # Bytes of the file up to the last complete line
+    size: int = 0
+
+
+def _merge_tool_state(state: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
+    """Apply the state of a later step: lists grow, other values are replaced."""
+    merged = {**state, **update}
+    for key, value in update.items():
+        if isinstance(value, list) and isinstance(state.get(key), list):
+            merged[key] = state[key] + value
+    return merged
+
+
+def load_checkpoint(path: str | Path) -> Checkpoint:
+    """Load a checkpoint written by StepCheckpointer.
+
+    Raises:
+        ValueError: If the file does not start with a task record.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    records: list[dict[str, Any]] = []
+    size = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break  # Cut short by a crash
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            break
+        size += len(line)
+
+    if not records or records[0].get("type") != "task":
+        raise ValueError(f"{path} is not a checkpoint: it has no task record")
+    header = records[0]
+    if header.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(
+            f"Unsupported checkpoint version {header.get('version')} in {path}"
+        )
+
+    checkpoint = Checkpoint(
+        task=header["task"],
+        extra_args=header.get("extra_args") or {},
+        provider=header.get("provider") or "",
+        model=header.get("model") or "",
+        tool_names=header.get("tools") or [],
+        history=[],
+        pending_messages=[deserialize_message(m) for m in header["messages"]],
+        size=size,
+    )
+    for record in records[1:]:
+        if record.get("type") == "done":
+            checkpoint.finished = True
+        elif record.get("type") == "step":
+            checkpoint.history.extend(checkpoint.pending_messages)
+            checkpoint.history.extend(response_messages(record["response"]))
+            checkpoint.pending_messages = [
+                deserialize_message(m) for m in record["messages"]
+            ]
+            checkpoint.step_number = record["step_number"]
+            usage = record.get("total_tokens")
+            checkpoint.total_tokens = LLMUsage(**usage) if usage else None
+            for name, state in (record.get("tool_states") or {}).items():
+                checkpoint.tool_states[name] = _merge_tool_state(
+                    checkpoint.tool_states.get(name, {}), state
+                )
+    return checkpoint
+
+
+class StepCheckpointer:
+    """Appends a record of each completed step to a checkpoint file."""
+
+    def __init__(self, path: str | Path):
+        self.path: Path = Path(path)
+        # Seconds spent writing and syncing records
+        self.write_time: float = 0.0
+        self._file: BinaryIO | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._file is not None
+
+    def start(
+        self,
+        task: str,
+        extra_args: dict[str, str],
+        provider: str,
+        model: str,
+        tool_names: list[str],
+        messages: list[LLMMessage],
+    ) -> None:
+        """Start a new checkpoint, replacing any earlier one at the path."""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")  # noqa: SIM115, kept open across steps
+        self._write(
+            {
+                "type": "task",
+                "version": CHECKPOINT_VERSION,
+                "task": task,
+                "extra_args": extra_args,
+                "provider": provider,
+                "model": model,
+                "tools": tool_names,
+                "messages": [serialize_message(m) for m in messages],
+            }
+        )
+
+    def resume(self, checkpoint: Checkpoint) -> None:
+        """Continue appending to a loaded checkpoint, dropping a torn last line."""
+        self.close()
+        self._file = open(self.path, "r+b")  # noqa: SIM115
+        _ = self._file.truncate(checkpoint.size)
+        _ = self._file.seek(checkpoint.size)
+
+    def write_step(
+        self,
+        step_number: int,
+        response: LLMResponse,
+        messages: list[LLMMessage],
+        total_tokens: LLMUsage | None,
+        tool_states: dict[str, dict[str, Any]],
+    ) -> None:
+        """Record a completed step.
+
+        Args:
+            step_number: The number of the step
+            response: The LLM response of the step
+            messages: The messages for the next LLM request
+            total_tokens: Token usage of the run so far
+            tool_states: State of the tools called in the step, by tool name
+        """
+        self._write(
+            _compact(
+                {
+                    "type": "step",
+                    "step_number": step_number,
+                    "response": _compact(
+                        {
+                            "content": response.content or None,
+                            "tool_calls": [
+                                _compact(asdict(tool_call))
+                                for tool_call in response.tool_calls
+                            ]
+                            if response.tool_calls
+                            else None,
+                        }
+                    ),
+                    "messages": [serialize_message(m) for m in messages],
+                    "total_tokens": asdict(total_tokens) if total_tokens else None,
+                    "tool_states": tool_states or None,
+                }
+            )
+        )
+
+    def finish(self, success: bool, final_result: str | None) -> None:
+        """Mark the run as finished, so it is not resumed."""
+        self._write({"type": "done", "success": success, "final_result": final_result})
+        self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record: dict[str, Any]) -> None:
+        if self._file is None:
+            raise ValueError("The checkpoint has not been started")
+        start_time = time.perf_counter()
+        line = json.dumps(
+            record, separators=(",", ":"), ensure_ascii=False, default=str
+        )
+        _ = self._file.write(line.encode("utf-8") + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.write_time += time.perf_counter() - start_time
@@ -2,6 +2,8 @@
 # SPDX-License-Identifier: MIT
 
 import asyncio
+import functools
+import statistics
 from dataclasses import dataclass
 
 from rich.console import Console, Group
@@ -11,7 +13,7 @@ from rich.table import Table
 
 from ..agent.agent_basics import AgentExecution, AgentState, AgentStep
 from .config import Config, LakeviewConfig
-from .lake_view import LakeView
+from .lake_view import LakeView, LakeViewPipeline
 
 AGENT_STATE_INFO = {
     AgentState.THINKING: ("blue", "🤔"),
@@ -23,6 +25,12 @@ AGENT_STATE_INFO = {
 }
 
 
+def _percentile(values: list[float], percentile: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percentile - 1]
+
+
 @dataclass
 class ConsoleStep:
     panel: Panel
@@ -30,14 +38,33 @@ class ConsoleStep:
     lake_view_generator_done: bool = False
 
 
+@dataclass
+class LakeViewPanelEvent:
+    """A Lakeview summary is ready, or None if the step was not summarized."""
+
+    step_number: int
+    panel: Panel | None
+
+
+ConsoleEvent = AgentStep | AgentExecution | LakeViewPanelEvent
+
+
 class CLIConsole:
-    """Console for displaying agent progress."""
+    """Console for displaying agent progress.
 
-    def __init__(self, config: Config | None):
+    update_status queues the agent's updates and start renders them as soon
+    as they arrive. A step's panel is only rebuilt when the step changes, and
+    finished steps older than the last max_live_steps are printed once above
+    the live display, so a refresh costs the same whatever the step count.
+    """
+
+    def __init__(self, config: Config | None, max_live_steps: int = 5):
         """Initialize the CLI console. Enable lakeview if config is provided and enable_lakeview is True."""
         self.console: Console = Console()
         self.live_display: Live | None = None
         self.config: Config | None = config
+        self.max_live_steps: int = max_live_steps
+        # Finished steps still in the live display, oldest first
         self.console_steps: dict[int, ConsoleStep] = {}
         self.lakeview_config: LakeviewConfig | None = (
             config.lakeview_config
@@ -45,11 +72,22 @@ class CLIConsole:
             else None
         )
         self.lake_view: LakeView | None = (
-            LakeView(config) if config is not None and config.enable_lakeview else None
+            LakeView(config)
+            if config is not None and self.lakeview_config is not None
+            else None
+        )
+        # Lakeview summaries are produced in the background, off the agent's path
+        self.lakeview_pipeline: LakeViewPipeline | None = (
+            LakeViewPipeline.from_config(self.lake_view, self.lakeview_config)
+            if self.lake_view is not None and self.lakeview_config is not None
+            else None
         )
 
-        self.agent_step_history: list[AgentStep] = []
+        self.current_step: AgentStep | None = None
+        self.current_panel: Panel | None = None
         self.agent_execution: AgentExecution | None = None
+        self._events: asyncio.Queue[ConsoleEvent] = asyncio.Queue()
+        self._dirty: bool = False
 
     def update_status(
         self,
@@ -57,34 +95,84 @@ class CLIConsole:
         agent_execution: AgentExecution | None = None,
     ):
         if agent_step:
-            if len(self.agent_step_history) > 0:
-                if agent_step.step_number > self.agent_step_history[-1].step_number:
-                    self.agent_step_history.append(agent_step)
-            else:
-                self.agent_step_history.append(agent_step)
-
-        self.agent_execution = agent_execution
+            self._events.put_nowait(agent_step)
+        if agent_execution:
+            self._events.put_nowait(agent_execution)
 
     async def start(self):
-        while True:
-            if self.agent_execution and (
-                self.lake_view is None
-                or (
-                    len(self.agent_execution.steps) == len(self.console_steps)
-                    and all(
-                        step.lake_view_generator_done
-                        for step in self.console_steps.values()
-                    )
-                )
+        """Render the queued updates until the execution and its summaries are shown."""
+        try:
+            while True:
+                self._handle_event(await self._events.get())
+                # A burst of updates is rendered once
+                while not self._events.empty():
+                    self._handle_event(self._events.get_nowait())
+                if self._dirty:
+                    self.print_task_progress()
+                if self.agent_execution is not None and all(
+                    step.lake_view_generator_done
+                    for step in self.console_steps.values()
+                ):
+                    break
+        finally:
+            if self.live_display is not None:
+                self.live_display.stop()
+                self.live_display = None
+            if self.lakeview_pipeline is not None:
+                await self.lakeview_pipeline.close()
+
+    def _handle_event(self, event: ConsoleEvent) -> None:
+        if isinstance(event, AgentStep):
+            current_step = self.current_step
+            if (
+                current_step is not None
+                and event.step_number < current_step.step_number
             ):
-                break
-            self.print_task_progress()
-            await asyncio.sleep(3)
+                return
+            if (
+                current_step is not None
+                and event.step_number > current_step.step_number
+            ):
+                self._finish_step(current_step)
+            self.current_step = event
+            self.current_panel = self._create_step_display(event)
+        elif isinstance(event, AgentExecution):
+            if self.current_step is not None:
+                self._finish_step(self.current_step)
+                self.current_step = self.current_panel = None
+            self.agent_execution = event
+        else:
+            console_step = self.console_steps.get(event.step_number)
+            if console_step is None:
+                return
+            if event.panel is not None:
+                console_step.panel = event.panel
+            console_step.lake_view_generator_done = True
+        self._dirty = True
+
+    def _finish_step(self, agent_step: AgentStep) -> None:
+        """Collapse a finished step and start its Lakeview summary."""
+        lake_view_panel_generator = None
+        if self.lakeview_pipeline is not None:
+            lake_view_panel_generator = asyncio.create_task(
+                self._create_lakeview_step_display(agent_step)
+            )
+            lake_view_panel_generator.add_done_callback(
+                functools.partial(self._lakeview_panel_done, agent_step.step_number)
+            )
+        self.console_steps[agent_step.step_number] = ConsoleStep(
+            self._create_compact_step_display(agent_step),
+            lake_view_panel_generator,
+            lake_view_panel_generator is None,
+        )
 
-        self.print_task_progress()
-        if self.live_display is not None:
-            self.live_display.stop()
-            self.live_display = None
+    def _lakeview_panel_done(
+        self, step_number: int, task: asyncio.Task[Panel | None]
+    ) -> None:
+        panel = None
+        if not task.cancelled() and task.exception() is None:
+            panel = task.result()
+        self._events.put_nowait(LakeViewPanelEvent(step_number, panel))
 
     def print_task_details(
         self,
@@ -155,10 +243,10 @@ class CLIConsole:
     async def _create_lakeview_step_display(
         self, agent_step: AgentStep
     ) -> Panel | None:
-        if self.lake_view is None:
+        if self.lakeview_pipeline is None:
             return None
 
-        lake_view_step = await self.lake_view.create_lakeview_step(agent_step)
+        lake_view_step = await self.lakeview_pipeline.submit(agent_step)
 
         if lake_view_step is None:
             return None
@@ -230,64 +318,24 @@ class CLIConsole:
             width=80,
         )
 
+    def _scroll_back(self) -> None:
+        """Print the oldest finished steps above the live display, in order."""
+        while len(self.console_steps) > self.max_live_steps:
+            step_number, console_step = next(iter(self.console_steps.items()))
+            # Steps waiting for Lakeview stay, which the pipeline's queue bounds
+            if not console_step.lake_view_generator_done:
+                break
+            del self.console_steps[step_number]
+            self.console.print(console_step.panel)
+
     def create_agent_steps_display(self) -> Group:
-        panels: list[Panel] = []
-        if self.agent_execution is None:
-            previous_steps = (
-                self.agent_step_history[:-1]
-                if len(self.agent_step_history) >= 2
-                else []
-            )
-            current_step = (
-                self.agent_step_history[-1]
-                if len(self.agent_step_history) > 0
-                else None
-            )
-        else:
-            previous_steps = self.agent_step_history
-            current_step = None
-        if len(previous_steps) > 0:
-            for step in previous_steps:
-                step_id = step.step_number
-                if step_id not in self.console_steps:
-                    panel = self._create_compact_step_display(step)
-                    if self.lake_view is not None:
-                        lake_view_panel_generator = asyncio.create_task(
-                            self._create_lakeview_step_display(step)
-                        )
-                    else:
-                        lake_view_panel_generator = None
-                    self.console_steps[step_id] = ConsoleStep(
-                        panel, lake_view_panel_generator
-                    )
-                    panels.append(panel)
-                else:
-                    console_step = self.console_steps[step_id]
-                    if self.lake_view is None:
-                        panels.append(console_step.panel)
-                    else:
-                        if console_step.lake_view_panel_generator is not None:
-                            if console_step.lake_view_panel_generator.done():
-                                lake_view_panel = (
-                                    console_step.lake_view_panel_generator.result()
-                                    or console_step.panel
-                                )
-                                panels.append(lake_view_panel)
-                                self.console_steps[step_id] = ConsoleStep(
-                                    lake_view_panel, None, True
-                                )
-                            else:
-                                panels.append(console_step.panel)
-                        else:
-                            panels.append(console_step.panel)
-
-        if current_step is not None:
-            panels.append(self._create_step_display(current_step))
-        # reorder panels
-        panels = panels[::-1]
+        panels = [console_step.panel for console_step in self.console_steps.values()]
+        if self.current_panel is not None:
+            panels.append(self.current_panel)
         return Group(*panels, fit=False)
 
     def print_task_progress(self) -> None:
+        self._scroll_back()
         if self.agent_execution is not None:
             render_group: Group = Group(
                 self.create_agent_steps_display(),
@@ -298,10 +346,13 @@ class CLIConsole:
             render_group = self.create_agent_steps_display()
 
         if self.live_display is None:
-            self.live_display = Live(render_group, refresh_per_second=10)
-            self.live_display.start()
+            self.live_display = Live(
+                render_group, console=self.console, auto_refresh=False
+            )
+            self.live_display.start(refresh=True)
         else:
-            self.live_display.update(render_group)
+            self.live_display.update(render_group, refresh=True)
+        self._dirty = False
 
     def create_execution_summary(self, execution: AgentExecution) -> Group:
         """Display a summary of the agent execution."""
@@ -327,6 +378,22 @@ class CLIConsole:
             table.add_row("Input Tokens", str(execution.total_tokens.input_tokens))
             table.add_row("Output Tokens", str(execution.total_tokens.output_tokens))
 
+            cache_read = execution.total_tokens.cache_read_input_tokens
+            cache_creation = execution.total_tokens.cache_creation_input_tokens
+            if cache_read or cache_creation:
+                table.add_row("Cache Read Tokens", str(cache_read))
+                table.add_row("Cache Write Tokens", str(cache_creation))
+                if execution.total_tokens.input_tokens:
+                    table.add_row(
+                        "Cache Hit Rate",
+                        f"{cache_read / execution.total_tokens.input_tokens:.1%}",
+                    )
+
+        renderables: list[Panel | Table] = [table]
+        latency_table = self.create_latency_table(execution)
+        if latency_table is not None:
+            renderables.append(latency_table)
+
         # Display final result
         if execution.final_result:
             panel = Panel(
@@ -334,6 +401,56 @@ class CLIConsole:
                 title="Final Result",
                 border_style="green" if execution.success else "red",
             )
-            return Group(panel, table)
-        else:
-            return Group(table)
+            renderables.insert(0, panel)
+        return Group(*renderables)
+
+    def create_latency_table(self, execution: AgentExecution) -> Table | None:
+        """Tabulate the per-step latency breakdown with percentiles."""
+        if not execution.steps:
+            return None
+
+        rows: dict[str, list[float]] = {
+            "Step": [step.timings.total_time for step in execution.steps],
+            "LLM": [step.timings.llm_time for step in execution.steps],
+            "Time to First Token": [
+                step.timings.time_to_first_token
+                for step in execution.steps
+                if step.timings.time_to_first_token is not None
+            ],
+            "Retry Wait": [step.timings.retry_wait_time for step in execution.steps],
+            "Tools": [
+                sum(step.timings.tool_durations.values())
+                for step in execution.steps
+                if step.timings.tool_durations
+            ],
+        }
+        # One row per tool, over its individual calls
+        for step in execution.steps:
+            for tool_result in step.tool_results or []:
+                if tool_result.duration is not None:
+                    rows.setdefault(f"  {tool_result.name}", []).append(
+                        tool_result.duration
+                    )
+        rows["Trajectory Writes"] = [
+            step.timings.recorder_time for step in execution.steps
+        ]
+        rows["Console Updates"] = [
+            step.timings.console_time for step in execution.steps
+        ]
+
+        table = Table(title="Step Latency (seconds)", width=90)
+        table.add_column("Phase", style="cyan", width=32)
+        for column in ("Count", "Total", "p50", "p95", "Max"):
+            table.add_column(column, style="green", justify="right")
+        for phase, values in rows.items():
+            if not values or not any(values):
+                continue
+            table.add_row(
+                phase,
+                str(len(values)),
+                f"{sum(values):.3f}",
+                f"{_percentile(values, 50):.3f}",
+                f"{_percentile(values, 95):.3f}",
+                f"{max(values):.3f}",
+            )
+        return table
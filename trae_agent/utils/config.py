@@ -10,7 +10,7 @@
 
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, override
 
@@ -32,6 +32,9 @@ class ModelParameters:
     api_version: str | None = None
     candidate_count: int | None = None  # Gemini specific field
     stop_sequences: list[str] | None = None
+    enable_prompt_caching: bool = True
+    # Ask for a JSON object, on providers with a JSON output mode
+    json_mode: bool = False
 
 
 @dataclass
@@ -40,6 +43,50 @@ class LakeviewConfig:
 
     model_provider: str
     model_name: str
+    # Steps are summarized by this many background workers. When more than
+    # max_queue_size steps are waiting, the oldest one is dropped
+    # ("drop_oldest") or the new one is skipped ("skip_new").
+    workers: int = 2
+    max_queue_size: int = 8
+    overflow_policy: str = "drop_oldest"
+    # Each request shows the latest context_window_steps steps verbatim and a
+    # one-line summary of older ones, in about context_max_tokens tokens
+    context_window_steps: int = 3
+    context_max_tokens: int = 2000
+
+
+@dataclass
+class LLMCacheConfig:
+    """Configuration for the disk-backed LLM response cache."""
+
+    path: str
+    max_size_mb: int = 512
+    read_only: bool = False
+
+
+@dataclass
+class TracingConfig:
+    """Configuration for exporting trace spans, to a file or an OTLP endpoint."""
+
+    exporter: str = "file"
+    path: str = "traces.jsonl"
+    endpoint: str | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+    service_name: str = "polli-agent"
+
+
+@dataclass
+class DelegationConfig:
+    """Configuration for the sub-agents started by the delegate tool."""
+
+    max_steps: int = 8
+    # Sub-tasks one delegate call may start, all running in parallel
+    max_subtasks: int = 4
+    # Each sub-agent's answer is cut to this many characters for the main agent
+    summary_max_chars: int = 2000
+    # The main agent's provider and model if not set, e.g. a cheaper model
+    model_provider: str | None = None
+    model_name: str | None = None
 
 
 @dataclass
@@ -50,7 +97,13 @@ class Config:
     max_steps: int
     model_providers: dict[str, ModelParameters]
     lakeview_config: LakeviewConfig | None = None
+    llm_cache_config: LLMCacheConfig | None = None
+    tracing_config: TracingConfig | None = None
     enable_lakeview: bool = True
+    enable_observation_dedup: bool = True
+    enable_workspace_snapshots: bool = False
+    enable_delegation: bool = False
+    delegation_config: DelegationConfig = field(default_factory=DelegationConfig)
 
     def __init__(self, config_or_config_file: str | dict = "trae_config.json"):
         # Accept either file path or direct config dict
@@ -74,6 +127,13 @@ class Config:
         self.max_steps = self._config.get("max_steps", 20)
         self.model_providers = {}
         self.enable_lakeview = self._config.get("enable_lakeview", True)
+        self.enable_observation_dedup = self._config.get(
+            "enable_observation_dedup", True
+        )
+        self.enable_workspace_snapshots = self._config.get(
+            "enable_workspace_snapshots", False
+        )
+        self.enable_delegation = self._config.get("enable_delegation", False)
 
         if len(self._config.get("model_providers", [])) == 0:
             self.model_providers = {
@@ -118,20 +178,72 @@ class Config:
                     stop_sequences=provider_config.get("stop_sequences")
                     if "stop_sequences" in provider_config
                     else None,
+                    enable_prompt_caching=bool(
+                        provider_config.get("enable_prompt_caching", True)
+                    ),
                 )
 
         if "lakeview_config" in self._config:
+            lakeview: dict[str, Any] = self._config.get("lakeview_config", {})
             self.lakeview_config = LakeviewConfig(
-                model_provider=str(
-                    self._config.get("lakeview_config", {}).get(
-                        "model_provider", "anthropic"
-                    )
-                ),
-                model_name=str(
-                    self._config.get("lakeview_config", {}).get(
-                        "model_name", "claude-sonnet-4-20250514"
-                    )
-                ),
+                model_provider=str(lakeview.get("model_provider", "anthropic")),
+                model_name=str(lakeview.get("model_name", "claude-sonnet-4-20250514")),
+                workers=int(lakeview.get("workers", 2)),
+                max_queue_size=int(lakeview.get("max_queue_size", 8)),
+                overflow_policy=str(lakeview.get("overflow_policy", "drop_oldest")),
+                context_window_steps=int(lakeview.get("context_window_steps", 3)),
+                context_max_tokens=int(lakeview.get("context_max_tokens", 2000)),
+            )
+            if self.lakeview_config.overflow_policy not in ("drop_oldest", "skip_new"):
+                raise ValueError(
+                    f"Unsupported Lakeview overflow policy: {self.lakeview_config.overflow_policy}"
+                )
+            if self.lakeview_config.workers < 1:
+                raise ValueError("Lakeview needs at least one worker")
+            if self.lakeview_config.context_window_steps < 1:
+                raise ValueError("Lakeview's context window needs at least one step")
+
+        delegation: dict[str, Any] = self._config.get("delegation", {})
+        self.delegation_config = DelegationConfig(
+            max_steps=int(delegation.get("max_steps", 8)),
+            max_subtasks=int(delegation.get("max_subtasks", 4)),
+            summary_max_chars=int(delegation.get("summary_max_chars", 2000)),
+            model_provider=str(delegation["model_provider"])
+            if "model_provider" in delegation
+            else None,
+            model_name=str(delegation["model_name"])
+            if "model_name" in delegation
+            else None,
+        )
+        if (
+            self.delegation_config.model_provider is not None
+            and self.delegation_config.model_provider not in self.model_providers
+        ):
+            raise ValueError(
+                f"Delegation provider {self.delegation_config.model_provider} is not configured"
+            )
+
+        if "llm_cache" in self._config:
+            llm_cache: dict[str, Any] = self._config.get("llm_cache", {})
+            self.llm_cache_config = LLMCacheConfig(
+                path=str(llm_cache.get("path", ".polli_cache/llm_responses.sqlite")),
+                max_size_mb=int(llm_cache.get("max_size_mb", 512)),
+                read_only=bool(llm_cache.get("read_only", False)),
+            )
+
+        if "tracing" in self._config:
+            tracing: dict[str, Any] = self._config.get("tracing", {})
+            self.tracing_config = TracingConfig(
+                exporter=str(tracing.get("exporter", "file")),
+                path=str(tracing.get("path", "traces.jsonl")),
+                endpoint=str(tracing.get("endpoint"))
+                if "endpoint" in tracing
+                else None,
+                headers={
+                    str(key): str(value)
+                    for key, value in tracing.get("headers", {}).items()
+                },
+                service_name=str(tracing.get("service_name", "polli-agent")),
             )
 
         return
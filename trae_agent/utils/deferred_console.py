@@ -0,0 +1,27 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""A rich console that is only built when it is first used."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+
+class DeferredConsole:
+    """Stands in for a module-level `rich.console.Console`.
+
+    Importing rich and probing the terminal is a large part of the CLI's
+    startup time, so commands that print nothing, and `--help`, skip it.
+    """
+
+    def __init__(self):
+        self._console: "Console | None" = None
+
+    def __getattr__(self, name: str) -> object:
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return getattr(self._console, name)
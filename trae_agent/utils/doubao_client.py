@@ -5,10 +5,9 @@
 
 import json
 import os
-import random
-import time
 from typing import override
 
+import httpx
 import openai
 from openai.types.chat import (
     ChatCompletionAssistantMessageParam,
@@ -28,14 +27,17 @@ from openai.types.shared_params.function_definition import FunctionDefinition
 from ..tools.base import Tool, ToolCall
 from .base_client import BaseLLMClient
 from .config import ModelParameters
-from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+from .llm_basics import LLMMessage, LLMResponse
+from .openai_compat import dump_tool_arguments, parse_completion_usage, sort_tools
 
 
 class DoubaoClient(BaseLLMClient):
     """Doubao client wrapper with tool schema generation."""
 
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         if self.api_key == "":
             self.api_key: str = os.getenv("DOUBAO_API_KEY", "")
@@ -60,7 +62,7 @@ class DoubaoClient(BaseLLMClient):
         #     raise ValueError("Doubao API version not provided. ")
 
         self.client: openai.OpenAI = openai.OpenAI(
-            base_url=self.base_url, api_key=self.api_key
+            base_url=self.base_url, api_key=self.api_key, http_client=self.http_client
         )
         self.message_history: list[ChatCompletionMessageParam] = []
 
@@ -96,7 +98,7 @@ class DoubaoClient(BaseLLMClient):
                     ),
                     type="function",
                 )
-                for tool in tools
+                for tool in sort_tools(tools)
             ]
 
         response = None
@@ -110,13 +112,15 @@ class DoubaoClient(BaseLLMClient):
                     temperature=model_parameters.temperature,
                     top_p=model_parameters.top_p,
                     max_tokens=model_parameters.max_tokens,
+                    response_format={"type": "json_object"}
+                    if model_parameters.json_mode
+                    else openai.NOT_GIVEN,
                     n=1,
                 )
                 break
             except Exception as e:
                 error_message += f"Error {i + 1}: {str(e)}\n"
-                # Randomly sleep for 3-30 seconds
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -145,12 +149,7 @@ class DoubaoClient(BaseLLMClient):
             tool_calls=tool_calls,
             finish_reason=choice.finish_reason,
             model=response.model,
-            usage=LLMUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens,
-            )
-            if response.usage
-            else None,
+            usage=parse_completion_usage(response.usage) if response.usage else None,
         )
 
         # update message history
@@ -164,7 +163,7 @@ class DoubaoClient(BaseLLMClient):
                             id=tool_call.call_id,
                             function=Function(
                                 name=tool_call.name,
-                                arguments=json.dumps(tool_call.arguments),
+                                arguments=dump_tool_arguments(tool_call.arguments),
                             ),
                             type="function",
                         )
@@ -206,7 +205,8 @@ class DoubaoClient(BaseLLMClient):
                             {
                                 "name": msg.tool_call.name,
                                 "arguments": msg.tool_call.arguments,
-                            }
+                            },
+                            sort_keys=True,
                         ),
                         role="function",
                         name=msg.tool_call.name,
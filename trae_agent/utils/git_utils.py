@@ -0,0 +1,141 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Git commands for a project, without changing the process working directory.
+
+Every command runs as `git -C <project_path>` in an async subprocess, so any
+number of agents in one process can query their own checkouts concurrently.
+"""
+
+import asyncio
+import os
+
+# Changes to tests are left out of the patch a task is judged by, so they do not
+# disturb the repository's tests during acceptance testing. These match the
+# paths the test-patch filter of aider-swe-bench drops: test directories, any
+# path containing `test_`, and tox.ini.
+TEST_EXCLUDE_PATHSPECS: tuple[str, ...] = (
+    ":(exclude,glob)**/test/**",
+    ":(exclude,glob)**/tests/**",
+    ":(exclude,glob)**/testing/**",
+    ":(exclude)*test_*",
+    ":(exclude,glob)**/tox.ini",
+)
+
+
+class GitError(Exception):
+    """A git command failed or git is not available."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message: str = message
+
+
+async def _run(
+    project_path: str, args: tuple[str, ...], env: dict[str, str] | None
+) -> tuple[int, str, str]:
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            "-C",
+            project_path,
+            "--no-pager",
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, **env} if env else None,
+        )
+    except OSError as e:
+        raise GitError(f"Cannot run git: {e}") from e
+    stdout, stderr = await process.communicate()
+    return (
+        process.returncode or 0,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace"),
+    )
+
+
+async def run_git(
+    project_path: str, *args: str, env: dict[str, str] | None = None
+) -> tuple[int, str]:
+    """Run a git command in a project.
+
+    Args:
+        project_path: Directory inside the checkout
+        args: The git command and its arguments
+        env: Environment variables to add, such as GIT_INDEX_FILE
+
+    Returns:
+        The exit code and the decoded standard output.
+
+    Raises:
+        GitError: If git cannot be started.
+    """
+    returncode, stdout, _ = await _run(project_path, args, env)
+    return returncode, stdout
+
+
+async def git_output(
+    project_path: str, *args: str, env: dict[str, str] | None = None
+) -> str:
+    """Run a git command that must succeed, and return its stripped output.
+
+    Raises:
+        GitError: If git cannot be started or the command fails.
+    """
+    returncode, stdout, stderr = await _run(project_path, args, env)
+    if returncode != 0:
+        raise GitError(
+            f"git {' '.join(args[:2])} failed: {stderr.strip() or f'exit code {returncode}'}"
+        )
+    return stdout.strip()
+
+
+def _diff_args(
+    base_commit: str | None, exclude_tests: bool, quiet: bool = False
+) -> list[str]:
+    args = ["diff", "--quiet"] if quiet else ["diff"]
+    # Without a base commit, the uncommitted changes; with one, the commits since
+    if base_commit:
+        args += [base_commit, "HEAD"]
+    if exclude_tests:
+        args += ["--", *TEST_EXCLUDE_PATHSPECS]
+    return args
+
+
+async def git_diff(
+    project_path: str, base_commit: str | None = None, exclude_tests: bool = False
+) -> str:
+    """The diff of a project, or an empty string if it is not a git checkout.
+
+    Args:
+        project_path: Directory inside the checkout
+        base_commit: Diff the commits since this one instead of the worktree
+        exclude_tests: Leave out changes to test files
+    """
+    if not os.path.isdir(project_path):
+        return ""
+    try:
+        returncode, stdout = await run_git(
+            project_path, *_diff_args(base_commit, exclude_tests)
+        )
+    except GitError:
+        return ""
+    return stdout if returncode == 0 else ""
+
+
+async def has_changes(
+    project_path: str, base_commit: str | None = None, exclude_tests: bool = False
+) -> bool:
+    """Whether git_diff would be non-empty, without building the diff."""
+    if not os.path.isdir(project_path):
+        return False
+    try:
+        returncode, _ = await run_git(
+            project_path, *_diff_args(base_commit, exclude_tests, quiet=True)
+        )
+    except GitError:
+        return False
+    # 1 means there are differences; anything else is no changes or an error
+    return returncode == 1
@@ -5,12 +5,11 @@
 
 import json
 import os
-import random
-import time
 import traceback
 import uuid
 from typing import override
 
+import httpx
 from google import genai
 from google.genai import types
 
@@ -23,8 +22,10 @@ from .llm_basics import LLMMessage, LLMResponse, LLMUsage
 class GoogleClient(BaseLLMClient):
     """Google Gemini client wrapper with tool schema generation."""
 
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         if self.api_key == "":
             google_api_key = os.getenv("GOOGLE_API_KEY")
@@ -36,6 +37,7 @@ class GoogleClient(BaseLLMClient):
                 "Google API key not provided. Set GOOGLE_API_KEY in environment variables or config file."
             )
 
+        # The genai SDK manages its own connections, so http_client is unused
         self.client = genai.Client(api_key=self.api_key)
         self.message_history: list[types.Content] = []
         self.system_instruction: str | None = None
@@ -74,6 +76,9 @@ class GoogleClient(BaseLLMClient):
             max_output_tokens=model_parameters.max_tokens,
             candidate_count=model_parameters.candidate_count or 1,
             stop_sequences=model_parameters.stop_sequences,
+            response_mime_type="application/json"
+            if model_parameters.json_mode
+            else None,
             system_instruction=current_system_instruction,
         )
 
@@ -109,7 +114,7 @@ class GoogleClient(BaseLLMClient):
             except Exception as e:
                 tb = traceback.format_exc()
                 error_message += f"Error {i + 1}: {str(e)}\nTraceback:\n{tb}\n"
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -0,0 +1,130 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Runs the tasks of an interactive session with one agent on one event loop."""
+
+import asyncio
+
+from ..agent import TraeAgent
+from ..agent.agent_basics import AgentExecution
+from ..tools.base import Tool, ToolExecutor
+from .llm_basics import LLMMessage
+
+# Bounds of the summary of a compacted task
+MAX_SUMMARY_ACTIONS = 30
+MAX_ACTION_CHARS = 200
+MAX_RESULT_CHARS = 2000
+
+
+def context_tokens(execution: AgentExecution) -> int:
+    """Input tokens of the last LLM request of an execution, i.e. its context size."""
+    for step in reversed(execution.steps):
+        if step.llm_response and step.llm_response.usage:
+            return step.llm_response.usage.input_tokens
+    return 0
+
+
+def summarize_execution(execution: AgentExecution) -> str:
+    """Summarize a finished task in a bounded assistant message."""
+    actions: list[str] = []
+    for step in execution.steps:
+        for tool_call in step.tool_calls or []:
+            if tool_call.name == "task_done":
+                continue
+            action = f"- {tool_call.name} {tool_call.arguments}"
+            if len(action) > MAX_ACTION_CHARS:
+                action = action[: MAX_ACTION_CHARS - 3] + "..."
+            actions.append(action)
+    omitted = len(actions) - MAX_SUMMARY_ACTIONS
+    if omitted > 0:
+        actions = [f"- ({omitted} earlier actions omitted)"] + actions[omitted:]
+
+    result = execution.final_result or ""
+    if len(result) > MAX_RESULT_CHARS:
+        result = result[: MAX_RESULT_CHARS - 3] + "..."
+    outcome = "I completed the task." if execution.success else "I did not finish."
+    return "\n".join(
+        [
+            "(The details of this task were compacted.) My actions were:",
+            *(actions or ["- none"]),
+            f"{outcome} {result}".strip(),
+        ]
+    )
+
+
+def compact_history(
+    system_prompt: str, tasks: list[tuple[str, AgentExecution]]
+) -> list[LLMMessage]:
+    """Replace the conversation of earlier tasks with one summary per task.
+
+    Args:
+        system_prompt: The agent's system prompt
+        tasks: The user message and the execution of each earlier task
+
+    Returns:
+        The compacted chat history.
+    """
+    history = [LLMMessage(role="system", content=system_prompt)]
+    for task_message, execution in tasks:
+        history.append(LLMMessage(role="user", content=task_message))
+        history.append(
+            LLMMessage(role="assistant", content=summarize_execution(execution))
+        )
+    return history
+
+
+class InteractiveSession:
+    """Runs tasks one after the other with the same agent, tools and event loop.
+
+    The bash session and the other tools are created once, so later tasks
+    skip their warm-up. With continue_history, each task continues the
+    conversation of the previous ones, and once the context passes
+    max_history_tokens the earlier tasks are compacted to a summary each.
+    """
+
+    def __init__(
+        self,
+        agent: TraeAgent,
+        continue_history: bool = False,
+        max_history_tokens: int = 60000,
+    ):
+        self.agent: TraeAgent = agent
+        self.continue_history: bool = continue_history
+        self.max_history_tokens: int = max_history_tokens
+        self.tools: list[Tool] = agent.create_tools()
+        # The user message and the execution of each task of the conversation
+        self.tasks: list[tuple[str, AgentExecution]] = []
+        self._runner: asyncio.Runner = asyncio.Runner()
+
+    def run_task(self, task: str, working_dir: str) -> AgentExecution:
+        """Run a task, continuing the conversation if enabled."""
+        extra_args = {"project_path": working_dir, "issue": task, "must_patch": "false"}
+        if self.continue_history and self.tasks:
+            history = None
+            if context_tokens(self.tasks[-1][1]) > self.max_history_tokens:
+                history = compact_history(self.agent.get_system_prompt(), self.tasks)
+            self.agent.follow_up_task(task, extra_args, self.tasks[-1][1], history)
+        else:
+            self.agent.new_task(task, extra_args, tools=self.tools)
+            self.tasks = []
+
+        task_message = self.agent.initial_messages[-1].content or ""
+        try:
+            execution = self._runner.run(self.agent.execute_task())
+        except BaseException:
+            # An interrupted conversation cannot be continued
+            self.tasks = []
+            raise
+        self.tasks.append((task_message, execution))
+        return execution
+
+    def new_conversation(self) -> None:
+        """Start the next task with a fresh conversation, keeping the tools."""
+        self.tasks = []
+
+    def close(self) -> None:
+        """Close the tools and the event loop."""
+        try:
+            self._runner.run(ToolExecutor(self.tools).close_tools())
+        finally:
+            self._runner.close()
@@ -0,0 +1,111 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Machine-readable progress of a run, as one JSON object per line.
+
+Used by `polli run --output jsonl` instead of the rich console. Events are
+written unbuffered, one write per line, to stdout or a socket:
+
+    {"event":"started","task":...,"provider":...,"model":...}
+    {"event":"step","step_number":1,"state":"thinking"}
+    {"event":"step","step_number":1,"state":"calling_tool","tool_calls":[...]}
+    {"event":"done","success":true,"steps":3,...}
+
+Step events have the fields of `AgentStep.to_event`, like the events of
+`polli serve`.
+"""
+
+import contextlib
+import json
+import os
+import socket
+import sys
+from typing import Any, BinaryIO
+
+from ..agent.agent_basics import AgentExecution, AgentStep
+
+
+class JSONLEventWriter:
+    """Writes progress events as compact JSON lines."""
+
+    def __init__(self, stream: BinaryIO, sock: socket.socket | None = None):
+        self.stream: BinaryIO = stream
+        self.closed: bool = False
+        self._socket: socket.socket | None = sock
+        self._last_step_event: dict[str, Any] | None = None
+
+    @classmethod
+    def to_stdout(cls) -> "JSONLEventWriter":
+        """Take over stdout for the events, and send anything else printed to stderr."""
+        sys.stdout.flush()
+        stream = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        return cls(stream)
+
+    @classmethod
+    def connect(cls, address: str) -> "JSONLEventWriter":
+        """Connect to a Unix socket path, or to a TCP `host:port`.
+
+        Raises:
+            OSError: If the connection fails.
+        """
+        host, _, port = address.rpartition(":")
+        if host and port.isdigit() and "/" not in address:
+            sock = socket.create_connection((host, int(port)))
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(address)
+            except OSError:
+                sock.close()
+                raise
+        return cls(sock.makefile("wb", buffering=0), sock)
+
+    def emit(self, event: dict[str, Any]) -> None:
+        """Write one event. A consumer that went away stops the output, not the run."""
+        if self.closed:
+            return
+        line = json.dumps(
+            event, separators=(",", ":"), ensure_ascii=False, default=str
+        ).encode("utf-8")
+        view = memoryview(line + b"\n")
+        try:
+            while view:
+                written = self.stream.write(view)
+                if not written:
+                    # Nothing taken, e.g. by a non-blocking pipe nobody reads
+                    self.close()
+                    return
+                view = view[written:]
+        except OSError:
+            self.close()
+
+    def on_step(self, step: AgentStep) -> None:
+        """Step listener for `Agent.add_step_listener`."""
+        event = {"event": "step", **step.to_event()}
+        # The agent also reports a step when it records it, without a change
+        if event != self._last_step_event:
+            self._last_step_event = event
+            self.emit(event)
+
+    def emit_execution(self, execution: AgentExecution) -> None:
+        """Write the final event of the run."""
+        event: dict[str, Any] = {
+            "event": "done",
+            "success": execution.success,
+            "steps": len(execution.steps),
+            "execution_time": execution.execution_time,
+            "final_result": execution.final_result,
+        }
+        if execution.total_tokens:
+            event["input_tokens"] = execution.total_tokens.input_tokens
+            event["output_tokens"] = execution.total_tokens.output_tokens
+        self.emit(event)
+
+    def close(self) -> None:
+        self.closed = True
+        with contextlib.suppress(OSError):
+            self.stream.close()
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
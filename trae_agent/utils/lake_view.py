@@ -1,10 +1,12 @@
-import re
+import asyncio
+import json
+from collections import deque
 from dataclasses import dataclass
 
 from trae_agent.agent.agent_basics import AgentStep
 
-from .config import Config, ModelParameters
-from .llm_basics import LLMMessage
+from .config import Config, LakeviewConfig, ModelParameters
+from .llm_basics import LLMMessage, LLMResponse
 from .llm_client import LLMClient
 
 StepType = tuple[
@@ -14,26 +16,12 @@ StepType = tuple[
 ]
 
 
-EXTRACTOR_PROMPT = """
+SUMMARY_PROMPT = """
 Given the preceding excerpt, your job is to determine "what task is the agent performing in <this_step>".
-Output your answer in two granularities: <task>...</task><details>...</details>.
-In the <task> tag, the answer should be concise and general. It should omit ANY bug-specific details, and contain at most 10 words.
-In the <details> tag, the answer should complement the <task> tag by adding bug-specific details. It should be informative and contain at most 30 words.
-
-Examples:
-
-<task>The agent is writing a reproduction test script.</task><details>The agent is writing "test_bug.py" to reproduce the bug in XXX-Project's create_foo method not comparing sizes correctly.</details>
-<task>The agent is examining source code.</task><details>The agent is searching for "function_name" in the code repository, that is related to the "foo.py:function_name" line in the stack trace.</details>
-<task>The agent is fixing the reproduction test script.</task><details>The agent is fixing "test_bug.py" that forgets to import the function "foo", causing a NameError.</details>
-
-Now, answer the question "what task is the agent performing in <this_step>".
-Again, provide only the answer with no other commentary. The format should be "<task>...</task><details>...</details>".
-"""
-
-TAGGER_PROMPT = """
-Given the trajectory, your job is to determine "what task is the agent performing in the current step".
-Output your answer by choosing the applicable tags in the below list for the current step.
-If it is performing multiple tasks in one step, choose ALL applicable tags, separated by a comma.
+Answer with a JSON object with three keys:
+- "task": a concise and general answer that completes the sentence "The agent ...". It should omit ANY bug-specific details, and contain at most 10 words.
+- "details": a sentence that complements "task" by adding bug-specific details. It should be informative and contain at most 30 words.
+- "tags": ALL the tags in the below list that apply to <this_step>.
 
 <tags>
 WRITE_TEST: It writes a test script to reproduce the bug, or modifies a non-working test script to fix problems found in testing.
@@ -46,15 +34,20 @@ THINK: It analyzes the bug through thinking, but does not perform concrete actio
 OUTLIER: A major part in this step does not fit into any tag above, such as running a shell command to install dependencies.
 </tags>
 
-<examples>
-If the agent is opening a file to examine, output <tags>EXAMINE_CODE</tags>.
-If the agent is fixing a known problem in the reproduction test script and then running it again, output <tags>WRITE_TEST,VERIFY_TEST</tags>.
-If the agent is merely thinking about the root cause of the bug without other actions, output <tags>THINK</tags>.
-</examples>
+Examples:
+
+{"task": "is writing a reproduction test script.", "details": "The agent is writing \"test_bug.py\" to reproduce the bug in XXX-Project's create_foo method not comparing sizes correctly.", "tags": ["WRITE_TEST"]}
+{"task": "is examining source code.", "details": "The agent is searching for \"function_name\" in the code repository, that is related to the \"foo.py:function_name\" line in the stack trace.", "tags": ["EXAMINE_CODE"]}
+{"task": "is fixing the reproduction test script.", "details": "The agent is fixing \"test_bug.py\" that forgets to import the function \"foo\", causing a NameError, and runs it again.", "tags": ["WRITE_TEST", "VERIFY_TEST"]}
 
-Output only the tags with no other commentary. The format should be <tags>...</tags>
+Now, answer the question "what task is the agent performing in <this_step>".
+Output only the JSON object with no other commentary.
 """
 
+REPAIR_PROMPT = (
+    "Your answer could not be used: {error}. Reply with only the corrected JSON object."
+)
+
 KNOWN_TAGS = {
     "WRITE_TEST": "☑️",
     "VERIFY_TEST": "✅",
@@ -66,7 +59,129 @@ KNOWN_TAGS = {
     "OUTLIER": "⁉️",
 }
 
-tags_re = re.compile(r"<tags>([A-Z_,\s]+)</tags>")
+
+def parse_lakeview_summary(content: str) -> tuple[str, str, list[str]]:
+    """Parse the JSON summary of a step returned by the Lakeview model.
+
+    Args:
+        content: The model's answer, possibly with text around the JSON object
+
+    Returns:
+        The task, the details and the tags of the step.
+
+    Raises:
+        ValueError: If the answer holds no valid summary.
+    """
+    start = content.find("{")
+    if start == -1:
+        raise ValueError("no JSON object was found")
+    try:
+        summary, _ = json.JSONDecoder().raw_decode(content[start:])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON ({e})") from e
+    if not isinstance(summary, dict):
+        raise ValueError("the answer must be a JSON object")
+
+    task = summary.get("task")
+    details = summary.get("details", "")
+    tags = summary.get("tags", [])
+    if not isinstance(task, str) or not task.strip():
+        raise ValueError('"task" must be a non-empty string')
+    if not isinstance(details, str):
+        raise ValueError('"details" must be a string')
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError('"tags" must be a list of strings')
+
+    tags = [tag.strip().upper() for tag in tags if tag.strip()]
+    unknown_tags = [tag for tag in tags if tag not in KNOWN_TAGS]
+    if unknown_tags:
+        raise ValueError(f"unknown tags {', '.join(unknown_tags)}")
+
+    task = task.strip()
+    if task.lower().startswith("the agent "):
+        task = task[len("the agent ") :]
+    return task, details.strip(), tags
+
+
+# Rough size of a token, to keep the context within its budget without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Shorten the text to about max_chars, keeping its start and its end."""
+    if len(text) <= max_chars:
+        return text
+    half = max(1, max_chars // 2)
+    return f"{text[:half]}\n[...]\n{text[-half:]}"
+
+
+class LakeViewContext:
+    """The steps before the one being summarized, built up incrementally.
+
+    The latest steps are kept verbatim in a rolling window, and each step
+    leaving the window becomes one line of a running summary. Half of the
+    token budget goes to each, so a request costs about the same however
+    long the run is.
+    """
+
+    def __init__(self, window_steps: int = 3, max_tokens: int = 2000):
+        self.window_steps: int = window_steps
+        self.max_tokens: int = max_tokens
+        self.window: deque[tuple[int, str]] = deque()
+        self.summary: deque[str] = deque()
+        self.omitted_steps: int = 0
+        self._summary_chars: int = 0
+        self._descriptions: dict[int, str] = {}
+
+    def add_step(self, step_number: int, step_str: str) -> None:
+        """Add a step to the window, moving the oldest one to the summary."""
+        step_chars = self.max_tokens * CHARS_PER_TOKEN // 2 // self.window_steps
+        self.window.append((step_number, _truncate(step_str, step_chars)))
+        while len(self.window) > self.window_steps:
+            number, text = self.window.popleft()
+            line = self._descriptions.pop(number, None)
+            if line is None:
+                first_line = text.strip().splitlines()[0] if text.strip() else ""
+                line = f"Step {number}: {first_line[:100]}"
+            self._add_summary_line(line)
+
+    def describe_step(self, step_number: int, task: str, tags: list[str]) -> None:
+        """Record a step's summary, which replaces it once it leaves the window."""
+        if any(number == step_number for number, _ in self.window):
+            label = f" ({', '.join(tags)})" if tags else ""
+            self._descriptions[step_number] = (
+                f"Step {step_number}: The agent {task}{label}"
+            )
+
+    def _add_summary_line(self, line: str) -> None:
+        self.summary.append(line)
+        self._summary_chars += len(line) + 1
+        summary_chars = self.max_tokens * CHARS_PER_TOKEN // 2
+        while self._summary_chars > summary_chars and len(self.summary) > 1:
+            self._summary_chars -= len(self.summary.popleft()) + 1
+            self.omitted_steps += 1
+
+    def render(self) -> str:
+        """Format the context for the Lakeview prompt."""
+        parts: list[str] = []
+        if self.summary:
+            omitted = (
+                [f"({self.omitted_steps} earlier steps omitted)"]
+                if self.omitted_steps
+                else []
+            )
+            parts.append(
+                "<earlier_steps>\n"
+                + "\n".join(omitted + list(self.summary))
+                + "\n</earlier_steps>"
+            )
+        parts.extend(
+            f'<previous_step number="{number}">{text}</previous_step>'
+            for number, text in self.window
+        )
+        return "".join(parts) or "<previous_step>(none)</previous_step>"
 
 
 @dataclass
@@ -77,7 +192,7 @@ class LakeViewStep:
 
 
 class LakeView:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, idle_clients: list[LLMClient] | None = None):
         if config.lakeview_config is None:
             return
 
@@ -94,109 +209,87 @@ class LakeView:
             base_url=model_parameters.base_url,
             api_version=model_parameters.api_version,
         )
-        self.lakeview_llm_client: LLMClient = LLMClient(
-            config.lakeview_config.model_provider, self.model_parameters
+        self.model_parameters.temperature = 0.1
+        self.model_parameters.json_mode = True
+        self.model_provider: str = config.lakeview_config.model_provider
+        # The provider clients keep the messages of their last chat, so each
+        # request in flight gets a client of its own, reused once it returns.
+        # Lakeviews given the same list share their clients.
+        self._idle_clients: list[LLMClient] = (
+            [self._create_client()] if idle_clients is None else idle_clients
         )
 
-        self.steps: list[str] = []
-
-    def get_label(self, tags: None | list[str], emoji: bool = True) -> str:
-        if not tags:
-            return ""
-
-        return " · ".join([KNOWN_TAGS[tag] + tag if emoji else tag for tag in tags])
-
-    async def extract_task_in_step(
-        self, prev_step: str, this_step: str
-    ) -> tuple[str, str]:
-        llm_messages = [
-            LLMMessage(
-                role="user",
-                content=f"The following is an excerpt of the steps trying to solve a software bug by an AI agent: <previous_step>{prev_step}</previous_step><this_step>{this_step}</this_step>",
-            ),
-            LLMMessage(role="assistant", content="I understand."),
-            LLMMessage(role="user", content=EXTRACTOR_PROMPT),
-            LLMMessage(
-                role="assistant",
-                content="Sure. Here is the task the agent is performing: <task>The agent",
-            ),
-        ]
-
-        self.model_parameters.temperature = 0.1
-        llm_response = self.lakeview_llm_client.chat(
-            model_parameters=self.model_parameters,
-            messages=llm_messages,
-            reuse_history=False,
+        self.max_step_chars: int = (
+            config.lakeview_config.context_max_tokens * CHARS_PER_TOKEN
+        )
+        self.context: LakeViewContext = LakeViewContext(
+            config.lakeview_config.context_window_steps,
+            config.lakeview_config.context_max_tokens,
         )
 
-        content = llm_response.content.strip()
+    def _create_client(self) -> LLMClient:
+        return LLMClient(self.model_provider, self.model_parameters)
 
-        retry = 0
-        while retry < 10 and (
-            "</task>" not in content
-            or "<details>" not in content
-            or "</details>" not in content
-        ):
-            retry += 1
-            llm_response = self.lakeview_llm_client.chat(
+    async def _chat(self, llm_messages: list[LLMMessage]) -> LLMResponse:
+        client = (
+            self._idle_clients.pop() if self._idle_clients else self._create_client()
+        )
+        try:
+            # The provider SDKs block, so calls run in a worker thread to keep
+            # the agent's event loop free
+            return await asyncio.to_thread(
+                client.chat,
                 model_parameters=self.model_parameters,
                 messages=llm_messages,
                 reuse_history=False,
             )
-            content = llm_response.content.strip()
-
-        if (
-            "</task>" not in content
-            or "<details>" not in content
-            or "</details>" not in content
-        ):
-            return "", ""
-
-        desc_task, _, desc_details = content.rpartition("</task>")
-        desc_details = desc_details.replace("<details>", "[italic]").replace(
-            "</details>", "[/italic]"
-        )
-        return desc_task, desc_details
+        finally:
+            self._idle_clients.append(client)
 
-    async def extract_tag_in_step(self, step: str) -> list[str]:
-        steps_fmt = "\n\n".join(
-            f'<step id="{ind + 1}">\n{s.strip()}\n</step>'
-            for ind, s in enumerate(self.steps)
-        )
+    def get_label(self, tags: None | list[str], emoji: bool = True) -> str:
+        if not tags:
+            return ""
+
+        return " · ".join([KNOWN_TAGS[tag] + tag if emoji else tag for tag in tags])
 
-        if len(steps_fmt) > 300_000:
-            # step_fmt is too long, skip tagging
-            return []
+    async def summarize_step(
+        self, context: str, this_step: str
+    ) -> tuple[str, str, list[str]] | None:
+        """Describe a step and tag it with a single request.
 
+        Args:
+            context: The rendered steps before this one
+            this_step: The step to summarize
+
+        Returns:
+            The task, the details and the tags of the step, or None if the
+            answer could not be parsed even after one repair attempt.
+        """
         llm_messages = [
             LLMMessage(
                 role="user",
-                content=f"Below is the trajectory of an AI agent solving a software bug until the current step. Each step is marked within a <step> tag.\n\n{steps_fmt}\n\n<current_step>{step}</current_step>",
+                content=f"The following is an excerpt of the steps trying to solve a software bug by an AI agent: {context}<this_step>{this_step}</this_step>",
             ),
             LLMMessage(role="assistant", content="I understand."),
-            LLMMessage(role="user", content=TAGGER_PROMPT),
-            LLMMessage(role="assistant", content="Sure. The tags are: <tags>"),
+            LLMMessage(role="user", content=SUMMARY_PROMPT),
         ]
-        self.model_parameters.temperature = 0.1
-
-        retry = 0
-        while retry < 10:
-            llm_response = self.lakeview_llm_client.chat(
-                model_parameters=self.model_parameters,
-                messages=llm_messages,
-                reuse_history=False,
+        llm_response = await self._chat(llm_messages)
+        try:
+            return parse_lakeview_summary(llm_response.content)
+        except ValueError as e:
+            # Show the model its answer and what is wrong with it, once
+            llm_messages.extend(
+                [
+                    LLMMessage(role="assistant", content=llm_response.content),
+                    LLMMessage(role="user", content=REPAIR_PROMPT.format(error=e)),
+                ]
             )
 
-            content = "<tags>" + llm_response.content.lstrip()
-
-            matched_tags: list[str] = tags_re.findall(content)
-            tags: list[str] = [tag.strip() for tag in matched_tags[0].split(",")]
-            if all(tag in KNOWN_TAGS for tag in tags):
-                return tags
-
-            retry += 1
-
-        return []
+        llm_response = await self._chat(llm_messages)
+        try:
+            return parse_lakeview_summary(llm_response.content)
+        except ValueError:
+            return None
 
     def _agent_step_str(self, agent_step: AgentStep) -> str | None:
         if agent_step.llm_response is None:
@@ -215,19 +308,136 @@ class LakeView:
 
         return content
 
-    async def create_lakeview_step(self, agent_step: AgentStep) -> LakeViewStep | None:
-        previous_step_str = "(none)"
-        if len(self.steps) > 1:
-            previous_step_str = self.steps[-1]
+    async def describe_agent_step(
+        self, agent_step: AgentStep
+    ) -> tuple[str, str, list[str]] | None:
+        """Summarize a step in the context of the steps described before it.
 
+        Returns:
+            The task, the details and the tags of the step, or None if it has
+            no content or could not be summarized.
+        """
         this_step_str = self._agent_step_str(agent_step)
+        if not this_step_str:
+            return None
 
+        # Taken before the await, so steps summarized in parallel see the
+        # steps submitted before them
+        context = self.context.render()
+        self.context.add_step(agent_step.step_number, this_step_str)
+
+        summary = await self.summarize_step(
+            context, _truncate(this_step_str, self.max_step_chars)
+        )
+        if summary is not None:
+            desc_task, _, tags = summary
+            self.context.describe_step(agent_step.step_number, desc_task, tags)
+        return summary
+
+    def remember_step(self, agent_step: AgentStep, task: str, tags: list[str]) -> None:
+        """Add a step summarized earlier to the context of the next ones."""
+        this_step_str = self._agent_step_str(agent_step)
         if this_step_str:
-            desc_task, desc_details = await self.extract_task_in_step(
-                previous_step_str, this_step_str
-            )
-            tags = await self.extract_tag_in_step(this_step_str)
-            tags_emoji = self.get_label(tags)
-            return LakeViewStep(desc_task, desc_details, tags_emoji)
+            self.context.add_step(agent_step.step_number, this_step_str)
+            self.context.describe_step(agent_step.step_number, task, tags)
 
-        return None
+    async def create_lakeview_step(self, agent_step: AgentStep) -> LakeViewStep | None:
+        summary = await self.describe_agent_step(agent_step)
+        if summary is None:
+            return None
+        desc_task, desc_details, tags = summary
+        return LakeViewStep(
+            desc_task, f"[italic]{desc_details}[/italic]", self.get_label(tags)
+        )
+
+
+class LakeViewPipeline:
+    """Summarizes agent steps with Lakeview in background workers.
+
+    Steps wait in a bounded queue. When the workers fall behind, the oldest
+    waiting step is dropped or the new one is skipped, depending on the
+    overflow policy, so Lakeview never holds the agent up or lags far behind
+    it. Dropped, skipped and failed steps resolve to None.
+    """
+
+    def __init__(
+        self,
+        lake_view: LakeView,
+        workers: int = 2,
+        max_queue_size: int = 8,
+        overflow_policy: str = "drop_oldest",
+    ):
+        self.lake_view: LakeView = lake_view
+        self.workers: int = workers
+        self.overflow_policy: str = overflow_policy
+        self.dropped: int = 0
+        self.failed: int = 0
+        self._queue: asyncio.Queue[
+            tuple[AgentStep, asyncio.Future[LakeViewStep | None]]
+        ] = asyncio.Queue(max_queue_size)
+        self._worker_tasks: list[asyncio.Task[None]] = []
+
+    @classmethod
+    def from_config(
+        cls, lake_view: LakeView, lakeview_config: LakeviewConfig
+    ) -> "LakeViewPipeline":
+        return cls(
+            lake_view,
+            lakeview_config.workers,
+            lakeview_config.max_queue_size,
+            lakeview_config.overflow_policy,
+        )
+
+    def submit(self, agent_step: AgentStep) -> asyncio.Future[LakeViewStep | None]:
+        """Queue a step for summarizing. Must be called from the event loop."""
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+
+        future: asyncio.Future[LakeViewStep | None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        if self._queue.full():
+            self.dropped += 1
+            if self.overflow_policy == "skip_new":
+                future.set_result(None)
+                return future
+            _, oldest = self._queue.get_nowait()
+            self._queue.task_done()
+            if not oldest.done():
+                oldest.set_result(None)
+        self._queue.put_nowait((agent_step, future))
+        return future
+
+    async def _work(self) -> None:
+        while True:
+            agent_step, future = await self._queue.get()
+            try:
+                if not future.done():
+                    future.set_result(
+                        await self.lake_view.create_lakeview_step(agent_step)
+                    )
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.set_result(None)
+                raise
+            except Exception:
+                # A failed summary must never fail the agent's run
+                self.failed += 1
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        """Stop the workers and resolve the steps still waiting to None."""
+        for task in self._worker_tasks:
+            _ = task.cancel()
+        _ = await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            self._queue.task_done()
+            if not future.done():
+                future.set_result(None)
@@ -0,0 +1,160 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+# TODO: remove these annotations by defining fine-grained types
+# pyright: reportAny=false
+# pyright: reportExplicitAny=false
+
+"""Adds Lakeview summaries to recorded trajectories, after the run."""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ..agent.agent_basics import AgentState, AgentStep
+from .config import Config
+from .lake_view import LakeView
+from .llm_client import LLMClient
+from .replay_client import ReplayClient, load_trajectory
+
+
+@dataclass
+class LakeviewFileResult:
+    """Outcome of summarizing one trajectory file."""
+
+    trajectory_file: str
+    steps: int = 0
+    summarized: int = 0
+    cached: int = 0
+    failed: int = 0
+    error: str | None = None
+
+
+def recorded_agent_step(data: dict[str, Any]) -> AgentStep:
+    """Rebuild the parts of an agent step that Lakeview reads from its record."""
+    try:
+        state = AgentState(data.get("state"))
+    except ValueError:
+        state = AgentState.IDLE
+    llm_response = data.get("llm_response")
+    return AgentStep(
+        step_number=int(data["step_number"]),
+        state=state,
+        llm_response=ReplayClient.parse_response(llm_response)
+        if llm_response
+        else None,
+    )
+
+
+def write_trajectory(path: Path, trajectory: dict[str, Any]) -> None:
+    """Atomically replace a trajectory file."""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(trajectory, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+async def summarize_trajectories(
+    trajectory_files: list[str],
+    config: Config,
+    concurrency: int = 4,
+    force: bool = False,
+) -> list[LakeviewFileResult]:
+    """Add Lakeview summaries to the agent steps of trajectory files.
+
+    Each step gets a `lakeview` entry with its task, details and tags, and the
+    model that wrote them. Steps that already have one from the same model
+    are kept unless `force` is set, so a rerun only pays for the steps that
+    are new or failed before.
+
+    Args:
+        trajectory_files: Trajectory files written by TrajectoryRecorder
+        config: Configuration whose lakeview_config picks the model
+        concurrency: Summaries requested at once, over all files
+        force: Summarize steps again even if they have a summary
+
+    Returns:
+        One result per file, in the order of the files.
+    """
+    if config.lakeview_config is None:
+        raise ValueError("Lakeview is not configured")
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+
+    # Waiters acquire the semaphore in order, so the steps of a file are
+    # summarized in order and each one sees the context of the earlier ones
+    semaphore = asyncio.Semaphore(concurrency)
+    # One LLM client per request in flight, shared by the files
+    idle_clients: list[LLMClient] = []
+    return list(
+        await asyncio.gather(
+            *(
+                _summarize_trajectory(
+                    Path(path), config, semaphore, idle_clients, force
+                )
+                for path in trajectory_files
+            )
+        )
+    )
+
+
+async def _summarize_trajectory(
+    path: Path,
+    config: Config,
+    semaphore: asyncio.Semaphore,
+    idle_clients: list[LLMClient],
+    force: bool,
+) -> LakeviewFileResult:
+    assert config.lakeview_config is not None
+    result = LakeviewFileResult(str(path))
+    try:
+        trajectory = load_trajectory(path)
+    except (OSError, json.JSONDecodeError) as e:
+        result.error = str(e)
+        return result
+
+    model = (
+        f"{config.lakeview_config.model_provider}/{config.lakeview_config.model_name}"
+    )
+    lake_view = LakeView(config, idle_clients)
+    recorded_steps: list[dict[str, Any]] = trajectory.get("agent_steps") or []
+    result.steps = len(recorded_steps)
+
+    async def summarize(recorded_step: dict[str, Any]) -> None:
+        if not recorded_step.get("llm_response"):
+            return
+        agent_step = recorded_agent_step(recorded_step)
+        cached = recorded_step.get("lakeview")
+        async with semaphore:
+            if not force and isinstance(cached, dict) and cached.get("model") == model:
+                lake_view.remember_step(
+                    agent_step, str(cached.get("task", "")), cached.get("tags") or []
+                )
+                result.cached += 1
+                return
+            try:
+                summary = await lake_view.describe_agent_step(agent_step)
+            except Exception:
+                summary = None
+        if summary is None:
+            result.failed += 1
+            return
+        task, details, tags = summary
+        recorded_step["lakeview"] = {
+            "model": model,
+            "task": task,
+            "details": details,
+            "tags": tags,
+        }
+        result.summarized += 1
+
+    try:
+        _ = await asyncio.gather(*(summarize(step) for step in recorded_steps))
+    finally:
+        # Also keeps the summaries of an interrupted run
+        if result.summarized:
+            write_trajectory(path, trajectory)
+    return result
@@ -20,7 +20,11 @@ class LLMMessage:
 
 @dataclass
 class LLMUsage:
-    """LLM usage format."""
+    """LLM usage format.
+
+    `input_tokens` counts the whole prompt; the cache fields are the parts of it
+    that were written to or read from the provider's prompt cache.
+    """
 
     input_tokens: int
     output_tokens: int
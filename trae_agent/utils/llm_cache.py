@@ -0,0 +1,190 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+# TODO: remove these annotations by defining fine-grained types
+# pyright: reportAny=false
+# pyright: reportExplicitAny=false
+
+"""Disk-backed cache of LLM responses for deterministic reruns."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from ..tools.base import Tool, ToolCall
+from .config import ModelParameters
+from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+
+
+class LLMCacheMissError(Exception):
+    """Raised in read-only mode when a request is not in the cache."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message: str = message
+
+
+class LLMResponseCache:
+    """Stores LLM responses in a local SQLite file keyed by a hash of the request.
+
+    Entries are evicted least recently used first once the file grows past
+    `max_size_bytes`. In read-only mode nothing is written and a miss raises
+    `LLMCacheMissError` instead of falling through to the provider.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_size_bytes: int = 512 * 1024 * 1024,
+        read_only: bool = False,
+    ):
+        self.path: Path = Path(path)
+        self.max_size_bytes: int = max_size_bytes
+        self.read_only: bool = read_only
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._lock: threading.Lock = threading.Lock()
+        if read_only:
+            if not self.path.exists():
+                raise ValueError(f"LLM response cache not found: {self.path}")
+            self._connection: sqlite3.Connection = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            _ = self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            _ = self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access "
+                "ON responses (last_access)"
+            )
+            self._connection.commit()
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model_parameters: ModelParameters,
+        messages: list[LLMMessage],
+        tools: list[Tool] | None,
+    ) -> str:
+        """Build the canonical cache key of a request.
+
+        Args:
+            provider: LLM provider name
+            model_parameters: Model and sampling parameters of the request
+            messages: Full conversation sent to the model, including history
+            tools: Tools available during the request
+
+        Returns:
+            A hex SHA-256 digest of the canonical JSON form of the request.
+        """
+        request = {
+            "provider": provider,
+            "model": model_parameters.model,
+            "parameters": {
+                "max_tokens": model_parameters.max_tokens,
+                "temperature": model_parameters.temperature,
+                "top_p": model_parameters.top_p,
+                "top_k": model_parameters.top_k,
+                "candidate_count": model_parameters.candidate_count,
+                "stop_sequences": model_parameters.stop_sequences,
+            },
+            "messages": [asdict(message) for message in messages],
+            "tools": [tool.json_definition() for tool in tools] if tools else None,
+        }
+        if model_parameters.json_mode:
+            # Only added when set, to keep the keys of existing entries
+            request["parameters"]["json_mode"] = True
+        canonical = json.dumps(
+            request, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> LLMResponse | None:
+        """Return the cached response for `key`, or None on a miss."""
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            if row is None:
+                self.misses += 1
+                if self.read_only:
+                    raise LLMCacheMissError(
+                        f"LLM response cache miss in read-only mode: {key}"
+                    )
+                return None
+
+            self.hits += 1
+            if not self.read_only:
+                _ = self._connection.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+                self._connection.commit()
+        return self._deserialize(json.loads(row[0]))
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """Store a response and evict old entries if the cache is over its size."""
+        if self.read_only:
+            return
+        value = json.dumps(asdict(response), ensure_ascii=False, default=str)
+        with self._lock:
+            _ = self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, len(value.encode()), time.time()),
+            )
+            self._evict()
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        total_size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        rows = self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        evicted: list[tuple[str]] = []
+        for key, size in rows:
+            if total_size <= self.max_size_bytes:
+                break
+            evicted.append((key,))
+            total_size -= size
+        _ = self._connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    @staticmethod
+    def _deserialize(data: dict[str, Any]) -> LLMResponse:
+        usage = data.get("usage")
+        tool_calls = data.get("tool_calls")
+        return LLMResponse(
+            content=data.get("content", ""),
+            usage=LLMUsage(**usage) if usage else None,
+            model=data.get("model"),
+            finish_reason=data.get("finish_reason"),
+            tool_calls=[ToolCall(**tool_call) for tool_call in tool_calls]
+            if tool_calls
+            else None,
+        )
@@ -3,12 +3,25 @@
 
 """LLM Client wrapper for OpenAI, Anthropic, Azure, and OpenRouter APIs."""
 
+import time
+from dataclasses import replace
 from enum import Enum
 
+import httpx
+
 from ..tools.base import Tool
 from .base_client import BaseLLMClient
 from .config import ModelParameters
 from .llm_basics import LLMMessage, LLMResponse
+from .llm_cache import LLMResponseCache
+from .metrics import (
+    LLM_RATE_LIMITED,
+    LLM_REQUEST_DURATION,
+    LLM_REQUEST_ERRORS,
+    LLM_RETRIES,
+    LLM_TOKENS,
+)
+from .tracing import SPAN_KIND_CLIENT, Tracer, trace_span
 from .trajectory_recorder import TrajectoryRecorder
 
 
@@ -23,6 +36,7 @@ class LLMProvider(Enum):
     DOUBAO = "doubao"
     GOOGLE = "google"
     POLLINATIONS = "pollinations"
+    REPLAY = "replay"
     # Individual Pollinations model providers
     POLLINATIONS_OPENAI = "openai"
     POLLINATIONS_DEEPSEEK = "deepseek"
@@ -39,40 +53,59 @@ class LLMProvider(Enum):
 class LLMClient:
     """Main LLM client that supports multiple providers."""
 
-    def __init__(self, provider: str | LLMProvider, model_parameters: ModelParameters):
+    def __init__(
+        self,
+        provider: str | LLMProvider,
+        model_parameters: ModelParameters,
+        cache: LLMResponseCache | None = None,
+        http_client: httpx.Client | None = None,
+        tracer: Tracer | None = None,
+    ):
         if isinstance(provider, str):
             provider = LLMProvider(provider)
 
         self.provider: LLMProvider = provider
+        self.tracer: Tracer | None = tracer
+
+        # Optional response cache. The full conversation is tracked here because
+        # the cache key must cover it, while the provider clients only receive
+        # the new messages of each call.
+        self.cache: LLMResponseCache | None = cache
+        self._cache_history: list[LLMMessage] = []
+        self._client_history_stale: bool = False
 
         if provider == LLMProvider.OPENAI:
             from .openai_client import OpenAIClient
 
-            self.client: BaseLLMClient = OpenAIClient(model_parameters)
+            self.client: BaseLLMClient = OpenAIClient(model_parameters, http_client)
         elif provider == LLMProvider.ANTHROPIC:
             from .anthropic_client import AnthropicClient
 
-            self.client = AnthropicClient(model_parameters)
+            self.client = AnthropicClient(model_parameters, http_client)
         elif provider == LLMProvider.AZURE:
             from .azure_client import AzureClient
 
-            self.client = AzureClient(model_parameters)
+            self.client = AzureClient(model_parameters, http_client)
         elif provider == LLMProvider.OPENROUTER:
             from .openrouter_client import OpenRouterClient
 
-            self.client = OpenRouterClient(model_parameters)
+            self.client = OpenRouterClient(model_parameters, http_client)
         elif provider == LLMProvider.DOUBAO:
             from .doubao_client import DoubaoClient
 
-            self.client = DoubaoClient(model_parameters)
+            self.client = DoubaoClient(model_parameters, http_client)
         elif provider == LLMProvider.OLLAMA:
             from .ollama_client import OllamaClient
 
-            self.client = OllamaClient(model_parameters)
+            self.client = OllamaClient(model_parameters, http_client)
         elif provider == LLMProvider.GOOGLE:
             from .google_client import GoogleClient
 
-            self.client = GoogleClient(model_parameters)
+            self.client = GoogleClient(model_parameters, http_client)
+        elif provider == LLMProvider.REPLAY:
+            from .replay_client import ReplayClient
+
+            self.client = ReplayClient(model_parameters, http_client)
         elif provider in [
             LLMProvider.POLLINATIONS,
             LLMProvider.POLLINATIONS_OPENAI,
@@ -88,7 +121,7 @@ class LLMClient:
         ]:
             from .pollinations_client import PollinationsClient
 
-            self.client = PollinationsClient(model_parameters)
+            self.client = PollinationsClient(model_parameters, http_client)
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
@@ -96,9 +129,33 @@ class LLMClient:
         """Set the trajectory recorder for the underlying client."""
         self.client.set_trajectory_recorder(recorder)
 
+    @property
+    def retry_wait_time(self) -> float:
+        """Seconds the client has slept between retries, over all calls."""
+        return self.client.retry_wait_time
+
     def set_chat_history(self, messages: list[LLMMessage]) -> None:
         """Set the chat history."""
         self.client.set_chat_history(messages)
+        self._cache_history = list(messages)
+        self._client_history_stale = False
+
+    def supersede_tool_results(self, replacements: dict[str, str]) -> int:
+        """Replace the content of earlier tool results in the chat history."""
+        self._cache_history = [
+            replace(
+                message,
+                tool_result=replace(
+                    message.tool_result,
+                    result=replacements[message.tool_result.call_id],
+                    error=None,
+                ),
+            )
+            if message.tool_result and message.tool_result.call_id in replacements
+            else message
+            for message in self._cache_history
+        ]
+        return self.client.supersede_tool_results(replacements)
 
     def chat(
         self,
@@ -108,7 +165,92 @@ class LLMClient:
         reuse_history: bool = True,
     ) -> LLMResponse:
         """Send chat messages to the LLM."""
-        return self.client.chat(messages, model_parameters, tools, reuse_history)
+        with trace_span(
+            self.tracer,
+            "llm.chat",
+            {
+                "gen_ai.system": self.provider.value,
+                "gen_ai.request.model": model_parameters.model,
+            },
+            SPAN_KIND_CLIENT,
+        ) as span:
+            labels = {"provider": self.provider.value, "model": model_parameters.model}
+            start_time = time.perf_counter()
+            retry_count = self.client.retry_count
+            rate_limited_count = self.client.rate_limited_count
+            try:
+                response = self._chat(messages, model_parameters, tools, reuse_history)
+            except Exception:
+                LLM_REQUEST_ERRORS.inc(**labels)
+                raise
+            finally:
+                LLM_REQUEST_DURATION.observe(time.perf_counter() - start_time, **labels)
+                LLM_RETRIES.inc(self.client.retry_count - retry_count, **labels)
+                LLM_RATE_LIMITED.inc(
+                    self.client.rate_limited_count - rate_limited_count, **labels
+                )
+                span.set_attribute(
+                    "polli.retries", self.client.retry_count - retry_count
+                )
+            span.set_attribute("gen_ai.response.model", response.model)
+            span.set_attribute("gen_ai.response.finish_reason", response.finish_reason)
+            if response.usage:
+                LLM_TOKENS.inc(response.usage.input_tokens, direction="input", **labels)
+                LLM_TOKENS.inc(
+                    response.usage.output_tokens, direction="output", **labels
+                )
+                span.set_attribute(
+                    "gen_ai.usage.input_tokens", response.usage.input_tokens
+                )
+                span.set_attribute(
+                    "gen_ai.usage.output_tokens", response.usage.output_tokens
+                )
+            span.set_attribute("polli.tool_calls", len(response.tool_calls or []))
+            return response
+
+    def _chat(
+        self,
+        messages: list[LLMMessage],
+        model_parameters: ModelParameters,
+        tools: list[Tool] | None,
+        reuse_history: bool,
+    ) -> LLMResponse:
+        if self.cache is None:
+            return self.client.chat(messages, model_parameters, tools, reuse_history)
+
+        history = (self._cache_history if reuse_history else []) + list(messages)
+        key = self.cache.make_key(self.provider.value, model_parameters, history, tools)
+        response = self.cache.get(key)
+        if response is None:
+            if reuse_history and self._client_history_stale:
+                # Earlier answers came from the cache and never reached the client
+                self.client.set_chat_history(self._cache_history)
+            response = self.client.chat(
+                messages, model_parameters, tools, reuse_history
+            )
+            self._client_history_stale = False
+            self.cache.put(key, response)
+        else:
+            self._client_history_stale = True
+            if self.client.trajectory_recorder:
+                self.client.trajectory_recorder.record_llm_interaction(
+                    messages=messages,
+                    response=response,
+                    provider=self.provider.value,
+                    model=model_parameters.model,
+                    tools=tools,
+                )
+
+        self._cache_history = history
+        if response.content:
+            self._cache_history.append(
+                LLMMessage(role="assistant", content=response.content)
+            )
+        for tool_call in response.tool_calls or []:
+            self._cache_history.append(
+                LLMMessage(role="assistant", tool_call=tool_call)
+            )
+        return response
 
     def supports_tool_calling(self, model_parameters: ModelParameters) -> bool:
         """Check if the current client supports tool calling."""
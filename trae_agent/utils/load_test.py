@@ -0,0 +1,153 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Harness that runs many agents at once, usually against the mock LLM server."""
+
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from ..agent import TraeAgent
+from ..agent.agent_basics import AgentExecution
+from .config import Config
+
+
+@dataclass
+class AgentRunResult:
+    """Outcome of one agent in a load test."""
+
+    index: int
+    success: bool
+    steps: int
+    execution_time: float
+    error: str | None = None
+
+
+@dataclass
+class LoadTestReport:
+    """Throughput, latency and memory of a load test."""
+
+    agents: int
+    concurrency: int
+    wall_time: float
+    results: list[AgentRunResult] = field(default_factory=list)
+    max_rss_mb: float | None = None
+    server_stats: dict[str, int] | None = None
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for result in self.results if result.success)
+
+    @property
+    def total_steps(self) -> int:
+        return sum(result.steps for result in self.results)
+
+    def execution_time_percentile(self, percentile: int) -> float:
+        times = sorted(result.execution_time for result in self.results)
+        if len(times) < 2:
+            return times[0] if times else 0.0
+        return statistics.quantiles(times, n=100, method="inclusive")[percentile - 1]
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            **asdict(self),
+            "succeeded": self.succeeded,
+            "total_steps": self.total_steps,
+            "agents_per_second": self.agents / self.wall_time if self.wall_time else 0,
+            "steps_per_second": self.total_steps / self.wall_time
+            if self.wall_time
+            else 0,
+            "execution_time_p50": self.execution_time_percentile(50),
+            "execution_time_p95": self.execution_time_percentile(95),
+        }
+
+
+def max_rss_mb() -> float | None:
+    """Peak resident set size of this process in MiB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+async def _execute(agent: TraeAgent) -> AgentExecution:
+    try:
+        return await agent.execute_task()
+    finally:
+        await agent.tool_caller.close_tools()
+
+
+def run_agent(
+    config: Config, task: str, index: int, working_dir: Path
+) -> AgentRunResult:
+    """Run one agent to completion in its own event loop."""
+    start_time = time.time()
+    try:
+        working_dir.mkdir(parents=True, exist_ok=True)
+        agent = TraeAgent(config)
+        agent.new_task(task, {"project_path": str(working_dir), "issue": task})
+        execution = asyncio.run(_execute(agent))
+    except Exception as e:
+        return AgentRunResult(
+            index=index,
+            success=False,
+            steps=0,
+            execution_time=time.time() - start_time,
+            error=str(e),
+        )
+    return AgentRunResult(
+        index=index,
+        success=execution.success,
+        steps=len(execution.steps),
+        execution_time=execution.execution_time,
+        error=None if execution.success else execution.final_result,
+    )
+
+
+def run_load_test(
+    config: Config,
+    task: str,
+    agents: int,
+    concurrency: int,
+    workspace_root: Path,
+) -> LoadTestReport:
+    """Run `agents` agents on the same task, at most `concurrency` at a time.
+
+    The LLM clients are synchronous, so each agent runs in its own thread with
+    its own event loop. Every agent gets a separate working directory under
+    `workspace_root`.
+
+    Args:
+        config: Configuration shared by all agents
+        task: Task given to every agent
+        agents: Number of agents to run
+        concurrency: Maximum number of agents running at the same time
+        workspace_root: Directory holding the agents' working directories
+
+    Returns:
+        The per-agent results with the overall wall time and peak memory.
+    """
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                run_agent, config, task, index, workspace_root / f"agent_{index}"
+            )
+            for index in range(agents)
+        ]
+        results = [future.result() for future in futures]
+
+    return LoadTestReport(
+        agents=agents,
+        concurrency=concurrency,
+        wall_time=time.time() - start_time,
+        results=results,
+        max_rss_mb=max_rss_mb(),
+    )
@@ -0,0 +1,335 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Process-wide counters, gauges and histograms in the Prometheus text format.
+
+The metrics below are updated by the LLM client, the tool executor, the bash
+tool and the trajectory recorder. `polli serve` exposes them on `GET /metrics`,
+`polli batch --metrics-port` serves them over HTTP and `--metrics-file` writes
+them for the node exporter's textfile collector.
+"""
+
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, override
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOOL_LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+class Metric(ABC):
+    """A named metric with one series per combination of label values."""
+
+    type_name: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...]):
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: tuple[str, ...] = label_names
+        self._lock: threading.Lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"Metric {self.name} expects labels {list(self.label_names)}, got {list(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> list[tuple[str, str, float]]:
+        """Return (sample name, formatted labels, value) triples."""
+        pass
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for sample_name, labels, value in self.samples():
+            lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type_name: str = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...]):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be increased")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    @override
+    def samples(self) -> list[tuple[str, str, float]]:
+        with self._lock:
+            return [
+                (self.name, _format_labels(self.label_names, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Metric):
+    """A value that goes up and down, or is computed when scraped."""
+
+    type_name: str = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...]):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        """Count the code block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the value of this unlabelled gauge on every scrape."""
+        self._function = function
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return self._function()
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    @override
+    def samples(self) -> list[tuple[str, str, float]]:
+        if self._function is not None:
+            return [(self.name, "", self._function())]
+        with self._lock:
+            return [
+                (self.name, _format_labels(self.label_names, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Histogram(Metric):
+    """Observations counted in cumulative buckets, with their sum."""
+
+    type_name: str = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...],
+        buckets: tuple[float, ...],
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        # Per series: the count of each bucket (not cumulative), then the sum
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+            return sum(counts)
+
+    @override
+    def samples(self) -> list[tuple[str, str, float]]:
+        samples: list[tuple[str, str, float]] = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts, strict=True):
+                    cumulative += count
+                    labels = _format_labels(
+                        self.label_names + ("le",), key + (_format_value(bound),)
+                    )
+                    samples.append((f"{self.name}_bucket", labels, cumulative))
+                labels = _format_labels(self.label_names, key)
+                samples.append((f"{self.name}_sum", labels, total))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register[M: Metric](self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, label_names: tuple[str, ...] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(
+        self, name: str, documentation: str, label_names: tuple[str, ...] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LLM_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        return "".join(metric.render() for metric in self._metrics.values())
+
+    def write_textfile(self, path: str | Path) -> None:
+        """Atomically write the metrics for the node exporter textfile collector."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        _ = temp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(temp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    "polli_llm_request_duration_seconds",
+    "Wall time of LLM requests, including retries.",
+    ("provider", "model"),
+)
+LLM_REQUEST_ERRORS = REGISTRY.counter(
+    "polli_llm_request_errors_total",
+    "LLM requests that failed after all retries.",
+    ("provider", "model"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "polli_llm_tokens_total",
+    "Tokens sent to and generated by LLMs.",
+    ("provider", "model", "direction"),
+)
+LLM_RETRIES = REGISTRY.counter(
+    "polli_llm_retries_total",
+    "Retried LLM requests.",
+    ("provider", "model"),
+)
+LLM_RATE_LIMITED = REGISTRY.counter(
+    "polli_llm_rate_limited_total",
+    "LLM requests rejected with HTTP 429.",
+    ("provider", "model"),
+)
+TOOL_DURATION = REGISTRY.histogram(
+    "polli_tool_duration_seconds",
+    "Wall time of tool calls.",
+    ("tool",),
+    buckets=TOOL_LATENCY_BUCKETS,
+)
+TOOL_ERRORS = REGISTRY.counter(
+    "polli_tool_errors_total",
+    "Tool calls that failed.",
+    ("tool",),
+)
+ACTIVE_AGENTS = REGISTRY.gauge(
+    "polli_active_agents",
+    "Agents currently executing a task.",
+)
+BASH_SESSIONS = REGISTRY.gauge(
+    "polli_bash_sessions",
+    "Bash sessions whose shell is alive.",
+)
+TRAJECTORY_BYTES = REGISTRY.counter(
+    "polli_trajectory_bytes_written_total",
+    "Bytes written to trajectory files.",
+)
+
+
+def start_metrics_server(
+    port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY
+) -> "ThreadingHTTPServer":
+    """Serve `GET /metrics` from a background thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            _ = self.wfile.write(body)
+
+        @override
+        def log_message(self, format: str, *args: object) -> None:
+            return
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
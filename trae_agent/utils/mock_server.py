@@ -0,0 +1,622 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+# TODO: remove these annotations by defining fine-grained types
+# pyright: reportAny=false
+# pyright: reportExplicitAny=false
+
+"""Local mock of the OpenAI-compatible APIs used for load and latency testing.
+
+The server speaks the chat completions API (used by the Pollinations, Azure,
+Doubao and OpenRouter clients) and the responses API (used by the OpenAI and
+Ollama clients). Replies are taken from a script, indexed by the number of
+assistant turns already in the request, so every conversation walks through the
+script independently of how many agents share the server.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT_RE = re.compile(r"\[Project root path\]:\n(.+)\n")
+
+
+@dataclass
+class ScriptedToolCall:
+    """A tool call returned by the mock server.
+
+    String arguments may contain `{project_root}`, which is replaced with the
+    project root path found in the request.
+    """
+
+    name: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ScriptedResponse:
+    """One assistant turn returned by the mock server."""
+
+    content: str = ""
+    tool_calls: list[ScriptedToolCall] = field(default_factory=list)
+
+
+DEFAULT_SCRIPT: list[ScriptedResponse] = [
+    ScriptedResponse(
+        content="Let me look at the project first.",
+        tool_calls=[
+            ScriptedToolCall(
+                name="str_replace_based_edit_tool",
+                arguments={"command": "view", "path": "{project_root}"},
+            )
+        ],
+    ),
+    ScriptedResponse(
+        content="Listing the files with bash.",
+        tool_calls=[
+            ScriptedToolCall(
+                name="bash", arguments={"command": "cd {project_root} && ls -la"}
+            )
+        ],
+    ),
+    ScriptedResponse(
+        content="The task is complete.",
+        tool_calls=[ScriptedToolCall(name="task_done")],
+    ),
+]
+
+
+def load_script(script_path: str | Path) -> list[ScriptedResponse]:
+    """Load a mock server script from a JSON file.
+
+    The file holds a list of turns (or an object with a `responses` list), each
+    with an optional `content` string and an optional `tool_calls` list of
+    `{"name": ..., "arguments": {...}}` objects.
+    """
+    with open(script_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("responses", [])
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"Mock server script must be a non-empty list: {script_path}")
+
+    script: list[ScriptedResponse] = []
+    for turn in data:
+        script.append(
+            ScriptedResponse(
+                content=turn.get("content") or "",
+                tool_calls=[
+                    ScriptedToolCall(
+                        name=tool_call["name"],
+                        arguments=tool_call.get("arguments") or {},
+                    )
+                    for tool_call in turn.get("tool_calls") or []
+                ],
+            )
+        )
+    return script
+
+
+@dataclass
+class LatencyDistribution:
+    """Distribution of the time the mock server waits before answering, in seconds.
+
+    Supported kinds are `fixed` (a), `uniform` (a, b), `normal` (mean a, std b)
+    and `lognormal` (mu a, sigma b). Samples are never negative.
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Parse a spec such as `0.5`, `fixed:0.5`, `uniform:0.2:1.5` or `normal:1:0.3`."""
+        parts = spec.split(":")
+        try:
+            if len(parts) == 1:
+                return cls("fixed", float(parts[0]))
+            kind, values = parts[0], [float(value) for value in parts[1:]]
+        except ValueError as e:
+            raise ValueError(f"Invalid latency distribution: {spec}") from e
+
+        if kind == "fixed" and len(values) == 1:
+            return cls(kind, values[0])
+        if kind in ("uniform", "normal", "lognormal") and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"Invalid latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(self.a, self.b)
+        else:
+            value = self.a
+        return max(0.0, value)
+
+
+class MockLLMServer:
+    """Threaded HTTP server mocking the chat completions and responses APIs.
+
+    Besides the two APIs it serves `GET /v1/models`, and `GET /stats` with the
+    request and injected error counters, and the most requests that were
+    being answered at once (`peak_in_flight`).
+    """
+
+    def __init__(
+        self,
+        script: list[ScriptedResponse] | None = None,
+        latency: LatencyDistribution | None = None,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        chunk_delay: float = 0.0,
+        seed: int | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.script: list[ScriptedResponse] = script or DEFAULT_SCRIPT
+        self.latency: LatencyDistribution = latency or LatencyDistribution()
+        self.rate_limit_rate: float = rate_limit_rate
+        self.server_error_rate: float = server_error_rate
+        self.chunk_delay: float = chunk_delay
+
+        self._rng: random.Random = random.Random(seed)
+        self._lock: threading.Lock = threading.Lock()
+        self._stats: dict[str, int] = {
+            "requests": 0,
+            "chat_completions": 0,
+            "responses": 0,
+            "streamed": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+        }
+        self._thread: threading.Thread | None = None
+
+        self.httpd: ThreadingHTTPServer = ThreadingHTTPServer(
+            (host, port), _make_handler(self)
+        )
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to put in a provider's `base_url` setting."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def serve_forever(self) -> None:
+        """Serve requests in the current thread until `stop` is called."""
+        self.httpd.serve_forever()
+
+    def start(self) -> "MockLLMServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def enter_request(self) -> None:
+        with self._lock:
+            self._stats["in_flight"] += 1
+            self._stats["peak_in_flight"] = max(
+                self._stats["peak_in_flight"], self._stats["in_flight"]
+            )
+
+    def exit_request(self) -> None:
+        with self._lock:
+            self._stats["in_flight"] -= 1
+
+    def draw_fault(self) -> int | None:
+        """Return the status code of an injected error, or None to answer normally."""
+        with self._lock:
+            roll = self._rng.random()
+            if roll < self.rate_limit_rate:
+                self._stats["rate_limited"] += 1
+                return 429
+            if roll < self.rate_limit_rate + self.server_error_rate:
+                self._stats["server_errors"] += 1
+                return self._rng.choice([500, 502, 503])
+        return None
+
+    def draw_latency(self) -> float:
+        with self._lock:
+            return self.latency.sample(self._rng)
+
+    def next_turn(self, turn_index: int, project_root: str) -> ScriptedResponse:
+        """Return the scripted turn for a conversation; the last turn repeats."""
+        turn = self.script[min(turn_index, len(self.script) - 1)]
+        return ScriptedResponse(
+            content=turn.content,
+            tool_calls=[
+                ScriptedToolCall(
+                    name=tool_call.name,
+                    arguments={
+                        name: value.replace("{project_root}", project_root)
+                        if isinstance(value, str)
+                        else value
+                        for name, value in tool_call.arguments.items()
+                    },
+                )
+                for tool_call in turn.tool_calls
+            ],
+        )
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _project_root(messages: list[dict[str, Any]] | str) -> str:
+    """Find the project root the agent put in its first user message."""
+    if isinstance(messages, str):
+        messages = [{"content": messages}]
+    for message in messages:
+        content = message.get("content")
+        texts = (
+            [content]
+            if isinstance(content, str)
+            else [part.get("text") or "" for part in content or []]
+        )
+        for text in texts:
+            match = PROJECT_ROOT_RE.search(text)
+            if match:
+                return match.group(1).strip()
+    return "."
+
+
+def _chat_turn_index(messages: list[dict[str, Any]]) -> int:
+    return sum(1 for message in messages if message.get("role") == "assistant")
+
+
+def _responses_turn_index(items: list[dict[str, Any]] | str) -> int:
+    """Count the runs of consecutive model output items in a responses API input."""
+    if isinstance(items, str):
+        return 0
+    turns = 0
+    in_turn = False
+    for item in items:
+        is_output = item.get("type") in ("function_call", "reasoning") or (
+            item.get("role") == "assistant"
+        )
+        if is_output and not in_turn:
+            turns += 1
+        in_turn = is_output
+    return turns
+
+
+def _chat_completion(
+    turn: ScriptedResponse, model: str, prompt_tokens: int
+) -> dict[str, Any]:
+    tool_calls = [
+        {
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {
+                "name": tool_call.name,
+                "arguments": json.dumps(tool_call.arguments),
+            },
+        }
+        for tool_call in turn.tool_calls
+    ]
+    completion_tokens = _estimate_tokens(turn.content + json.dumps(tool_calls))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": turn.content or None,
+                    "tool_calls": tool_calls or None,
+                },
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+            "completion_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def _response(turn: ScriptedResponse, model: str, input_tokens: int) -> dict[str, Any]:
+    output: list[dict[str, Any]] = []
+    if turn.content:
+        output.append(
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [
+                    {"type": "output_text", "text": turn.content, "annotations": []}
+                ],
+            }
+        )
+    for tool_call in turn.tool_calls:
+        output.append(
+            {
+                "type": "function_call",
+                "id": f"fc_{uuid.uuid4().hex}",
+                "call_id": f"call_{uuid.uuid4().hex[:24]}",
+                "name": tool_call.name,
+                "arguments": json.dumps(tool_call.arguments),
+                "status": "completed",
+            }
+        )
+    output_tokens = _estimate_tokens(json.dumps(output))
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": model,
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def _chat_completion_chunks(
+    completion: dict[str, Any], include_usage: bool
+) -> list[dict[str, Any]]:
+    choice = completion["choices"][0]
+    message = choice["message"]
+    base = {
+        "id": completion["id"],
+        "object": "chat.completion.chunk",
+        "created": completion["created"],
+        "model": completion["model"],
+    }
+
+    deltas: list[dict[str, Any]] = [{"role": "assistant", "content": ""}]
+    for word in re.findall(r"\S+\s*", message["content"] or ""):
+        deltas.append({"content": word})
+    for index, tool_call in enumerate(message["tool_calls"] or []):
+        deltas.append({"tool_calls": [{"index": index, **tool_call}]})
+
+    chunks = [
+        {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+        for delta in deltas
+    ]
+    chunks.append(
+        {
+            **base,
+            "choices": [
+                {"index": 0, "delta": {}, "finish_reason": choice["finish_reason"]}
+            ],
+        }
+    )
+    if include_usage:
+        chunks.append({**base, "choices": [], "usage": completion["usage"]})
+    return chunks
+
+
+def _response_events(response: dict[str, Any]) -> list[dict[str, Any]]:
+    events: list[dict[str, Any]] = [
+        {
+            "type": "response.created",
+            "response": {**response, "status": "in_progress", "output": []},
+        }
+    ]
+    for output_index, item in enumerate(response["output"]):
+        events.append(
+            {
+                "type": "response.output_item.added",
+                "output_index": output_index,
+                "item": item,
+            }
+        )
+        if item["type"] == "message":
+            for word in re.findall(r"\S+\s*", item["content"][0]["text"]):
+                events.append(
+                    {
+                        "type": "response.output_text.delta",
+                        "item_id": item["id"],
+                        "output_index": output_index,
+                        "content_index": 0,
+                        "delta": word,
+                    }
+                )
+        events.append(
+            {
+                "type": "response.output_item.done",
+                "output_index": output_index,
+                "item": item,
+            }
+        )
+    events.append({"type": "response.completed", "response": response})
+    for sequence_number, event in enumerate(events):
+        event["sequence_number"] = sequence_number
+    return events
+
+
+def _make_handler(server: MockLLMServer) -> type[BaseHTTPRequestHandler]:
+    class MockLLMRequestHandler(BaseHTTPRequestHandler):
+        protocol_version: str = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/stats":
+                self._send_json(200, server.stats)
+            elif self.path.rstrip("/").endswith("/models"):
+                self._send_json(
+                    200,
+                    {
+                        "object": "list",
+                        "data": [{"id": "mock", "object": "model", "owned_by": "mock"}],
+                    },
+                )
+            else:
+                self._send_error(404, f"Unknown path: {self.path}")
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length)
+            if self.path.endswith("/chat/completions"):
+                endpoint = "chat_completions"
+            elif self.path.endswith("/responses"):
+                endpoint = "responses"
+            else:
+                self._send_error(404, f"Unknown path: {self.path}")
+                return
+
+            try:
+                payload: dict[str, Any] = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                self._send_error(400, "Request body is not valid JSON")
+                return
+
+            server.count("requests")
+            server.count(endpoint)
+            server.enter_request()
+            try:
+                time.sleep(server.draw_latency())
+            finally:
+                server.exit_request()
+
+            status = server.draw_fault()
+            if status == 429:
+                self._send_error(429, "Rate limit exceeded", {"Retry-After": "1"})
+                return
+            if status is not None:
+                self._send_error(status, "Injected server error")
+                return
+
+            model = payload.get("model") or "mock"
+            prompt_tokens = _estimate_tokens(body.decode("utf-8", errors="replace"))
+            stream = bool(payload.get("stream"))
+            if stream:
+                server.count("streamed")
+
+            if endpoint == "chat_completions":
+                messages = payload.get("messages") or []
+                turn = server.next_turn(
+                    _chat_turn_index(messages), _project_root(messages)
+                )
+                completion = _chat_completion(turn, model, prompt_tokens)
+                if stream:
+                    include_usage = bool(
+                        (payload.get("stream_options") or {}).get("include_usage")
+                    )
+                    self._send_events(
+                        [
+                            (None, chunk)
+                            for chunk in _chat_completion_chunks(
+                                completion, include_usage
+                            )
+                        ],
+                        done_marker=True,
+                    )
+                else:
+                    self._send_json(200, completion)
+            else:
+                items = payload.get("input") or []
+                turn = server.next_turn(
+                    _responses_turn_index(items), _project_root(items)
+                )
+                response = _response(turn, model, prompt_tokens)
+                if stream:
+                    self._send_events(
+                        [
+                            (event["type"], event)
+                            for event in _response_events(response)
+                        ],
+                        done_marker=False,
+                    )
+                else:
+                    self._send_json(200, response)
+
+        def _send_json(
+            self,
+            status: int,
+            data: dict[str, Any],
+            headers: dict[str, str] | None = None,
+        ) -> None:
+            encoded = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            _ = self.wfile.write(encoded)
+
+        def _send_error(
+            self, status: int, message: str, headers: dict[str, str] | None = None
+        ) -> None:
+            self._send_json(
+                status,
+                {"error": {"message": message, "type": "mock_error", "code": status}},
+                headers,
+            )
+
+        def _send_events(
+            self, events: list[tuple[str | None, dict[str, Any]]], done_marker: bool
+        ) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            for event_type, data in events:
+                if event_type:
+                    _ = self.wfile.write(f"event: {event_type}\n".encode())
+                _ = self.wfile.write(f"data: {json.dumps(data)}\n\n".encode())
+                self.wfile.flush()
+                if server.chunk_delay:
+                    time.sleep(server.chunk_delay)
+            if done_marker:
+                _ = self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return MockLLMRequestHandler
@@ -0,0 +1,167 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Supersede stale tool observations in the conversation history."""
+
+from dataclasses import dataclass
+
+from ..tools.base import ToolCall, ToolResult
+from ..tools.run import TRUNCATED_MESSAGE
+
+VIEW_TOOL_NAME = "str_replace_based_edit_tool"
+THINKING_TOOL_NAME = "sequentialthinking"
+
+
+@dataclass
+class _Observation:
+    """A tool result that is still present verbatim in the history."""
+
+    call_id: str
+    step_number: int
+    kind: str  # "view" or "thinking"
+    path: str | None = None
+    view_range: tuple[int, int] | None = None  # None means the whole file
+    truncated: bool = False
+    thought_number: int | None = None
+    total_thoughts: int | None = None
+
+
+class ObservationDeduplicator:
+    """Tracks file views and thinking results and decides which ones are stale.
+
+    A file view is superseded when a later successful view of the same path
+    covers its line range. Sequential thinking results carry only status
+    boilerplate, so every result but the latest collapses into a short marker.
+    The latest content is always kept verbatim.
+    """
+
+    def __init__(self):
+        self.observations: list[_Observation] = []
+
+    def reset(self) -> None:
+        """Forget all tracked observations, e.g. when a new task starts."""
+        self.observations = []
+
+    def observe(
+        self,
+        step_number: int,
+        tool_calls: list[ToolCall],
+        tool_results: list[ToolResult],
+    ) -> dict[str, str]:
+        """Register the results of a step and return the superseded observations.
+
+        Args:
+            step_number: Step that produced the tool results
+            tool_calls: Tool calls made in the step
+            tool_results: Results of the tool calls
+
+        Returns:
+            A mapping from the call id of each superseded tool result to the stub
+            that should replace its content in the history.
+        """
+        calls_by_id = {tool_call.call_id: tool_call for tool_call in tool_calls}
+        superseded: dict[str, str] = {}
+
+        for tool_result in tool_results:
+            tool_call = calls_by_id.get(tool_result.call_id)
+            if tool_call is None or not tool_result.success:
+                continue
+
+            observation = self._make_observation(step_number, tool_call, tool_result)
+            if observation is None:
+                continue
+
+            remaining: list[_Observation] = []
+            for previous in self.observations:
+                stub = (
+                    self._supersede(previous, observation)
+                    if previous.step_number < step_number
+                    else None
+                )
+                if stub is None:
+                    remaining.append(previous)
+                else:
+                    superseded[previous.call_id] = stub
+            remaining.append(observation)
+            self.observations = remaining
+
+        return superseded
+
+    def _make_observation(
+        self, step_number: int, tool_call: ToolCall, tool_result: ToolResult
+    ) -> _Observation | None:
+        arguments = tool_call.arguments
+        if tool_call.name == VIEW_TOOL_NAME and arguments.get("command") == "view":
+            path = arguments.get("path")
+            if not isinstance(path, str):
+                return None
+            view_range = arguments.get("view_range")
+            parsed_range: tuple[int, int] | None = None
+            if (
+                isinstance(view_range, list)
+                and len(view_range) == 2
+                and all(isinstance(i, int) for i in view_range)
+            ):
+                start, end = int(view_range[0]), int(view_range[1])  # pyright: ignore[reportArgumentType]
+                # [start, -1] shows the rest of the file; [1, -1] is the whole file
+                parsed_range = None if start <= 1 and end == -1 else (start, end)
+            return _Observation(
+                call_id=tool_result.call_id,
+                step_number=step_number,
+                kind="view",
+                path=path.rstrip("/") or "/",
+                view_range=parsed_range,
+                truncated=TRUNCATED_MESSAGE in (tool_result.result or ""),
+            )
+
+        if tool_call.name == THINKING_TOOL_NAME:
+            thought_number = arguments.get("thought_number")
+            total_thoughts = arguments.get("total_thoughts")
+            return _Observation(
+                call_id=tool_result.call_id,
+                step_number=step_number,
+                kind="thinking",
+                thought_number=thought_number
+                if isinstance(thought_number, int)
+                else None,
+                total_thoughts=total_thoughts
+                if isinstance(total_thoughts, int)
+                else None,
+            )
+
+        return None
+
+    def _supersede(self, previous: _Observation, latest: _Observation) -> str | None:
+        """Return the stub for `previous` if `latest` makes it stale, else None."""
+        if previous.kind != latest.kind:
+            return None
+
+        if latest.kind == "thinking":
+            label = "Thought"
+            if previous.thought_number is not None:
+                label += f" {previous.thought_number}"
+                if previous.total_thoughts is not None:
+                    label += f"/{previous.total_thoughts}"
+            return f"[{label} recorded; status superseded by step {latest.step_number}]"
+
+        if previous.path != latest.path or not self._covers(previous, latest):
+            return None
+        return (
+            f"[Output superseded by step {latest.step_number}: "
+            f"`{previous.path}` was viewed again. Refer to the latest view.]"
+        )
+
+    @staticmethod
+    def _covers(previous: _Observation, latest: _Observation) -> bool:
+        if latest.view_range is None:
+            # A clipped full view does not contain every line of a ranged view
+            return previous.view_range is None or not latest.truncated
+        if previous.view_range is None or latest.truncated:
+            return False
+        prev_start, prev_end = previous.view_range
+        start, end = latest.view_range
+        if start > prev_start:
+            return False
+        if end == -1:
+            return True
+        return prev_end != -1 and end >= prev_end
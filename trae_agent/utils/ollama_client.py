@@ -6,10 +6,9 @@ Ollama API client wrapper with tool integration
 """
 
 import json
-import random
-import time
 from typing import override
 
+import httpx
 import openai
 from openai.types.responses import (
     EasyInputMessageParam,
@@ -26,8 +25,10 @@ from .llm_basics import LLMMessage, LLMResponse, LLMUsage
 
 
 class OllamaClient(BaseLLMClient):
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         # ollama default api key is ollama
         self.api_key = "ollama"
@@ -38,6 +39,7 @@ class OllamaClient(BaseLLMClient):
             base_url=model_parameters.base_url
             if model_parameters.base_url
             else "http://localhost:11434",
+            http_client=self.http_client,
         )
 
         self.message_history: ResponseInputParam = []
@@ -90,8 +92,7 @@ class OllamaClient(BaseLLMClient):
                 break
             except Exception as e:
                 error_message += f"Error {i + 1}: {str(e)}\n"
-                # Randomly sleep for 3-30 seconds
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -5,10 +5,9 @@
 
 import json
 import os
-import random
-import time
 from typing import override
 
+import httpx
 import openai
 from openai.types.responses import (
     FunctionToolParam,
@@ -21,13 +20,16 @@ from ..tools.base import Tool, ToolCall, ToolResult
 from ..utils.config import ModelParameters
 from .base_client import BaseLLMClient
 from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+from .openai_compat import dump_tool_arguments, sort_tools
 
 
 class OpenAIClient(BaseLLMClient):
     """OpenAI client wrapper with tool schema generation."""
 
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         if self.api_key == "":
             self.api_key: str = os.getenv("OPENAI_API_KEY", "")
@@ -37,7 +39,11 @@ class OpenAIClient(BaseLLMClient):
                 "OpenAI API key not provided. Set OPENAI_API_KEY in environment variables or config file."
             )
 
-        self.client: openai.OpenAI = openai.OpenAI(api_key=self.api_key)
+        self.client: openai.OpenAI = openai.OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url or None,
+            http_client=self.http_client,
+        )
         self.message_history: ResponseInputParam = []
 
     @override
@@ -66,7 +72,7 @@ class OpenAIClient(BaseLLMClient):
                     strict=True,
                     type="function",
                 )
-                for tool in tools
+                for tool in sort_tools(tools)
             ]
 
         api_call_input: ResponseInputParam = []
@@ -87,12 +93,14 @@ class OpenAIClient(BaseLLMClient):
                     else openai.NOT_GIVEN,
                     top_p=model_parameters.top_p,
                     max_output_tokens=model_parameters.max_tokens,
+                    text={"format": {"type": "json_object"}}
+                    if model_parameters.json_mode
+                    else openai.NOT_GIVEN,
                 )
                 break
             except Exception as e:
                 error_message += f"Error {i + 1}: {str(e)}\n"
-                # Randomly sleep for 3-30 seconds
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -128,8 +136,12 @@ class OpenAIClient(BaseLLMClient):
             usage = LLMUsage(
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
-                cache_read_input_tokens=response.usage.input_tokens_details.cached_tokens,
-                reasoning_tokens=response.usage.output_tokens_details.reasoning_tokens,
+                cache_read_input_tokens=response.usage.input_tokens_details.cached_tokens
+                if response.usage.input_tokens_details
+                else 0,
+                reasoning_tokens=response.usage.output_tokens_details.reasoning_tokens
+                if response.usage.output_tokens_details
+                else 0,
             )
 
         llm_response = LLMResponse(
@@ -200,7 +212,7 @@ class OpenAIClient(BaseLLMClient):
         return ResponseFunctionToolCallParam(
             call_id=tool_call.call_id,
             name=tool_call.name,
-            arguments=json.dumps(tool_call.arguments),
+            arguments=dump_tool_arguments(tool_call.arguments),
             type="function_call",
         )
 
@@ -0,0 +1,42 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Helpers shared by the OpenAI-compatible clients.
+
+OpenAI-style providers cache prompts automatically, but only when the request
+prefix is byte-identical between calls. These helpers keep the parts of a
+request that the clients build themselves deterministic.
+"""
+
+import json
+
+from openai.types import CompletionUsage
+
+from ..tools.base import Tool, ToolCallArguments
+from .llm_basics import LLMUsage
+
+
+def sort_tools(tools: list[Tool]) -> list[Tool]:
+    """Return the tools in a stable order, independent of how they were configured."""
+    return sorted(tools, key=lambda tool: tool.name)
+
+
+def dump_tool_arguments(arguments: ToolCallArguments) -> str:
+    """Serialize tool call arguments with a stable key order."""
+    return json.dumps(arguments, sort_keys=True)
+
+
+def parse_completion_usage(usage: CompletionUsage) -> LLMUsage:
+    """Convert chat completions usage, including cached and reasoning tokens."""
+    prompt_details = usage.prompt_tokens_details
+    completion_details = usage.completion_tokens_details
+    return LLMUsage(
+        input_tokens=usage.prompt_tokens,
+        output_tokens=usage.completion_tokens,
+        cache_read_input_tokens=(prompt_details.cached_tokens or 0)
+        if prompt_details
+        else 0,
+        reasoning_tokens=(completion_details.reasoning_tokens or 0)
+        if completion_details
+        else 0,
+    )
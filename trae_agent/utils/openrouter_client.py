@@ -5,10 +5,9 @@
 
 import json
 import os
-import random
-import time
 from typing import override
 
+import httpx
 import openai
 from openai.types.chat import (
     ChatCompletionAssistantMessageParam,
@@ -28,14 +27,17 @@ from openai.types.shared_params.function_definition import FunctionDefinition
 from ..tools.base import Tool, ToolCall
 from ..utils.config import ModelParameters
 from .base_client import BaseLLMClient
-from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+from .llm_basics import LLMMessage, LLMResponse
+from .openai_compat import dump_tool_arguments, parse_completion_usage, sort_tools
 
 
 class OpenRouterClient(BaseLLMClient):
     """OpenRouter client wrapper with tool schema generation."""
 
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         if self.api_key == "":
             self.api_key: str = os.getenv("OPENROUTER_API_KEY", "")
@@ -47,7 +49,9 @@ class OpenRouterClient(BaseLLMClient):
 
         # Use OpenAI SDK with OpenRouter's base URL
         self.client: openai.OpenAI = openai.OpenAI(
-            api_key=self.api_key, base_url="https://openrouter.ai/api/v1"
+            api_key=self.api_key,
+            base_url="https://openrouter.ai/api/v1",
+            http_client=self.http_client,
         )
         self.message_history: list[ChatCompletionMessageParam] = []
 
@@ -83,7 +87,7 @@ class OpenRouterClient(BaseLLMClient):
                     ),
                     type="function",
                 )
-                for tool in tools
+                for tool in sort_tools(tools)
             ]
 
         # Set up extra headers for OpenRouter
@@ -104,14 +108,16 @@ class OpenRouterClient(BaseLLMClient):
                     temperature=model_parameters.temperature,
                     top_p=model_parameters.top_p,
                     max_tokens=model_parameters.max_tokens,
+                    response_format={"type": "json_object"}
+                    if model_parameters.json_mode
+                    else openai.NOT_GIVEN,
                     extra_headers=extra_headers if extra_headers else openai.NOT_GIVEN,
                     n=1,
                 )
                 break
             except Exception as e:
                 error_message += f"Error {i + 1}: {str(e)}\n"
-                # Randomly sleep for 3-30 seconds
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -142,14 +148,7 @@ class OpenRouterClient(BaseLLMClient):
             tool_calls=tool_calls,
             finish_reason=choice.finish_reason,
             model=response.model,
-            usage=(
-                LLMUsage(
-                    input_tokens=response.usage.prompt_tokens,
-                    output_tokens=response.usage.completion_tokens,
-                )
-                if response.usage
-                else None
-            ),
+            usage=parse_completion_usage(response.usage) if response.usage else None,
         )
 
         # update message history
@@ -163,7 +162,7 @@ class OpenRouterClient(BaseLLMClient):
                             id=tool_call.call_id,
                             function=Function(
                                 name=tool_call.name,
-                                arguments=json.dumps(tool_call.arguments),
+                                arguments=dump_tool_arguments(tool_call.arguments),
                             ),
                             type="function",
                         )
@@ -221,7 +220,8 @@ class OpenRouterClient(BaseLLMClient):
                             {
                                 "name": msg.tool_call.name,
                                 "arguments": msg.tool_call.arguments,
-                            }
+                            },
+                            sort_keys=True,
                         ),
                         role="function",
                         name=msg.tool_call.name,
@@ -5,10 +5,9 @@
 
 import json
 import os
-import random
-import time
 from typing import override
 
+import httpx
 import openai
 from openai.types.chat import (
     ChatCompletionAssistantMessageParam,
@@ -28,14 +27,17 @@ from openai.types.shared_params.function_definition import FunctionDefinition
 from ..tools.base import Tool, ToolCall, ToolResult
 from ..utils.config import ModelParameters
 from .base_client import BaseLLMClient
-from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+from .llm_basics import LLMMessage, LLMResponse
+from .openai_compat import dump_tool_arguments, parse_completion_usage, sort_tools
 
 
 class PollinationsClient(BaseLLMClient):
     """Pollinations client wrapper with tool schema generation."""
 
-    def __init__(self, model_parameters: ModelParameters):
-        super().__init__(model_parameters)
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
 
         # Pollinations API doesn't require an API key for basic usage
         # But we can support optional API key for authenticated requests
@@ -49,6 +51,7 @@ class PollinationsClient(BaseLLMClient):
         self.client: openai.OpenAI = openai.OpenAI(
             api_key=self.api_key or "dummy-key",  # Pollinations doesn't require auth
             base_url=self.base_url,
+            http_client=self.http_client,
         )
         self.message_history: list[ChatCompletionMessageParam] = []
 
@@ -79,7 +82,7 @@ class PollinationsClient(BaseLLMClient):
                     ),
                     type="function",
                 )
-                for tool in tools
+                for tool in sort_tools(tools)
             ]
 
         api_call_input: list[ChatCompletionMessageParam] = []
@@ -98,12 +101,14 @@ class PollinationsClient(BaseLLMClient):
                     temperature=model_parameters.temperature,
                     top_p=model_parameters.top_p,
                     max_tokens=model_parameters.max_tokens,
+                    response_format={"type": "json_object"}
+                    if model_parameters.json_mode
+                    else openai.NOT_GIVEN,
                 )
                 break
             except Exception as e:
                 error_message += f"Error {i + 1}: {str(e)}\n"
-                # Randomly sleep for 3-30 seconds
-                time.sleep(random.randint(3, 30))
+                self.sleep_before_retry(e)
                 continue
 
         if response is None:
@@ -113,8 +118,6 @@ class PollinationsClient(BaseLLMClient):
 
         # Update message history
         self.message_history = api_call_input
-        if response.choices and response.choices[0].message:
-            self.message_history.append(response.choices[0].message)
 
         content = ""
         tool_calls: list[ToolCall] = []
@@ -136,14 +139,34 @@ class PollinationsClient(BaseLLMClient):
                         )
                     )
 
+        # Store the reply as a plain param so it serializes identically on every
+        # later request instead of re-dumping the SDK response object.
+        if tool_calls:
+            self.message_history.append(
+                ChatCompletionAssistantMessageParam(
+                    role="assistant",
+                    content=content,
+                    tool_calls=[
+                        ChatCompletionMessageToolCallParam(
+                            id=tool_call.call_id,
+                            function=Function(
+                                name=tool_call.name,
+                                arguments=dump_tool_arguments(tool_call.arguments),
+                            ),
+                            type="function",
+                        )
+                        for tool_call in tool_calls
+                    ],
+                )
+            )
+        elif content:
+            self.message_history.append(
+                ChatCompletionAssistantMessageParam(role="assistant", content=content)
+            )
+
         usage = None
         if response.usage:
-            usage = LLMUsage(
-                input_tokens=response.usage.prompt_tokens,
-                output_tokens=response.usage.completion_tokens,
-                cache_read_input_tokens=0,  # Pollinations doesn't provide cache info
-                reasoning_tokens=0,  # Pollinations doesn't provide reasoning tokens
-            )
+            usage = parse_completion_usage(response.usage)
 
         llm_response = LLMResponse(
             content=content,
@@ -232,7 +255,7 @@ class PollinationsClient(BaseLLMClient):
                     id=tool_call.call_id,
                     function=Function(
                         name=tool_call.name,
-                        arguments=json.dumps(tool_call.arguments),
+                        arguments=dump_tool_arguments(tool_call.arguments),
                     ),
                     type="function",
                 )
@@ -0,0 +1,182 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+# TODO: remove these annotations by defining fine-grained types
+# pyright: reportAny=false
+# pyright: reportExplicitAny=false
+
+"""Replay client that feeds recorded trajectory responses back to the agent."""
+
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, override
+
+import httpx
+
+from ..tools.base import Tool, ToolCall, ToolCallArguments
+from .base_client import BaseLLMClient
+from .config import ModelParameters
+from .llm_basics import LLMMessage, LLMResponse, LLMUsage
+
+PROJECT_PATH_RE = re.compile(r"\[Project root path\]:\n(.+)\n")
+
+
+def load_trajectory(trajectory_path: str | Path) -> dict[str, Any]:
+    """Load a trajectory file written by TrajectoryRecorder."""
+    with open(trajectory_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def recorded_project_path(trajectory: dict[str, Any]) -> str | None:
+    """Return the project root the trajectory was recorded against, if known."""
+    for interaction in trajectory.get("llm_interactions", []):
+        for message in interaction.get("input_messages", []):
+            match = PROJECT_PATH_RE.search(message.get("content") or "")
+            if match:
+                return match.group(1).strip()
+    return None
+
+
+class ReplayClient(BaseLLMClient):
+    """Returns the responses of a recorded trajectory in order, without any network.
+
+    The trajectory path is taken from `base_url`, or from the
+    REPLAY_TRAJECTORY_PATH environment variable.
+    """
+
+    def __init__(
+        self, model_parameters: ModelParameters, http_client: httpx.Client | None = None
+    ):
+        super().__init__(model_parameters, http_client)
+
+        if self.base_url is None or self.base_url == "":
+            self.base_url = os.getenv("REPLAY_TRAJECTORY_PATH")
+
+        if self.base_url is None or self.base_url == "":
+            raise ValueError(
+                "Replay trajectory not provided. Set REPLAY_TRAJECTORY_PATH in environment variables or base_url in config file."
+            )
+
+        trajectory = load_trajectory(self.base_url)
+        self.responses: list[LLMResponse] = [
+            self.parse_response(interaction["response"])
+            for interaction in trajectory.get("llm_interactions", [])
+        ]
+        self.next_index: int = 0
+        # (recorded project path, replay project path)
+        self.path_remap: tuple[str, str] | None = None
+
+    @override
+    def set_chat_history(self, messages: list[LLMMessage]) -> None:
+        """Replayed responses do not depend on the history."""
+        pass
+
+    @override
+    def chat(
+        self,
+        messages: list[LLMMessage],
+        model_parameters: ModelParameters,
+        tools: list[Tool] | None = None,
+        reuse_history: bool = True,
+    ) -> LLMResponse:
+        """Return the next recorded response."""
+        if self.next_index >= len(self.responses):
+            raise ValueError(
+                f"Replay trajectory exhausted after {len(self.responses)} responses"
+            )
+
+        llm_response = self.responses[self.next_index]
+        self.next_index += 1
+
+        if self.path_remap and llm_response.tool_calls:
+            llm_response = LLMResponse(
+                content=llm_response.content,
+                usage=llm_response.usage,
+                model=llm_response.model,
+                finish_reason=llm_response.finish_reason,
+                tool_calls=[
+                    ToolCall(
+                        name=tool_call.name,
+                        call_id=tool_call.call_id,
+                        arguments=self._remap_arguments(tool_call.arguments),
+                        id=tool_call.id,
+                    )
+                    for tool_call in llm_response.tool_calls
+                ],
+            )
+
+        if self.trajectory_recorder:
+            self.trajectory_recorder.record_llm_interaction(
+                messages=messages,
+                response=llm_response,
+                provider="replay",
+                model=model_parameters.model,
+                tools=tools,
+            )
+
+        return llm_response
+
+    @override
+    def supports_tool_calling(self, model_parameters: ModelParameters) -> bool:
+        return True
+
+    @staticmethod
+    def parse_response(data: dict[str, Any]) -> LLMResponse:
+        """Parse a response recorded by TrajectoryRecorder.record_llm_interaction."""
+        usage = data.get("usage") or {}
+        tool_calls = data.get("tool_calls")
+        return LLMResponse(
+            content=data.get("content") or "",
+            usage=LLMUsage(
+                input_tokens=usage.get("input_tokens") or 0,
+                output_tokens=usage.get("output_tokens") or 0,
+                cache_creation_input_tokens=usage.get("cache_creation_input_tokens")
+                or 0,
+                cache_read_input_tokens=usage.get("cache_read_input_tokens") or 0,
+                reasoning_tokens=usage.get("reasoning_tokens") or 0,
+            )
+            if usage
+            else None,
+            model=data.get("model"),
+            finish_reason=data.get("finish_reason"),
+            tool_calls=[
+                ToolCall(
+                    name=tool_call["name"],
+                    call_id=tool_call["call_id"],
+                    arguments=tool_call.get("arguments") or {},
+                    id=tool_call.get("id"),
+                )
+                for tool_call in tool_calls
+            ]
+            if tool_calls
+            else None,
+        )
+
+    @staticmethod
+    def step_durations(trajectory: dict[str, Any]) -> dict[int, float]:
+        """Return the wall time of each recorded agent step, in seconds.
+
+        Steps are recorded when they finish, so each duration is measured from
+        the end of the previous step, or from the start of the recording.
+        """
+        durations: dict[int, float] = {}
+        previous = trajectory.get("start_time")
+        for step in trajectory.get("agent_steps", []):
+            if previous:
+                durations[step["step_number"]] = (
+                    datetime.fromisoformat(step["timestamp"])
+                    - datetime.fromisoformat(previous)
+                ).total_seconds()
+            previous = step["timestamp"]
+        return durations
+
+    def _remap_arguments(self, arguments: ToolCallArguments) -> ToolCallArguments:
+        assert self.path_remap is not None
+        recorded, replayed = self.path_remap
+        return {
+            name: value.replace(recorded, replayed) if isinstance(value, str) else value
+            for name, value in arguments.items()
+        }
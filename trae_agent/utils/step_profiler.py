@@ -0,0 +1,224 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Per-step CPU and allocation profiling of the agent's own code.
+
+Each step runs under cProfile and a stack sampler of the event loop thread,
+which runs the agent, the tools' Python code and the console while the LLM
+request waits in a worker thread. tracemalloc traces are cleared when a step
+starts, so a snapshot at its end shows the memory the step allocated and kept.
+
+The output directory gets, per step, a `step_NNN.prof` file (readable with
+`pstats` or snakeviz) and a `step_NNN_alloc.txt` report, and for the whole run
+a merged `merged.prof`, a `merged.folded` file of sampled stacks for
+flamegraph.pl or speedscope, and a `summary.json`.
+"""
+
+import cProfile
+import json
+import pstats
+import selectors
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import FrameType
+
+from ..agent.agent_basics import AgentStep
+
+
+@dataclass
+class StepProfile:
+    """Profile summary of one step."""
+
+    step_number: int
+    total_time: float
+    llm_time: float
+    tool_time: float
+    non_llm_time: float
+    profiled_cpu_time: float
+    samples: int
+    allocated_bytes: int
+    peak_traced_bytes: int
+    flagged: bool
+    profile_file: str
+    allocations_file: str
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the Python stack of one thread from a background thread.
+
+    The stacks are counted in the collapsed format of flamegraph.pl, so they
+    show where the thread spent its time, unlike cProfile's call graph.
+    Samples taken while an event loop waits in its selector are skipped.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id: int = thread_id
+        self.interval: float = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # pyright: ignore[reportPrivateUsage]
+            if frame is None or (
+                frame.f_code.co_name == "select"
+                and frame.f_code.co_filename == selectors.__file__
+            ):
+                continue
+            labels: list[str] = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+
+class StepProfiler:
+    """Profiles every agent step and writes the results to a directory."""
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        overhead_threshold: float = 1.0,
+        sample_interval: float = 0.005,
+        traceback_frames: int = 1,
+    ):
+        """Initialize the profiler.
+
+        Args:
+            output_dir: Directory for the profile files, created if needed
+            overhead_threshold: Steps whose non-LLM time exceeds this many
+                seconds are flagged
+            sample_interval: Seconds between stack samples
+            traceback_frames: Frames tracemalloc keeps per allocation
+        """
+        self.output_dir: Path = Path(output_dir)
+        self.overhead_threshold: float = overhead_threshold
+        self.steps: list[StepProfile] = []
+        self.sample_interval: float = sample_interval
+        self.stacks: Counter[str] = Counter()
+
+        self._profile: cProfile.Profile | None = None
+        self._sampler: StackSampler | None = None
+        self._started_tracemalloc: bool = False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(traceback_frames)
+            self._started_tracemalloc = True
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def start_step(self) -> None:
+        """Start profiling a step in the calling thread."""
+        tracemalloc.clear_traces()
+        self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def end_step(self, step: AgentStep) -> StepProfile | None:
+        """Stop profiling the step and write its profile files."""
+        if self._profile is None or self._sampler is None:
+            return None
+        self._profile.disable()
+        self._sampler.stop()
+        self.stacks.update(self._sampler.stacks)
+        samples = self._sampler.stacks.total()
+        _, peak_traced_bytes = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        profile = self._profile
+        self._profile = self._sampler = None
+
+        prefix = f"step_{step.step_number:03d}"
+        profile_file = self.output_dir / f"{prefix}.prof"
+        profile.dump_stats(profile_file)
+
+        # Leave out the profilers' own bookkeeping
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+        ]
+        statistics = snapshot.filter_traces(filters).statistics("lineno")
+        allocations_file = self.output_dir / f"{prefix}_alloc.txt"
+        with open(allocations_file, "w", encoding="utf-8") as f:
+            _ = f.write(
+                f"Step {step.step_number}: peak traced memory {peak_traced_bytes} bytes\n"
+                "Largest allocations made during the step and still alive:\n"
+            )
+            for statistic in statistics[:25]:
+                _ = f.write(f"{statistic}\n")
+
+        timings = step.timings
+        tool_time = sum(timings.tool_durations.values())
+        non_llm_time = max(0.0, timings.total_time - timings.llm_time)
+        step_profile = StepProfile(
+            step_number=step.step_number,
+            total_time=timings.total_time,
+            llm_time=timings.llm_time,
+            tool_time=tool_time,
+            non_llm_time=non_llm_time,
+            profiled_cpu_time=pstats.Stats(profile).total_tt,  # pyright: ignore[reportAttributeAccessIssue]
+            samples=samples,
+            allocated_bytes=sum(statistic.size for statistic in statistics),
+            peak_traced_bytes=peak_traced_bytes,
+            flagged=non_llm_time > self.overhead_threshold,
+            profile_file=str(profile_file),
+            allocations_file=str(allocations_file),
+        )
+        self.steps.append(step_profile)
+        return step_profile
+
+    def finish(self) -> Path | None:
+        """Write the merged profile, the collapsed stacks and the summary.
+
+        Returns:
+            The path of the summary, or None if no step was profiled.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        if not self.steps:
+            return None
+
+        merged = pstats.Stats(self.steps[0].profile_file)
+        for step_profile in self.steps[1:]:
+            _ = merged.add(step_profile.profile_file)
+        merged.dump_stats(self.output_dir / "merged.prof")
+
+        with open(self.output_dir / "merged.folded", "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                _ = f.write(f"{stack} {count}\n")
+
+        summary_file = self.output_dir / "summary.json"
+        with open(summary_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "overhead_threshold": self.overhead_threshold,
+                    "sample_interval": self.sample_interval,
+                    "flagged_steps": [
+                        step.step_number for step in self.steps if step.flagged
+                    ],
+                    "steps": [asdict(step) for step in self.steps],
+                },
+                f,
+                indent=2,
+            )
+        return summary_file
@@ -0,0 +1,322 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Lightweight tracing that exports OpenTelemetry-compatible spans.
+
+Spans are exported in the OTLP/JSON encoding, either to an OTLP/HTTP collector
+endpoint or appended to a local JSON lines file (one export request per line,
+the format of the OpenTelemetry Collector's file exporter). The current span
+lives in a context variable, so it follows asyncio tasks and
+`asyncio.to_thread` calls: tools run concurrently by `asyncio.gather` become
+overlapping children of the same step span.
+
+If `TRACEPARENT` holds a W3C trace context, root spans join that trace, which
+connects the agent's spans with those of the pipeline that started it.
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .config import TracingConfig
+
+if TYPE_CHECKING:
+    import httpx
+
+AttributeValue = str | int | float | bool
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+_current_span: ContextVar["Span | None"] = ContextVar(
+    "polli_current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    """A timed operation, with the ids that place it in its trace."""
+
+    name: str
+    trace_id: str = ""
+    span_id: str = ""
+    parent_span_id: str | None = None
+    kind: int = SPAN_KIND_INTERNAL
+    start_time_ns: int = 0
+    end_time_ns: int = 0
+    attributes: dict[str, AttributeValue] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: AttributeValue | None) -> None:
+        """Set an attribute; None values are skipped."""
+        if value is not None:
+            self.attributes[key] = value
+
+    def to_otlp(self) -> dict[str, object]:
+        """Encode the span in the OTLP/JSON format."""
+        span: dict[str, object] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": STATUS_CODE_ERROR, "message": self.error}
+            if self.error
+            else {"code": STATUS_CODE_OK},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_attributes(
+    attributes: dict[str, AttributeValue],
+) -> list[dict[str, object]]:
+    encoded: list[dict[str, object]] = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded_value: dict[str, object] = {"boolValue": value}
+        elif isinstance(value, int):
+            # 64-bit integers are strings in OTLP/JSON
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+
+def parse_traceparent(traceparent: str | None) -> tuple[str, str] | None:
+    """Extract the trace id and parent span id from a W3C `traceparent` header."""
+    if not traceparent:
+        return None
+    parts = traceparent.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+class SpanExporter(ABC):
+    """Sends batches of OTLP/JSON export requests somewhere."""
+
+    @abstractmethod
+    def export(self, request: dict[str, object]) -> None:
+        """Export one `ExportTraceServiceRequest` holding finished spans."""
+        pass
+
+    def shutdown(self) -> None:
+        """Release the resources of the exporter."""
+        return
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends export requests to a JSON lines file."""
+
+    def __init__(self, path: str | Path):
+        self.path: Path = Path(path)
+        self._lock: threading.Lock = threading.Lock()
+
+    def export(self, request: dict[str, object]) -> None:
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                _ = f.write(line)
+
+
+class OTLPSpanExporter(SpanExporter):
+    """Posts export requests to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        headers: dict[str, str] | None = None,
+        http_client: "httpx.Client | None" = None,
+    ):
+        import httpx
+
+        endpoint = endpoint.rstrip("/")
+        if not endpoint.endswith("/v1/traces"):
+            endpoint += "/v1/traces"
+        self.endpoint: str = endpoint
+        self.headers: dict[str, str] = {
+            "Content-Type": "application/json",
+            **(headers or {}),
+        }
+        self._owns_client: bool = http_client is None
+        self.http_client: httpx.Client = http_client or httpx.Client(timeout=10.0)
+
+    def export(self, request: dict[str, object]) -> None:
+        import httpx
+
+        try:
+            response = self.http_client.post(
+                self.endpoint, content=json.dumps(request), headers=self.headers
+            )
+            _ = response.raise_for_status()
+        except httpx.HTTPError as e:
+            # Losing spans must never fail the task
+            print(f"Warning: Failed to export spans to {self.endpoint}: {e}")
+
+    def shutdown(self) -> None:
+        if self._owns_client:
+            self.http_client.close()
+
+
+class Tracer:
+    """Creates spans and exports them in batches.
+
+    Finished spans wait for the next flush. Beyond `max_queue_size` of them,
+    new spans are dropped and counted in `dropped_spans`.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        service_name: str = "polli-agent",
+        max_queue_size: int = 2048,
+    ):
+        self.exporter: SpanExporter = exporter
+        self.service_name: str = service_name
+        self.max_queue_size: int = max_queue_size
+        self.remote_parent: tuple[str, str] | None = parse_traceparent(
+            os.environ.get("TRACEPARENT")
+        )
+        self._finished: list[Span] = []
+        self.dropped_spans: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        attributes: dict[str, AttributeValue] | None = None,
+        kind: int = SPAN_KIND_INTERNAL,
+    ) -> Iterator[Span]:
+        """Open a span as a child of the current one, ending it on exit."""
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+        elif self.remote_parent is not None:
+            trace_id, parent_span_id = self.remote_parent
+        else:
+            trace_id, parent_span_id = os.urandom(16).hex(), None
+
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_span_id=parent_span_id,
+            kind=kind,
+            start_time_ns=time.time_ns(),
+            attributes=dict(attributes or {}),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_time_ns = time.time_ns()
+            self._on_end(span)
+
+    def _on_end(self, span: Span) -> None:
+        # Spans end on the event loop, so exporting a full queue here would
+        # block it on the exporter's I/O
+        with self._lock:
+            if len(self._finished) >= self.max_queue_size:
+                self.dropped_spans += 1
+                return
+            self._finished.append(span)
+
+    def flush(self) -> None:
+        """Export all finished spans."""
+        with self._lock:
+            spans, self._finished = self._finished, []
+        if not spans:
+            return
+        self.exporter.export(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": _otlp_attributes(
+                                {"service.name": self.service_name}
+                            )
+                        },
+                        "scopeSpans": [
+                            {
+                                "scope": {"name": "trae_agent"},
+                                "spans": [span.to_otlp() for span in spans],
+                            }
+                        ],
+                    }
+                ]
+            }
+        )
+
+    def shutdown(self) -> None:
+        """Export the remaining spans and release the exporter."""
+        self.flush()
+        self.exporter.shutdown()
+
+
+@contextmanager
+def trace_span(
+    tracer: Tracer | None,
+    name: str,
+    attributes: dict[str, AttributeValue] | None = None,
+    kind: int = SPAN_KIND_INTERNAL,
+) -> Iterator[Span]:
+    """Open a span on `tracer`, or a throwaway span if tracing is disabled."""
+    if tracer is None:
+        yield Span(name=name, kind=kind)
+        return
+    with tracer.span(name, attributes, kind) as span:
+        yield span
+
+
+def create_tracer(
+    tracing_config: TracingConfig, http_client: "httpx.Client | None" = None
+) -> Tracer:
+    """Create a tracer exporting to the file or OTLP endpoint of the config."""
+    if tracing_config.exporter == "otlp":
+        if not tracing_config.endpoint:
+            raise ValueError("The OTLP trace exporter requires an endpoint")
+        exporter: SpanExporter = OTLPSpanExporter(
+            tracing_config.endpoint, tracing_config.headers, http_client
+        )
+    elif tracing_config.exporter == "file":
+        exporter = FileSpanExporter(tracing_config.path)
+    else:
+        raise ValueError(f"Unsupported trace exporter: {tracing_config.exporter}")
+    return Tracer(exporter, tracing_config.service_name)
+
+
+def load_spans(path: str | Path) -> list[dict[str, object]]:
+    """Read back all spans written by a `FileSpanExporter`."""
+    spans: list[dict[str, object]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    spans.extend(scope_spans["spans"])
+    return spans
@@ -9,12 +9,14 @@
 """Trajectory recording functionality for Trae Agent."""
 
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 from ..tools.base import ToolCall, ToolResult
 from .llm_basics import LLMMessage, LLMResponse
+from .metrics import TRAJECTORY_BYTES
 
 
 class TrajectoryRecorder:
@@ -45,6 +47,8 @@ class TrajectoryRecorder:
             "execution_time": 0.0,
         }
         self._start_time: datetime | None = None
+        # Seconds spent writing the trajectory file, over all saves
+        self.write_time: float = 0.0
 
     def start_recording(
         self, task: str, provider: str, model: str, max_steps: int
@@ -142,6 +146,7 @@ class TrajectoryRecorder:
         tool_results: list[ToolResult] | None = None,
         reflection: str | None = None,
         error: str | None = None,
+        timings: dict[str, Any] | None = None,
     ) -> None:
         """Record an agent execution step.
 
@@ -154,6 +159,7 @@ class TrajectoryRecorder:
             tool_results: Results from tool execution
             reflection: Agent reflection on the step
             error: Error message if step failed
+            timings: Latency breakdown of the step
         """
         step_data = {
             "step_number": step_number,
@@ -192,6 +198,7 @@ class TrajectoryRecorder:
             else None,
             "reflection": reflection,
             "error": error,
+            "timings": timings,
         }
 
         self.trajectory_data["agent_steps"].append(step_data)
@@ -223,15 +230,19 @@ class TrajectoryRecorder:
 
     def save_trajectory(self) -> None:
         """Save the current trajectory data to file."""
+        start_time = time.perf_counter()
         try:
             # Ensure directory exists
             self.trajectory_path.parent.mkdir(parents=True, exist_ok=True)
 
             with open(self.trajectory_path, "w", encoding="utf-8") as f:
                 json.dump(self.trajectory_data, f, indent=2, ensure_ascii=False)
+                TRAJECTORY_BYTES.inc(f.tell())
 
         except Exception as e:
             print(f"Warning: Failed to save trajectory to {self.trajectory_path}: {e}")
+        finally:
+            self.write_time += time.perf_counter() - start_time
 
     def _serialize_message(self, message: LLMMessage) -> dict[str, Any]:
         """Serialize an LLM message to a dictionary."""
@@ -0,0 +1,268 @@
+# Copyright (c) 2025 ByteDance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""Copy-on-write snapshots of a git checkout, kept in its object store.
+
+A snapshot records every file of the working tree that is not ignored,
+including uncommitted and untracked changes, like `git stash` but without
+touching HEAD, the index or the branches of the checkout. It is built in a
+temporary index seeded from the real one, so git only hashes the files that
+changed since they were last staged, and only their new contents are stored.
+
+Snapshots always cover the whole checkout, so they are only rolled back for a
+project at its top-level directory: for a project in a subdirectory, a
+rollback would also rewrite the files around it.
+
+Snapshots are refs under `refs/worktree/`, so each worktree, such as a fork
+made for a parallel attempt, has its own. A fork is a detached `git worktree`
+of a snapshot: it shares the object store instead of copying the repository.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+
+from .git_utils import GitError, git_output, run_git
+
+SNAPSHOT_REF_PREFIX = "refs/worktree/polli-snapshots/"
+# Saved by every rollback, so that a rollback can be undone
+BEFORE_ROLLBACK = "before-rollback"
+
+SNAPSHOT_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+# Commit message of a snapshot, with its sequence number for ordering: commit
+# dates only have a resolution of one second
+SNAPSHOT_MESSAGE_RE = re.compile(r"^polli snapshot (\d+) ")
+
+# Snapshot commits do not depend on the user's git identity being configured
+SNAPSHOT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "Polli Agent",
+    "GIT_AUTHOR_EMAIL": "polli-agent@localhost",
+    "GIT_COMMITTER_NAME": "Polli Agent",
+    "GIT_COMMITTER_EMAIL": "polli-agent@localhost",
+}
+
+
+@dataclass
+class Snapshot:
+    """A saved state of the working tree."""
+
+    name: str
+    commit: str
+    # Unix time the snapshot was taken, to the second
+    created: int
+    # Higher for later snapshots of the worktree
+    sequence: int = 0
+
+
+class WorkspaceSnapshots:
+    """Takes, restores and forks snapshots of the checkout around a project path."""
+
+    def __init__(self, project_path: str):
+        self.project_path: str = project_path
+        self._root: str | None = None
+
+    async def root(self) -> str:
+        """The top-level directory of the checkout.
+
+        Raises:
+            GitError: If the project path is not in a git checkout.
+        """
+        if self._root is None:
+            if not os.path.isdir(self.project_path):
+                raise GitError(f"{self.project_path} is not a directory")
+            self._root = await git_output(
+                self.project_path, "rev-parse", "--show-toplevel"
+            )
+        return self._root
+
+    async def check_top_level(self) -> None:
+        """Make sure the project path is the top-level directory of its checkout.
+
+        Raises:
+            GitError: If the project is a subdirectory of the checkout.
+        """
+        root = await self.root()
+        if not os.path.samefile(root, self.project_path):
+            raise GitError(
+                f"{self.project_path} is in the git checkout {root}, and snapshots cover a whole checkout: use {root} as the project path"
+            )
+
+    async def _capture(self, index_file: str) -> str:
+        """Write the working tree to the object store, and return its tree."""
+        root = await self.root()
+        real_index = os.path.join(
+            root, await git_output(root, "rev-parse", "--git-path", "index")
+        )
+        if os.path.exists(real_index):
+            # The stat data of the real index lets git skip unchanged files
+            _ = shutil.copyfile(real_index, index_file)
+        env = {"GIT_INDEX_FILE": index_file}
+        _ = await git_output(root, "add", "--all", env=env)
+        return await git_output(root, "write-tree", env=env)
+
+    async def _commit(self, name: str, tree: str) -> Snapshot:
+        root = await self.root()
+        returncode, head = await run_git(root, "rev-parse", "--verify", "-q", "HEAD")
+        parents = ["-p", head.strip()] if returncode == 0 else []
+        sequence = 1 + max(
+            (snapshot.sequence for snapshot in await self.list_snapshots()), default=0
+        )
+        commit = await git_output(
+            root,
+            "commit-tree",
+            tree,
+            *parents,
+            "-m",
+            f"polli snapshot {sequence} {name}",
+            env=SNAPSHOT_IDENTITY,
+        )
+        _ = await git_output(root, "update-ref", SNAPSHOT_REF_PREFIX + name, commit)
+        return Snapshot(
+            name=name, commit=commit, created=int(time.time()), sequence=sequence
+        )
+
+    async def create(self, name: str | None = None) -> Snapshot:
+        """Snapshot the working tree, replacing any snapshot of the same name.
+
+        Args:
+            name: Name of the snapshot, `snapshot-<n>` if not given
+
+        Raises:
+            GitError: If the name is invalid or a git command fails.
+        """
+        if name is None:
+            names = {snapshot.name for snapshot in await self.list_snapshots()}
+            number = len(names) + 1
+            while f"snapshot-{number}" in names:
+                number += 1
+            name = f"snapshot-{number}"
+        elif not SNAPSHOT_NAME_RE.match(name):
+            raise GitError(
+                f"Invalid snapshot name {name!r}: use up to 64 letters, digits, '.', '_' or '-'"
+            )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tree = await self._capture(os.path.join(tmp_dir, "index"))
+        return await self._commit(name, tree)
+
+    async def list_snapshots(self) -> list[Snapshot]:
+        """The snapshots of this worktree, oldest first."""
+        output = await git_output(
+            await self.root(),
+            "for-each-ref",
+            "--format=%(refname:lstrip=3)%09%(objectname)%09%(creatordate:unix)%09%(contents:subject)",
+            SNAPSHOT_REF_PREFIX,
+        )
+        snapshots: list[Snapshot] = []
+        for line in output.splitlines():
+            name, commit, created, subject = line.split("\t", 3)
+            match = SNAPSHOT_MESSAGE_RE.match(subject)
+            snapshots.append(
+                Snapshot(
+                    name=name,
+                    commit=commit,
+                    created=int(created),
+                    sequence=int(match[1]) if match else 0,
+                )
+            )
+        return sorted(
+            snapshots, key=lambda snapshot: (snapshot.sequence, snapshot.created)
+        )
+
+    async def get(self, name: str | None = None) -> Snapshot:
+        """A snapshot by name, or the latest one other than BEFORE_ROLLBACK.
+
+        Raises:
+            GitError: If there is no such snapshot.
+        """
+        snapshots = await self.list_snapshots()
+        if name is None:
+            candidates = [s for s in snapshots if s.name != BEFORE_ROLLBACK]
+            if not candidates:
+                raise GitError("There are no snapshots to roll back to")
+            return candidates[-1]
+        for snapshot in snapshots:
+            if snapshot.name == name:
+                return snapshot
+        raise GitError(
+            f"No snapshot named {name!r}. Snapshots: {[s.name for s in snapshots]}"
+        )
+
+    async def rollback(self, name: str | None = None) -> list[str]:
+        """Restore the working tree to a snapshot.
+
+        Files that changed since the snapshot are rewritten and files created
+        since are removed; ignored files, HEAD and the index are left alone.
+        The state before the rollback is saved as the BEFORE_ROLLBACK snapshot.
+
+        Args:
+            name: The snapshot, the latest one if not given
+
+        Returns:
+            The paths that changed, relative to the checkout root.
+
+        Raises:
+            GitError: If the project path is not the top-level directory, or
+                there is no such snapshot.
+        """
+        await self.check_top_level()
+        snapshot = await self.get(name)
+        root = await self.root()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_file = os.path.join(tmp_dir, "index")
+            current = await self._capture(index_file)
+            target = await git_output(root, "rev-parse", f"{snapshot.commit}^{{tree}}")
+            if current == target:
+                return []
+            changed = await git_output(
+                root, "diff-tree", "-r", "--name-only", current, target
+            )
+            _ = await self._commit(BEFORE_ROLLBACK, current)
+            # A two-tree merge from the current state, like a checkout
+            _ = await git_output(
+                root,
+                "read-tree",
+                "-m",
+                "-u",
+                current,
+                target,
+                env={"GIT_INDEX_FILE": index_file},
+            )
+        return changed.splitlines()
+
+    async def delete(self, name: str) -> None:
+        """Delete a snapshot.
+
+        Raises:
+            GitError: If there is no such snapshot.
+        """
+        snapshot = await self.get(name)
+        _ = await git_output(
+            await self.root(), "update-ref", "-d", SNAPSHOT_REF_PREFIX + snapshot.name
+        )
+
+    async def fork(self, path: str, name: str | None = None) -> str:
+        """Check out a snapshot in a new detached worktree at path.
+
+        Args:
+            path: Directory for the fork, which must not exist yet
+            name: The snapshot to fork, a new snapshot of the working tree if
+                not given
+
+        Returns:
+            The absolute path of the fork.
+        """
+        snapshot = await self.get(name) if name else await self.create()
+        path = os.path.abspath(path)
+        _ = await git_output(
+            await self.root(), "worktree", "add", "--detach", path, snapshot.commit
+        )
+        return path
+
+    async def remove_fork(self, path: str) -> None:
+        """Remove a fork and its changes."""
+        _ = await git_output(
+            await self.root(), "worktree", "remove", "--force", os.path.abspath(path)
+        )